@@ -0,0 +1,281 @@
+import logging
+import re
+from dataclasses import dataclass, fields
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+import httpx
+
+_PORTAS_PADRAO = {"http": "80", "https": "443"}
+_ARQUIVOS_INDICE = ("index.html", "index.htm", "index.php", "index.shtml")
+_ESCAPE_PERCENT = re.compile(r"%[0-9a-fA-F]{2}")
+_NAO_RESERVADOS = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~"
+)
+
+
+@dataclass(frozen=True)
+class RegraCanonizacao:
+    """
+    Regras de canonização de um site.
+
+    barra_final aceita 'manter' (o padrão), 'adicionar' (em caminhos sem
+    extensão) ou 'remover'. Com 'manter', '/docs/x' e '/docs/x/' se unem
+    pelo redirecionamento do servidor, aprendido durante o rastreamento.
+    substituicoes é uma sequência de pares (regex, substituto) aplicados ao
+    caminho, na ordem. forcar_https troca http por https e fica desligado por
+    padrão: só os hosts cuja regra o liga são reescritos, então um site
+    servido apenas por http (inclusive a URL inicial) é buscado como foi
+    informado; http e https se unem pelo redirecionamento do servidor.
+    """
+
+    parametros_permitidos: tuple = ()
+    remover_index: bool = True
+    barra_final: str = "manter"
+    caminho_minusculo: bool = False
+    forcar_https: bool = False
+    substituicoes: tuple = ()
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "RegraCanonizacao":
+        """
+        Cria uma regra a partir de um dicionário (ex: do config_urls.json),
+        ignorando chaves desconhecidas.
+        """
+        nomes = {campo.name for campo in fields(cls)}
+        valores = {chave: valor for chave, valor in dados.items() if chave in nomes}
+        for chave in ("parametros_permitidos", "substituicoes"):
+            if chave in valores:
+                valores[chave] = tuple(
+                    tuple(item) if isinstance(item, list) else item
+                    for item in valores[chave]
+                )
+        return cls(**valores)
+
+
+def _normalizar_escapes(texto: str) -> str:
+    """
+    Função interna que decodifica escapes de caracteres não reservados e põe
+    os demais escapes em maiúsculas
+    """
+
+    def trocar(escape):
+        caractere = chr(int(escape.group()[1:], 16))
+        return caractere if caractere in _NAO_RESERVADOS else escape.group().upper()
+
+    return _ESCAPE_PERCENT.sub(trocar, texto)
+
+
+def _remover_segmentos_ponto(caminho: str) -> str:
+    """
+    Função interna que resolve os segmentos '.' e '..' e as barras repetidas
+    """
+    segmentos = caminho.split("/")
+    resultado = []
+    for segmento in segmentos[1:-1]:
+        if segmento in ("", "."):
+            continue
+        if segmento == "..":
+            if resultado:
+                resultado.pop()
+            continue
+        resultado.append(segmento)
+    ultimo = segmentos[-1] if len(segmentos) > 1 else ""
+    if ultimo == "..":
+        if resultado:
+            resultado.pop()
+        ultimo = ""
+    elif ultimo == ".":
+        ultimo = ""
+    return "/" + "/".join(resultado + [ultimo]) if resultado else "/" + ultimo
+
+
+class Canonizador:
+    """
+    Reduz URLs equivalentes a uma única forma canônica antes da busca.
+
+    Aplica regras gerais (esquema e host em minúsculas, porta padrão, '..',
+    escapes, fragmento, index.html, parâmetros fora da lista permitida) e as
+    regras configuradas por site. Também aprende equivalências durante o
+    rastreamento (redirecionamentos e <link rel=canonical>), que passam a
+    valer para as próximas URLs.
+    """
+
+    def __init__(self, regras: dict | None = None, max_saltos: int = 10):
+        """
+        Inicializa o canonizador.
+
+        Args:
+            regras: Regras por host (dicionários ou RegraCanonizacao); a chave
+                '*' é a regra padrão e um host vale também para os subdomínios
+            max_saltos: Equivalências aprendidas seguidas em cadeia, no máximo
+        """
+        regras = dict(regras or {})
+        self.regra_padrao = self._como_regra(regras.pop("*", RegraCanonizacao()))
+        self.regras = {
+            host.lower(): self._como_regra(regra) for host, regra in regras.items()
+        }
+        self.max_saltos = max_saltos
+        self._equivalencias: dict[str, str] = {}
+
+    @staticmethod
+    def _como_regra(regra) -> RegraCanonizacao:
+        """
+        Método interno que aceita regras em dicionário ou RegraCanonizacao
+        """
+        if isinstance(regra, RegraCanonizacao):
+            return regra
+        return RegraCanonizacao.de_dict(regra)
+
+    @classmethod
+    def de_config(cls, config: dict, regras_extras: dict | None = None):
+        """
+        Cria o canonizador com as regras da chave 'regras_canonizacao' do
+        config_urls.json, sobrepostas pelas regras extras.
+
+        Args:
+            config: Configuração carregada do config_urls.json
+            regras_extras: Regras por host que sobrepõem as da configuração
+
+        Returns:
+            Canonizador configurado
+        """
+        regras = dict(config.get("regras_canonizacao", {}))
+        regras.update(regras_extras or {})
+        return cls(regras)
+
+    def regra(self, host: str) -> RegraCanonizacao:
+        """
+        Retorna a regra de um host (a do domínio mais específico que o cobre).
+        """
+        partes = host.split(".")
+        for inicio in range(len(partes)):
+            regra = self.regras.get(".".join(partes[inicio:]))
+            if regra is not None:
+                return regra
+        return self.regra_padrao
+
+    def normalizar(self, url: str, url_base: str | None = None) -> str:
+        """
+        Aplica as regras de canonização, sem as equivalências aprendidas.
+
+        Args:
+            url: URL relativa ou absoluta
+            url_base: URL da página onde a URL foi encontrada (opcional)
+
+        Returns:
+            URL normalizada
+        """
+        if url_base:
+            url = urljoin(url_base, url)
+        partes = urlsplit(url.strip())
+        esquema = partes.scheme.lower()
+        if esquema not in _PORTAS_PADRAO:
+            return urlunsplit(partes._replace(fragment=""))
+        host = (partes.hostname or "").rstrip(".")
+        regra = self.regra(host)
+
+        if regra.forcar_https and esquema == "http":
+            esquema = "https"
+        try:
+            porta = partes.port
+        except ValueError:
+            porta = None
+        netloc = f"[{host}]" if ":" in host else host
+        if porta is not None and str(porta) not in (
+            _PORTAS_PADRAO[esquema],
+            _PORTAS_PADRAO[partes.scheme.lower()],
+        ):
+            netloc = f"{netloc}:{porta}"
+
+        caminho = _remover_segmentos_ponto(_normalizar_escapes(partes.path or "/"))
+        for padrao, substituto in regra.substituicoes:
+            caminho = re.sub(padrao, substituto, caminho)
+        if regra.caminho_minusculo:
+            caminho = caminho.lower()
+        if regra.remover_index:
+            pasta, _, arquivo = caminho.rpartition("/")
+            if arquivo.lower() in _ARQUIVOS_INDICE:
+                caminho = pasta + "/"
+        if caminho != "/":
+            ultimo = caminho.rsplit("/", 1)[-1]
+            if regra.barra_final == "remover":
+                caminho = caminho.rstrip("/") or "/"
+            elif regra.barra_final == "adicionar" and ultimo and "." not in ultimo:
+                caminho += "/"
+
+        query = ""
+        if regra.parametros_permitidos and partes.query:
+            parametros = sorted(
+                (nome, valor)
+                for nome, valor in parse_qsl(partes.query, keep_blank_values=True)
+                if nome in regra.parametros_permitidos
+            )
+            query = urlencode(parametros)
+
+        return urlunsplit((esquema, netloc, caminho, query, ""))
+
+    def canonizar(self, url: str, url_base: str | None = None) -> str:
+        """
+        Retorna a forma canônica de uma URL: as regras de canonização mais as
+        equivalências aprendidas no rastreamento.
+
+        Args:
+            url: URL relativa ou absoluta
+            url_base: URL da página onde a URL foi encontrada (opcional)
+
+        Returns:
+            URL canônica
+        """
+        canonica = self.normalizar(url, url_base)
+        for _ in range(self.max_saltos):
+            proxima = self._equivalencias.get(canonica)
+            if proxima is None or proxima == canonica:
+                break
+            canonica = proxima
+        return canonica
+
+    def aprender(self, origem: str, destino: str) -> bool:
+        """
+        Registra que duas URLs são a mesma página (redirecionamento ou
+        <link rel=canonical>).
+
+        Args:
+            origem: URL acessada
+            destino: URL canônica da página
+
+        Returns:
+            True se a equivalência é nova
+        """
+        origem = self.normalizar(origem)
+        destino = self.canonizar(destino)
+        if origem == destino or self._equivalencias.get(origem) == destino:
+            return False
+        self._equivalencias[origem] = destino
+        logging.debug(f"URL equivalente aprendida: {origem} -> {destino}")
+        return True
+
+    async def observar_resposta(self, response: httpx.Response) -> None:
+        """
+        Hook de resposta do httpx que aprende os redirecionamentos seguidos.
+
+        Args:
+            response: Resposta recebida pelo cliente
+        """
+        if response.has_redirect_location:
+            origem = str(response.request.url)
+            self.aprender(origem, urljoin(origem, response.headers["location"]))
+
+    @property
+    def equivalencias(self) -> dict:
+        """
+        Equivalências aprendidas (URL normalizada -> URL canônica).
+        """
+        return dict(self._equivalencias)
+
+    def carregar_equivalencias(self, equivalencias: dict) -> None:
+        """
+        Restaura equivalências aprendidas em um rastreamento anterior.
+
+        Args:
+            equivalencias: Dicionário gerado pela propriedade equivalencias
+        """
+        self._equivalencias.update(equivalencias)
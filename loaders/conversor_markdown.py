@@ -0,0 +1,481 @@
+import re
+
+_TITULO = re.compile(r"h(\d+)")
+_LINHA_COM_CONTEUDO = re.compile(r"^(.*)", flags=re.MULTILINE)
+_ESPACOS = re.compile(r"[\t ]+")
+_TODOS_ESPACOS = re.compile(r"[\t \r\n]+")
+_QUEBRAS_COM_ESPACOS = re.compile(r"[\t \r\n]*[\r\n][\t \r\n]*")
+_QUEBRAS_NAS_PONTAS = re.compile(r"^(\n*)((?:.*[^\n])?)(\n*)$", flags=re.DOTALL)
+_BLOCOS = frozenset(
+    {
+        "p",
+        "blockquote",
+        "article",
+        "div",
+        "section",
+        "ol",
+        "ul",
+        "li",
+        "dl",
+        "dt",
+        "dd",
+        "table",
+        "thead",
+        "tbody",
+        "tfoot",
+        "tr",
+        "td",
+        "th",
+    }
+)
+_SEM_FORMATACAO = frozenset({"pre", "code", "kbd", "samp"})
+
+
+def _nome(no) -> str | None:
+    """
+    Função interna que retorna o nome da tag de um elemento (None para textos,
+    comentários e instruções de processamento)
+    """
+    if isinstance(no, str) or no is None:
+        return None
+    return no.tag if isinstance(no.tag, str) else None
+
+
+def _remove_espaco_dentro(nome: str | None) -> bool:
+    """
+    Função interna que indica se o espaço logo dentro da tag é descartado
+    (elementos de bloco)
+    """
+    return bool(nome) and (nome in _BLOCOS or _TITULO.match(nome) is not None)
+
+
+def _remove_espaco_fora(nome: str | None) -> bool:
+    """
+    Função interna que indica se o espaço logo fora da tag é descartado
+    """
+    return nome == "pre" or _remove_espaco_dentro(nome)
+
+
+def _filhos(elemento) -> list:
+    """
+    Função interna que lista os filhos de um elemento como nós separados:
+    textos (str) e elementos, na ordem do documento
+    """
+    filhos = [elemento.text] if elemento.text else []
+    for filho in elemento:
+        filhos.append(filho)
+        if filho.tail:
+            filhos.append(filho.tail)
+    return filhos
+
+
+def _separar(texto: str) -> tuple[str, str, str]:
+    """
+    Função interna que separa o espaço das pontas de um texto inline, para
+    que ele fique fora da marcação (ex: '<b> a</b>' vira ' **a**')
+    """
+    prefixo = " " if texto and texto[0] == " " else ""
+    sufixo = " " if texto and texto[-1] == " " else ""
+    return prefixo, sufixo, texto.strip()
+
+
+def _inline(marcador: str):
+    """
+    Função interna que cria a conversão de uma tag inline simples (negrito,
+    itálico, código...) que envolve o texto com o marcador
+    """
+
+    def converter(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        if "_sem_formatacao" in tags_pais:
+            return texto
+        prefixo, sufixo, texto = _separar(texto)
+        if not texto:
+            return ""
+        return f"{prefixo}{marcador}{texto}{marcador}{sufixo}"
+
+    return converter
+
+
+class ConversorMarkdown:
+    """
+    Converte uma árvore lxml.html em Markdown, sem BeautifulSoup.
+
+    Reproduz a saída do MarkdownConverter padrão do markdownify (títulos h1/h2
+    sublinhados, '*' para ênfase, '*' e '_' escapados, sem quebra de linhas),
+    percorrendo diretamente a árvore que o readability já produziu.
+    """
+
+    def converter(self, raiz) -> str:
+        """
+        Converte um documento em Markdown.
+
+        Args:
+            raiz: Elemento raiz (<html>) da árvore lxml.html
+
+        Returns:
+            Markdown do documento
+        """
+        return self._processar_tag(raiz, frozenset()).strip("\n")
+
+    def _processar_tag(self, elemento, tags_pais: frozenset) -> str:
+        """
+        Método interno que converte um elemento e os seus descendentes
+        """
+        nome = elemento.tag
+        dentro = _remove_espaco_dentro(nome)
+        filhos = _filhos(elemento)
+
+        tags_filhos = tags_pais | {nome}
+        if nome in ("td", "th") or _TITULO.match(nome):
+            tags_filhos |= {"_inline"}
+        if nome in _SEM_FORMATACAO:
+            tags_filhos |= {"_sem_formatacao"}
+
+        partes = []
+        ultimo = len(filhos) - 1
+        for indice, filho in enumerate(filhos):
+            anterior = filhos[indice - 1] if indice else None
+            proximo = filhos[indice + 1] if indice < ultimo else None
+            if isinstance(filho, str):
+                if not filho.strip():
+                    if dentro and (anterior is None or proximo is None):
+                        continue
+                    if _remove_espaco_fora(_nome(anterior)) or _remove_espaco_fora(
+                        _nome(proximo)
+                    ):
+                        continue
+                texto = self._processar_texto(
+                    filho, anterior, proximo, dentro, tags_filhos
+                )
+            elif isinstance(filho.tag, str):
+                texto = self._processar_tag(filho, tags_filhos)
+            else:
+                continue
+            if texto:
+                partes.append(texto)
+
+        if nome != "pre" and "pre" not in tags_pais:
+            # Junta as quebras de linha nas fronteiras entre os filhos,
+            # limitando a duas
+            colapsadas = [""]
+            for parte in partes:
+                quebras_inicio, conteudo, quebras_fim = _QUEBRAS_NAS_PONTAS.match(
+                    parte
+                ).groups()
+                if colapsadas[-1] and quebras_inicio:
+                    quebras_anteriores = colapsadas.pop()
+                    quebras_inicio = "\n" * min(
+                        2, max(len(quebras_anteriores), len(quebras_inicio))
+                    )
+                colapsadas.extend([quebras_inicio, conteudo, quebras_fim])
+            partes = colapsadas
+        texto = "".join(partes)
+
+        titulo = _TITULO.match(nome)
+        if titulo:
+            return self._converter_titulo(int(titulo.group(1)), texto, tags_pais)
+        conversao = self._CONVERSOES.get(nome.lower())
+        return conversao(self, elemento, texto, tags_pais) if conversao else texto
+
+    def _processar_texto(
+        self, texto: str, anterior, proximo, pai_bloco: bool, tags_pais: frozenset
+    ) -> str:
+        """
+        Método interno que normaliza o espaço e escapa um nó de texto
+        """
+        if "pre" not in tags_pais:
+            texto = _QUEBRAS_COM_ESPACOS.sub("\n", texto)
+            texto = _ESPACOS.sub(" ", texto)
+        if "_sem_formatacao" not in tags_pais and texto:
+            texto = texto.replace("*", r"\*").replace("_", r"\_")
+
+        if _remove_espaco_fora(_nome(anterior)) or (pai_bloco and anterior is None):
+            texto = texto.lstrip(" \t\r\n")
+        if _remove_espaco_fora(_nome(proximo)) or (pai_bloco and proximo is None):
+            texto = texto.rstrip()
+        return texto
+
+    def _converter_titulo(self, nivel: int, texto: str, tags_pais: frozenset) -> str:
+        """
+        Método interno que converte h1..h6 (h1 e h2 sublinhados)
+        """
+        if "_inline" in tags_pais:
+            return texto
+        nivel = max(1, min(6, nivel))
+        texto = texto.strip()
+        if nivel <= 2:
+            texto = texto.rstrip()
+            if not texto:
+                return ""
+            return f"\n\n{texto}\n{('=' if nivel == 1 else '-') * len(texto)}\n\n"
+        texto = _TODOS_ESPACOS.sub(" ", texto)
+        return f"\n\n{'#' * nivel} {texto}\n\n"
+
+    def _converter_a(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        if "_sem_formatacao" in tags_pais:
+            return texto
+        prefixo, sufixo, texto = _separar(texto)
+        if not texto:
+            return ""
+        href = elemento.get("href")
+        titulo = elemento.get("title")
+        if texto.replace(r"\_", "_") == href and not titulo:
+            return f"<{href}>"
+        parte_titulo = ' "%s"' % titulo.replace('"', r"\"") if titulo else ""
+        if not href:
+            return texto
+        return f"{prefixo}[{texto}]({href}{parte_titulo}){sufixo}"
+
+    def _converter_blockquote(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        texto = (texto or "").strip(" \t\r\n")
+        if "_inline" in tags_pais:
+            return " " + texto + " "
+        if not texto:
+            return "\n"
+        texto = _LINHA_COM_CONTEUDO.sub(
+            lambda linha: "> " + linha.group(1) if linha.group(1) else ">", texto
+        )
+        return "\n" + texto + "\n\n"
+
+    def _converter_br(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        return " " if "_inline" in tags_pais else "  \n"
+
+    def _converter_code(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        if "pre" in tags_pais:
+            return texto
+        return self._converter_crase(elemento, texto, tags_pais)
+
+    def _converter_div(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        if "_inline" in tags_pais:
+            return " " + texto.strip() + " "
+        texto = texto.strip()
+        return f"\n\n{texto}\n\n" if texto else ""
+
+    def _converter_dd(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        texto = (texto or "").strip()
+        if "_inline" in tags_pais:
+            return " " + texto + " "
+        if not texto:
+            return "\n"
+        texto = _LINHA_COM_CONTEUDO.sub(
+            lambda linha: "    " + linha.group(1) if linha.group(1) else "", texto
+        )
+        return ":" + texto[1:] + "\n"
+
+    def _converter_dt(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        texto = _TODOS_ESPACOS.sub(" ", (texto or "").strip())
+        if "_inline" in tags_pais:
+            return " " + texto + " "
+        if not texto:
+            return "\n"
+        return f"\n\n{texto}\n"
+
+    def _converter_hr(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        return "\n\n---\n\n"
+
+    def _converter_img(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        alt = elemento.get("alt") or ""
+        src = elemento.get("src") or ""
+        titulo = elemento.get("title") or ""
+        parte_titulo = ' "%s"' % titulo.replace('"', r"\"") if titulo else ""
+        if "_inline" in tags_pais:
+            return alt
+        return f"![{alt}]({src}{parte_titulo})"
+
+    def _converter_video(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        if "_inline" in tags_pais:
+            return texto
+        src = elemento.get("src") or ""
+        if not src:
+            fontes = [
+                fonte
+                for fonte in elemento.iterdescendants("source")
+                if fonte.get("src") is not None
+            ]
+            if fontes:
+                src = fontes[0].get("src") or ""
+        poster = elemento.get("poster") or ""
+        if src and poster:
+            return f"[![{texto}]({poster})]({src})"
+        if src:
+            return f"[{texto}]({src})"
+        if poster:
+            return f"![{texto}]({poster})"
+        return texto
+
+    def _converter_lista(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        antes_de_paragrafo = False
+        proximo = self._proximo_conteudo(elemento)
+        if proximo is not None and _nome(proximo) not in ("ul", "ol"):
+            antes_de_paragrafo = True
+        if "li" in tags_pais:
+            return "\n" + texto.rstrip()
+        return "\n\n" + texto + ("\n" if antes_de_paragrafo else "")
+
+    @staticmethod
+    def _proximo_conteudo(elemento):
+        """
+        Método interno que retorna o próximo irmão com conteúdo (elemento ou
+        texto não vazio), ignorando comentários e espaços
+        """
+        if elemento.tail and elemento.tail.strip():
+            return elemento.tail
+        for irmao in elemento.itersiblings():
+            if isinstance(irmao.tag, str):
+                return irmao
+            if irmao.tail and irmao.tail.strip():
+                return irmao.tail
+        return None
+
+    def _converter_li(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        texto = (texto or "").strip()
+        if not texto:
+            return "\n"
+
+        pai = elemento.getparent()
+        if pai is not None and pai.tag == "ol":
+            inicio = pai.get("start")
+            inicio = int(inicio) if inicio and inicio.isnumeric() else 1
+            anteriores = sum(1 for irmao in elemento.itersiblings("li", preceding=True))
+            marcador = f"{inicio + anteriores}."
+        else:
+            profundidade = sum(1 for ancestral in elemento.iterancestors("ul")) - 1
+            marcador = "*+-"[profundidade % 3]
+        marcador += " "
+        recuo = " " * len(marcador)
+        texto = _LINHA_COM_CONTEUDO.sub(
+            lambda linha: recuo + linha.group(1) if linha.group(1) else "", texto
+        )
+        return marcador + texto[len(marcador) :] + "\n"
+
+    def _converter_p(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        if "_inline" in tags_pais:
+            return " " + texto.strip(" \t\r\n") + " "
+        texto = texto.strip(" \t\r\n")
+        return f"\n\n{texto}\n\n" if texto else ""
+
+    def _converter_pre(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        return f"\n\n```\n{texto}\n```\n\n" if texto else ""
+
+    def _converter_vazio(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        return ""
+
+    def _converter_table(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        return "\n\n" + texto.strip() + "\n\n"
+
+    def _converter_caption(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        return texto.strip() + "\n\n"
+
+    def _converter_figcaption(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        return "\n\n" + texto.strip() + "\n\n"
+
+    @staticmethod
+    def _colunas(celula) -> int:
+        """
+        Método interno que retorna quantas colunas uma célula ocupa
+        """
+        colspan = celula.get("colspan")
+        return int(colspan) if colspan is not None and colspan.isdigit() else 1
+
+    def _converter_celula(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        return " " + texto.strip().replace("\n", " ") + " |" * self._colunas(elemento)
+
+    def _converter_tr(self, elemento, texto: str, tags_pais: frozenset) -> str:
+        celulas = list(elemento.iterdescendants("td", "th"))
+        pai = elemento.getparent()
+        nome_pai = pai.tag if pai is not None else None
+        primeira_linha = next(self._irmaos_anteriores(elemento), None) is None
+        linha_cabecalho = all(celula.tag == "th" for celula in celulas) or (
+            nome_pai == "thead" and len(list(pai.iterdescendants("tr"))) == 1
+        )
+        sem_cabecalho = (primeira_linha and nome_pai != "tbody") or (
+            primeira_linha
+            and nome_pai == "tbody"
+            and next(pai.getparent().iterdescendants("thead"), None) is None
+        )
+        colunas = sum(self._colunas(celula) for celula in celulas)
+        acima = abaixo = ""
+        if linha_cabecalho and primeira_linha:
+            abaixo = "| " + " | ".join(["---"] * colunas) + " |\n"
+        elif sem_cabecalho or (
+            primeira_linha
+            and (
+                nome_pai == "table"
+                or (
+                    nome_pai == "tbody"
+                    and next(self._irmaos_anteriores(pai), None) is None
+                )
+            )
+        ):
+            acima = "| " + " | ".join([""] * colunas) + " |\n"
+            acima += "| " + " | ".join(["---"] * colunas) + " |\n"
+        return acima + "|" + texto + "\n" + abaixo
+
+    @staticmethod
+    def _irmaos_anteriores(elemento):
+        """
+        Método interno que percorre os elementos irmãos anteriores (sem
+        textos e comentários)
+        """
+        return (
+            irmao
+            for irmao in elemento.itersiblings(preceding=True)
+            if isinstance(irmao.tag, str)
+        )
+
+    _converter_crase = _inline("`")
+    _CONVERSOES = {
+        "a": _converter_a,
+        "article": _converter_div,
+        "b": _inline("**"),
+        "blockquote": _converter_blockquote,
+        "br": _converter_br,
+        "caption": _converter_caption,
+        "code": _converter_code,
+        "dd": _converter_dd,
+        "del": _inline("~~"),
+        "div": _converter_div,
+        "dl": _converter_div,
+        "dt": _converter_dt,
+        "em": _inline("*"),
+        "figcaption": _converter_figcaption,
+        "hr": _converter_hr,
+        "i": _inline("*"),
+        "img": _converter_img,
+        "kbd": _converter_code,
+        "li": _converter_li,
+        "list": _converter_lista,
+        "ol": _converter_lista,
+        "p": _converter_p,
+        "pre": _converter_pre,
+        "s": _inline("~~"),
+        "samp": _converter_code,
+        "script": _converter_vazio,
+        "section": _converter_div,
+        "strong": _inline("**"),
+        "style": _converter_vazio,
+        "sub": _inline(""),
+        "sup": _inline(""),
+        "table": _converter_table,
+        "td": _converter_celula,
+        "th": _converter_celula,
+        "tr": _converter_tr,
+        "ul": _converter_lista,
+        "video": _converter_video,
+    }
+
+
+def markdown_da_arvore(raiz) -> str:
+    """
+    Converte uma árvore lxml.html em Markdown com o ConversorMarkdown.
+
+    Args:
+        raiz: Elemento raiz (<html>) da árvore
+
+    Returns:
+        Markdown do documento
+    """
+    return _CONVERSOR.converter(raiz)
+
+
+_CONVERSOR = ConversorMarkdown()
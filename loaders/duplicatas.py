@@ -0,0 +1,190 @@
+import hashlib
+import re
+from loaders.persistencia import carregar_json, salvar_json
+
+_BITS = 64
+_LARGURA_CONTADOR = 24
+_MASCARA_CONTADOR = (1 << _LARGURA_CONTADOR) - 1
+
+# Para cada posição de byte do hash, o byte "espalhado" em contadores de
+# _LARGURA_CONTADOR bits: somar os valores espalhados de todos os shingles
+# conta quantos hashes têm cada um dos 64 bits ligados, com uma soma de
+# inteiros por shingle em vez de um laço de 64 bits.
+_ESPALHADO = [
+    [
+        sum(
+            1 << ((8 * posicao + bit) * _LARGURA_CONTADOR)
+            for bit in range(8)
+            if byte >> bit & 1
+        )
+        for byte in range(256)
+    ]
+    for posicao in range(_BITS // 8)
+]
+
+
+def simhash(texto: str, tamanho_shingle: int = 3, min_palavras: int = 20) -> int | None:
+    """
+    Calcula a impressão SimHash de 64 bits de um texto.
+
+    Textos parecidos geram impressões com poucos bits diferentes (distância
+    de Hamming pequena).
+
+    Args:
+        texto: Texto da página (ex: o Markdown convertido)
+        tamanho_shingle: Palavras por shingle
+        min_palavras: Textos com menos palavras não recebem impressão
+
+    Returns:
+        Impressão como inteiro, ou None se o texto for curto demais
+    """
+    palavras = re.findall(r"\w+", texto.lower())
+    if len(palavras) < min_palavras:
+        return None
+    shingles = {
+        " ".join(palavras[i : i + tamanho_shingle])
+        for i in range(len(palavras) - tamanho_shingle + 1)
+    }
+
+    contadores = 0
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        contadores += sum(tabela[byte] for tabela, byte in zip(_ESPALHADO, digest))
+
+    metade = len(shingles) / 2
+    impressao = 0
+    for bit in range(_BITS):
+        if (contadores >> (bit * _LARGURA_CONTADOR)) & _MASCARA_CONTADOR > metade:
+            impressao |= 1 << bit
+    return impressao
+
+
+class IndiceDuplicatas:
+    """
+    Índice LSH de impressões SimHash para achar páginas quase duplicadas.
+
+    A impressão é dividida em distancia_maxima + 1 bandas: duas impressões a
+    no máximo distancia_maxima bits de distância coincidem em pelo menos uma
+    banda, então só as URLs dos mesmos baldes são comparadas.
+    """
+
+    def __init__(self, distancia_maxima: int = 3):
+        """
+        Inicializa o índice vazio.
+
+        Args:
+            distancia_maxima: Bits diferentes aceitos para considerar duas
+                páginas quase duplicadas
+        """
+        self.distancia_maxima = distancia_maxima
+        self._bandas = distancia_maxima + 1
+        self._bits_banda = -(-_BITS // self._bandas)
+        self._impressoes: dict[str, int] = {}
+        self._baldes: list[dict[int, set]] = [{} for _ in range(self._bandas)]
+        self.alterado = False
+
+    def __len__(self) -> int:
+        return len(self._impressoes)
+
+    def _chaves(self, impressao: int) -> list:
+        """
+        Método interno que divide a impressão nas chaves de cada banda
+        """
+        mascara = (1 << self._bits_banda) - 1
+        return [
+            (impressao >> (banda * self._bits_banda)) & mascara
+            for banda in range(self._bandas)
+        ]
+
+    def buscar(self, impressao: int, ignorar: str | None = None) -> str | None:
+        """
+        Procura uma página já indexada quase igual à impressão.
+
+        Args:
+            impressao: Impressão SimHash da página
+            ignorar: URL a desconsiderar (a própria página, ao refazê-la)
+
+        Returns:
+            URL da página mais parecida dentro da distância máxima, ou None
+        """
+        melhor, menor_distancia = None, self.distancia_maxima + 1
+        candidatas = set()
+        for banda, chave in enumerate(self._chaves(impressao)):
+            candidatas.update(self._baldes[banda].get(chave, ()))
+        candidatas.discard(ignorar)
+        for url in candidatas:
+            distancia = (self._impressoes[url] ^ impressao).bit_count()
+            if distancia < menor_distancia or (
+                distancia == menor_distancia and melhor is not None and url < melhor
+            ):
+                melhor, menor_distancia = url, distancia
+        return melhor
+
+    def adicionar(self, url: str, impressao: int) -> None:
+        """
+        Indexa (ou reindexa) a impressão de uma URL.
+
+        Args:
+            url: URL da página
+            impressao: Impressão SimHash da página
+        """
+        self.remover(url)
+        self._impressoes[url] = impressao
+        for banda, chave in enumerate(self._chaves(impressao)):
+            self._baldes[banda].setdefault(chave, set()).add(url)
+        self.alterado = True
+
+    def remover(self, url: str) -> None:
+        """
+        Tira uma URL do índice, se estiver nele.
+
+        Args:
+            url: URL da página
+        """
+        impressao = self._impressoes.pop(url, None)
+        if impressao is None:
+            return
+        for banda, chave in enumerate(self._chaves(impressao)):
+            balde = self._baldes[banda][chave]
+            balde.discard(url)
+            if not balde:
+                del self._baldes[banda][chave]
+        self.alterado = True
+
+    def salvar(self, caminho: str) -> None:
+        """
+        Grava o índice em JSON de forma atômica (arquivo temporário + rename).
+
+        Args:
+            caminho: Caminho do arquivo do índice
+        """
+        salvar_json(
+            {
+                "distancia_maxima": self.distancia_maxima,
+                "impressoes": {
+                    url: format(impressao, "016x")
+                    for url, impressao in self._impressoes.items()
+                },
+            },
+            caminho,
+        )
+        self.alterado = False
+
+    @classmethod
+    def carregar(cls, caminho: str, distancia_maxima: int = 3) -> "IndiceDuplicatas":
+        """
+        Carrega um índice salvo, ou cria um vazio se o arquivo não existir.
+
+        Args:
+            caminho: Caminho do arquivo do índice
+            distancia_maxima: Distância máxima do índice
+
+        Returns:
+            Índice de duplicatas
+        """
+        indice = cls(distancia_maxima)
+        dados = carregar_json(caminho, {})
+        for url, impressao in dados.get("impressoes", {}).items():
+            indice.adicionar(url, int(impressao, 16))
+        indice.alterado = False
+        return indice
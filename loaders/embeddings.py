@@ -0,0 +1,389 @@
+from abc import ABC, abstractmethod
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import sqlite3
+import struct
+from importlib.util import find_spec
+
+_FORMATOS_VETOR = {"float32": "f", "float16": "e"}
+
+
+class Codificador(ABC):
+    """
+    Transforma textos em vetores de tamanho fixo.
+
+    'nome' identifica o modelo no cache: vetores de codificadores com nomes
+    diferentes nunca se misturam.
+    """
+
+    nome: str
+    dimensao: int
+
+    @abstractmethod
+    def codificar(self, textos: list) -> list:
+        """
+        Codifica um lote de textos.
+
+        Args:
+            textos: Textos a codificar
+
+        Returns:
+            Um vetor (sequência de floats de tamanho dimensao) por texto
+        """
+
+
+class CodificadorHashing(Codificador):
+    """
+    Codificador local e determinístico por feature hashing: cada palavra (e
+    par de palavras) soma +-1 em uma posição escolhida pelo hash, com peso
+    sublinear, e o vetor é normalizado. Não precisa de modelo nem de rede,
+    o que o torna adequado para testes.
+    """
+
+    def __init__(self, dimensao: int = 256, bigramas: bool = True):
+        """
+        Inicializa o codificador.
+
+        Args:
+            dimensao: Tamanho dos vetores
+            bigramas: Se pares de palavras vizinhas também viram features
+        """
+        self.dimensao = dimensao
+        self.bigramas = bigramas
+        self.nome = f"hashing-{dimensao}{'-bigramas' if bigramas else ''}"
+
+    def _vetor(self, texto: str) -> list:
+        """
+        Método interno que codifica um único texto
+        """
+        palavras = re.findall(r"\w+", texto.lower())
+        features = palavras + (
+            [f"{a} {b}" for a, b in zip(palavras, palavras[1:])]
+            if self.bigramas
+            else []
+        )
+        contagens = {}
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            valor = int.from_bytes(digest, "little")
+            chave = (valor % self.dimensao, 1.0 if valor >> 63 else -1.0)
+            contagens[chave] = contagens.get(chave, 0) + 1
+
+        vetor = [0.0] * self.dimensao
+        for (posicao, sinal), contagem in contagens.items():
+            vetor[posicao] += sinal * (1 + math.log(contagem))
+        norma = math.sqrt(sum(valor * valor for valor in vetor))
+        return [valor / norma for valor in vetor] if norma else vetor
+
+    def codificar(self, textos: list) -> list:
+        return [self._vetor(texto) for texto in textos]
+
+
+class CodificadorSentenceTransformers(Codificador):
+    """
+    Qualquer modelo do sentence-transformers rodando localmente (CPU por
+    padrão). Requer o pacote opcional 'sentence-transformers'.
+    """
+
+    def __init__(
+        self,
+        modelo: str = "sentence-transformers/all-MiniLM-L6-v2",
+        dispositivo: str = "cpu",
+        normalizar: bool = True,
+    ):
+        """
+        Carrega o modelo.
+
+        Args:
+            modelo: Nome ou caminho do modelo
+            dispositivo: Dispositivo do torch ('cpu', 'cuda'...)
+            normalizar: Se os vetores devem ter norma 1
+
+        Raises:
+            ImportError: Se o pacote 'sentence-transformers' não estiver instalado
+        """
+        if find_spec("sentence_transformers") is None:
+            raise ImportError(
+                "Pacote 'sentence-transformers' não instalado. "
+                "Use CodificadorHashing ou instale o pacote."
+            )
+        from sentence_transformers import SentenceTransformer
+
+        self.modelo = SentenceTransformer(modelo, device=dispositivo)
+        self.normalizar = normalizar
+        self.dimensao = self.modelo.get_sentence_embedding_dimension()
+        self.nome = f"st-{modelo}"
+
+    def codificar(self, textos: list) -> list:
+        return self.modelo.encode(
+            textos,
+            batch_size=len(textos),
+            normalize_embeddings=self.normalizar,
+            show_progress_bar=False,
+        ).tolist()
+
+
+class CacheEmbeddings:
+    """
+    Cache persistente de vetores indexado pelo hash do conteúdo do texto.
+
+    Os vetores ficam em um arquivo binário de linhas de tamanho fixo
+    (float32 ou float16, na ordem de bytes da máquina), só com acréscimos,
+    lido por mmap; um SQLite guarda a linha de cada hash. Com o numpy
+    instalado, matriz() devolve um numpy.memmap.
+    """
+
+    def __init__(self, pasta: str, codificador: Codificador, tipo: str = "float32"):
+        """
+        Abre (ou cria) o cache de um codificador.
+
+        Args:
+            pasta: Pasta do cache
+            codificador: Codificador cujos vetores o cache guarda
+            tipo: 'float32' ou 'float16'
+
+        Raises:
+            ValueError: Se o tipo for desconhecido ou o cache existente for de
+                outro codificador, dimensão ou tipo
+        """
+        if tipo not in _FORMATOS_VETOR:
+            raise ValueError(f"Tipo de vetor desconhecido: {tipo}")
+        self.dimensao = codificador.dimensao
+        self.tipo = tipo
+        self._formato = _FORMATOS_VETOR[tipo]
+        self._bytes_linha = struct.calcsize(self._formato) * self.dimensao
+        os.makedirs(pasta, exist_ok=True)
+        self.caminho_vetores = f"{pasta}/vetores.{tipo}"
+
+        self._conexao = sqlite3.connect(f"{pasta}/indice.sqlite3")
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)"
+        )
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS vetores "
+            "(hash TEXT PRIMARY KEY, linha INTEGER NOT NULL)"
+        )
+        meta = {
+            "modelo": codificador.nome,
+            "dimensao": str(self.dimensao),
+            "tipo": tipo,
+        }
+        salvo = dict(self._conexao.execute("SELECT chave, valor FROM meta"))
+        if salvo and salvo != meta:
+            self._conexao.close()
+            raise ValueError(f"Cache em {pasta} é de outro codificador: {salvo}")
+        self._conexao.executemany(
+            "INSERT OR IGNORE INTO meta VALUES (?, ?)", meta.items()
+        )
+        self._conexao.commit()
+
+        # Linhas gravadas sem índice (interrupção no meio de um lote) são
+        # descartadas: o arquivo volta a ter uma linha por hash indexado.
+        (linhas,) = self._conexao.execute("SELECT COUNT(*) FROM vetores").fetchone()
+        with open(self.caminho_vetores, "ab") as f:
+            f.truncate(linhas * self._bytes_linha)
+        self.linhas = linhas
+        self._mapa = None
+
+    def __len__(self) -> int:
+        return self.linhas
+
+    def linhas_de(self, hashes: list) -> dict:
+        """
+        Retorna a linha de cada hash que já está no cache.
+
+        Args:
+            hashes: Hashes de conteúdo
+
+        Returns:
+            Dicionário hash -> linha (só os encontrados)
+        """
+        encontrados = {}
+        for inicio in range(0, len(hashes), 500):
+            parte = hashes[inicio : inicio + 500]
+            marcadores = ",".join("?" * len(parte))
+            encontrados.update(
+                self._conexao.execute(
+                    f"SELECT hash, linha FROM vetores WHERE hash IN ({marcadores})",
+                    parte,
+                )
+            )
+        return encontrados
+
+    def adicionar(self, hashes: list, vetores: list) -> None:
+        """
+        Acrescenta vetores ao cache.
+
+        Args:
+            hashes: Hash de conteúdo de cada vetor
+            vetores: Vetores, na mesma ordem dos hashes
+        """
+        with open(self.caminho_vetores, "ab") as f:
+            for vetor in vetores:
+                if len(vetor) != self.dimensao:
+                    raise ValueError(
+                        f"Vetor com {len(vetor)} posições (esperado {self.dimensao})"
+                    )
+                f.write(struct.pack(f"{self.dimensao}{self._formato}", *vetor))
+            f.flush()
+            os.fsync(f.fileno())
+        self._conexao.executemany(
+            "INSERT INTO vetores VALUES (?, ?)",
+            ((hash_texto, self.linhas + i) for i, hash_texto in enumerate(hashes)),
+        )
+        self._conexao.commit()
+        self.linhas += len(hashes)
+        self._fechar_mapa()
+
+    def matriz(self):
+        """
+        Todos os vetores do cache como uma matriz mapeada em memória.
+
+        Returns:
+            numpy.memmap (linhas x dimensao) se o numpy estiver instalado, ou
+            um memoryview plano de floats (linha i = [i*dimensao:(i+1)*dimensao]);
+            None se o cache estiver vazio
+        """
+        if not self.linhas:
+            return None
+        if find_spec("numpy") is not None:
+            import numpy
+
+            return numpy.memmap(
+                self.caminho_vetores,
+                dtype=self.tipo,
+                mode="r",
+                shape=(self.linhas, self.dimensao),
+            )
+        if self._mapa is None:
+            with open(self.caminho_vetores, "rb") as f:
+                self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mapa).cast(self._formato)
+
+    def vetor(self, linha: int) -> list:
+        """
+        Lê o vetor de uma linha do cache.
+
+        Args:
+            linha: Linha do vetor (ver linhas_de)
+
+        Returns:
+            Lista de floats
+        """
+        matriz = self.matriz()
+        if isinstance(matriz, memoryview):
+            inicio = linha * self.dimensao
+            return matriz[inicio : inicio + self.dimensao].tolist()
+        return matriz[linha].tolist()
+
+    def _fechar_mapa(self) -> None:
+        """
+        Método interno que descarta o mmap para que ele veja as novas linhas
+        """
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+
+    def fechar(self) -> None:
+        self._fechar_mapa()
+        self._conexao.close()
+
+
+def hash_texto(texto: str) -> str:
+    """
+    Hash de conteúdo usado como chave do cache de embeddings.
+    """
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def embutir_colecao(
+    nome_colecao: str,
+    codificador: Codificador | None = None,
+    tamanho_lote: int = 64,
+    tipo: str = "float32",
+    pasta_cache: str = "data/embeddings",
+) -> dict:
+    """
+    Calcula os embeddings dos trechos de uma coleção (trechos.jsonl).
+
+    Os trechos são lidos em streaming e enviados ao codificador em lotes; só
+    os textos cujo hash ainda não está no cache são codificados, então um
+    trecho inalterado nunca é codificado de novo, mesmo vindo de outra
+    coleção. O mapeamento id do trecho -> linha do cache é gravado em
+    embeddings.<codificador>.<tipo>.jsonl na coleção.
+
+    Args:
+        nome_colecao: Nome da coleção (já dividida com dividir_colecao)
+        codificador: Codificador dos textos (padrão: CodificadorHashing)
+        tamanho_lote: Textos por chamada ao codificador
+        tipo: 'float32' ou 'float16'
+        pasta_cache: Pasta raiz dos caches, um por codificador e tipo
+
+    Returns:
+        Dicionário com o número de trechos, textos codificados e textos
+        reaproveitados do cache
+    """
+    codificador = codificador or CodificadorHashing()
+    nome_seguro = re.sub(r"[^\w.-]+", "_", codificador.nome)
+    cache = CacheEmbeddings(f"{pasta_cache}/{nome_seguro}/{tipo}", codificador, tipo)
+    caminho_colecao = f"data/collections/{nome_colecao}"
+    caminho_saida = f"{caminho_colecao}/embeddings.{nome_seguro}.{tipo}.jsonl"
+    estatisticas = {"trechos": 0, "codificados": 0, "do_cache": 0}
+
+    def processar_lote(lote: list, saida) -> None:
+        hashes = list(dict.fromkeys(hash_conteudo for _, hash_conteudo, _ in lote))
+        linhas = cache.linhas_de(hashes)
+        estatisticas["do_cache"] += len(linhas)
+        faltando = {}
+        for _, hash_conteudo, texto in lote:
+            if hash_conteudo not in linhas:
+                faltando.setdefault(hash_conteudo, texto)
+        if faltando:
+            cache.adicionar(
+                list(faltando), codificador.codificar(list(faltando.values()))
+            )
+            linhas.update(cache.linhas_de(list(faltando)))
+        estatisticas["codificados"] += len(faltando)
+        for id_trecho, hash_conteudo, _ in lote:
+            saida.write(
+                json.dumps(
+                    {
+                        "id": id_trecho,
+                        "hash": hash_conteudo,
+                        "linha": linhas[hash_conteudo],
+                    },
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+
+    try:
+        caminho_temp = f"{caminho_saida}.tmp"
+        with (
+            open(f"{caminho_colecao}/trechos.jsonl", "r", encoding="utf-8") as trechos,
+            open(caminho_temp, "w", encoding="utf-8") as saida,
+        ):
+            lote = []
+            for linha in trechos:
+                trecho = json.loads(linha)
+                lote.append(
+                    (trecho["id"], hash_texto(trecho["texto"]), trecho["texto"])
+                )
+                estatisticas["trechos"] += 1
+                if len(lote) >= tamanho_lote:
+                    processar_lote(lote, saida)
+                    lote = []
+            if lote:
+                processar_lote(lote, saida)
+        os.replace(caminho_temp, caminho_saida)
+    finally:
+        cache.fechar()
+
+    logging.info(f"Embeddings da coleção {nome_colecao}: {estatisticas}")
+    return estatisticas
@@ -0,0 +1,387 @@
+from abc import ABC, abstractmethod
+import json
+import logging
+import os
+import sqlite3
+from loaders.persistencia import carregar_json, salvar_json
+
+
+class EstadoRastreamento(ABC):
+    """
+    Armazena o estado persistente de uma coleção: as URLs por tipo
+    (ex: 'urls_vistas') e os metadados por URL do rastreamento incremental.
+
+    As verificações de pertinência são O(1) e as alterações são gravadas de
+    forma incremental, então uma interrupção não perde o que já foi salvo.
+    """
+
+    @abstractmethod
+    def adicionar(self, url: str, tipo: str) -> None:
+        """
+        Registra uma URL em um tipo.
+
+        Args:
+            url: URL a registrar
+            tipo: Tipo de URL (ex: 'urls_vistas')
+        """
+
+    @abstractmethod
+    def contem(self, url: str, tipo: str) -> bool:
+        """
+        Verifica se uma URL está registrada em um tipo.
+
+        Args:
+            url: URL a verificar
+            tipo: Tipo de URL
+
+        Returns:
+            True se a URL está registrada
+        """
+
+    @abstractmethod
+    def listar(self, tipo: str) -> list:
+        """
+        Lista as URLs de um tipo, na ordem em que foram registradas.
+
+        Args:
+            tipo: Tipo de URL
+
+        Returns:
+            Lista de URLs
+        """
+
+    @abstractmethod
+    def obter_metadados(self, url: str) -> dict:
+        """
+        Retorna uma cópia dos metadados salvos de uma URL.
+
+        Args:
+            url: URL consultada
+
+        Returns:
+            Dicionário de metadados (vazio se a URL é desconhecida)
+        """
+
+    @abstractmethod
+    def salvar_metadados(self, url: str, metadados: dict) -> None:
+        """
+        Substitui os metadados salvos de uma URL.
+
+        Args:
+            url: URL dos metadados
+            metadados: Metadados a salvar
+        """
+
+    @abstractmethod
+    def salvar_checkpoint(self, checkpoint: dict) -> None:
+        """
+        Substitui o checkpoint do rastreamento (fronteira e contadores).
+
+        Args:
+            checkpoint: Dicionário serializável em JSON
+        """
+
+    @abstractmethod
+    def carregar_checkpoint(self) -> dict | None:
+        """
+        Retorna o último checkpoint salvo.
+
+        Returns:
+            Checkpoint, ou None se não houver
+        """
+
+    @abstractmethod
+    def salvar(self) -> None:
+        """
+        Garante que as alterações pendentes estão gravadas em disco.
+        """
+
+    @abstractmethod
+    def fechar(self) -> None:
+        """
+        Salva as alterações pendentes e libera o arquivo do estado.
+        """
+
+    def importar_json(self, caminho_json: str) -> None:
+        """
+        Importa um urls.json no formato antigo (listas por tipo e o dicionário
+        'metadados_urls').
+
+        Args:
+            caminho_json: Caminho do urls.json
+        """
+        try:
+            with open(caminho_json, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.error(f"Erro ao importar {caminho_json}: {e}")
+            return
+
+        for tipo, valores in dados.items():
+            if tipo == "metadados_urls" and isinstance(valores, dict):
+                for url, metadados in valores.items():
+                    self.salvar_metadados(url, metadados)
+            elif isinstance(valores, list):
+                for url in valores:
+                    self.adicionar(url, tipo)
+        self.salvar()
+        logging.info(f"Estado importado de {caminho_json}")
+
+
+class EstadoSQLite(EstadoRastreamento):
+    """
+    Estado em um banco SQLite indexado, em modo WAL.
+
+    As inserções ficam na transação aberta até salvar(), que faz o commit.
+    """
+
+    def __init__(self, caminho: str):
+        """
+        Abre (ou cria) o banco do estado.
+
+        Args:
+            caminho: Caminho do arquivo SQLite
+        """
+        self.caminho = caminho
+        self._conexao = sqlite3.connect(caminho)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            "tipo TEXT NOT NULL, url TEXT NOT NULL, UNIQUE (tipo, url))"
+        )
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS metadados ("
+            "url TEXT PRIMARY KEY, dados TEXT NOT NULL)"
+        )
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), dados TEXT NOT NULL)"
+        )
+        self._conexao.commit()
+
+    def adicionar(self, url: str, tipo: str) -> None:
+        self._conexao.execute(
+            "INSERT OR IGNORE INTO urls (tipo, url) VALUES (?, ?)", (tipo, url)
+        )
+
+    def contem(self, url: str, tipo: str) -> bool:
+        cursor = self._conexao.execute(
+            "SELECT 1 FROM urls WHERE tipo = ? AND url = ?", (tipo, url)
+        )
+        return cursor.fetchone() is not None
+
+    def listar(self, tipo: str) -> list:
+        cursor = self._conexao.execute(
+            "SELECT url FROM urls WHERE tipo = ? ORDER BY rowid", (tipo,)
+        )
+        return [url for (url,) in cursor]
+
+    def obter_metadados(self, url: str) -> dict:
+        cursor = self._conexao.execute(
+            "SELECT dados FROM metadados WHERE url = ?", (url,)
+        )
+        linha = cursor.fetchone()
+        return json.loads(linha[0]) if linha else {}
+
+    def salvar_metadados(self, url: str, metadados: dict) -> None:
+        self._conexao.execute(
+            "INSERT OR REPLACE INTO metadados (url, dados) VALUES (?, ?)",
+            (url, json.dumps(metadados, ensure_ascii=False)),
+        )
+
+    def salvar_checkpoint(self, checkpoint: dict) -> None:
+        self._conexao.execute(
+            "INSERT OR REPLACE INTO checkpoint (id, dados) VALUES (1, ?)",
+            (json.dumps(checkpoint, ensure_ascii=False),),
+        )
+
+    def carregar_checkpoint(self) -> dict | None:
+        linha = self._conexao.execute(
+            "SELECT dados FROM checkpoint WHERE id = 1"
+        ).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def salvar(self) -> None:
+        self._conexao.commit()
+
+    def fechar(self) -> None:
+        self._conexao.commit()
+        self._conexao.close()
+
+
+class EstadoJsonl(EstadoRastreamento):
+    """
+    Estado em um log JSONL somente de acréscimo, espelhado em memória.
+
+    Cada alteração vira uma linha do log. Ao abrir, o log é reaplicado (uma
+    última linha truncada por uma interrupção é ignorada), e a cada
+    'intervalo_compactacao' linhas o log é reescrito só com o estado atual.
+
+    O checkpoint, que é substituído por inteiro a cada gravação, fica fora do
+    log, em '<caminho>.checkpoint.json', trocado de forma atômica.
+    """
+
+    def __init__(self, caminho: str, intervalo_compactacao: int = 5000):
+        """
+        Abre (ou cria) o log do estado.
+
+        Args:
+            caminho: Caminho do arquivo JSONL
+            intervalo_compactacao: Linhas acrescentadas entre compactações
+        """
+        self.caminho = caminho
+        self.caminho_checkpoint = f"{caminho}.checkpoint.json"
+        self.intervalo_compactacao = intervalo_compactacao
+        self._urls: dict[str, dict[str, None]] = {}
+        self._metadados: dict[str, dict] = {}
+        self._checkpoint: dict | None = None
+        self._linhas_desde_compactacao = 0
+
+        log_integro = self._reaplicar_log() if os.path.exists(caminho) else True
+        if self._checkpoint is not None:
+            # Log de uma versão que gravava o checkpoint como linha: migra
+            # para o arquivo próprio e compacta o log para removê-lo
+            self.salvar_checkpoint(self._checkpoint)
+            log_integro = False
+        else:
+            self._checkpoint = carregar_json(self.caminho_checkpoint)
+        self._arquivo = open(caminho, "a", encoding="utf-8")
+        if not log_integro:
+            self.compactar()
+
+    def _reaplicar_log(self) -> bool:
+        """
+        Método interno que reconstrói o estado em memória a partir do log
+
+        Returns:
+            False se alguma linha estava inválida ou incompleta
+        """
+        integro = True
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            for numero, linha in enumerate(f, start=1):
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    logging.warning(
+                        f"Linha {numero} inválida em {self.caminho}, ignorada"
+                    )
+                    integro = False
+                    continue
+                self._aplicar(registro)
+                integro = integro and linha.endswith("\n")
+        return integro
+
+    def _aplicar(self, registro: dict) -> None:
+        """
+        Método interno que aplica um registro do log ao estado em memória
+        """
+        if "tipo" in registro:
+            self._urls.setdefault(registro["tipo"], {})[registro["url"]] = None
+        elif "checkpoint" in registro:
+            self._checkpoint = registro["checkpoint"]
+        else:
+            self._metadados[registro["url"]] = registro["metadados"]
+
+    def _registrar(self, registro: dict) -> None:
+        """
+        Método interno que aplica um registro e o acrescenta ao log
+        """
+        self._aplicar(registro)
+        self._arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._linhas_desde_compactacao += 1
+
+    def adicionar(self, url: str, tipo: str) -> None:
+        if not self.contem(url, tipo):
+            self._registrar({"tipo": tipo, "url": url})
+
+    def contem(self, url: str, tipo: str) -> bool:
+        return url in self._urls.get(tipo, {})
+
+    def listar(self, tipo: str) -> list:
+        return list(self._urls.get(tipo, {}))
+
+    def obter_metadados(self, url: str) -> dict:
+        return dict(self._metadados.get(url, {}))
+
+    def salvar_metadados(self, url: str, metadados: dict) -> None:
+        self._registrar({"url": url, "metadados": dict(metadados)})
+
+    def salvar_checkpoint(self, checkpoint: dict) -> None:
+        salvar_json(checkpoint, self.caminho_checkpoint)
+        self._checkpoint = checkpoint
+
+    def carregar_checkpoint(self) -> dict | None:
+        return self._checkpoint
+
+    def compactar(self) -> None:
+        """
+        Reescreve o log só com o estado atual, de forma atômica.
+        """
+        caminho_temp = f"{self.caminho}.tmp"
+        registros = [
+            {"tipo": tipo, "url": url}
+            for tipo, urls in self._urls.items()
+            for url in urls
+        ]
+        registros.extend(
+            {"url": url, "metadados": metadados}
+            for url, metadados in self._metadados.items()
+        )
+
+        with open(caminho_temp, "w", encoding="utf-8") as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._arquivo.close()
+        os.replace(caminho_temp, self.caminho)
+        self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        self._linhas_desde_compactacao = 0
+
+    def salvar(self) -> None:
+        if self._linhas_desde_compactacao >= self.intervalo_compactacao:
+            self.compactar()
+            return
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+    def fechar(self) -> None:
+        self.salvar()
+        self._arquivo.close()
+
+
+def abrir_estado(nome_colecao: str, backend: str = "sqlite") -> EstadoRastreamento:
+    """
+    Abre o estado persistente de uma coleção.
+
+    Na primeira abertura, um urls.json existente da coleção é importado.
+
+    Args:
+        nome_colecao: Nome da coleção
+        backend: 'sqlite' (banco indexado em WAL) ou 'jsonl' (log de acréscimo)
+
+    Returns:
+        Estado da coleção
+
+    Raises:
+        ValueError: Se o backend for desconhecido
+    """
+    caminho_colecao = f"data/collections/{nome_colecao}"
+    os.makedirs(caminho_colecao, exist_ok=True)
+
+    if backend == "sqlite":
+        caminho = f"{caminho_colecao}/estado.sqlite3"
+        novo = not os.path.exists(caminho)
+        estado = EstadoSQLite(caminho)
+    elif backend == "jsonl":
+        caminho = f"{caminho_colecao}/estado.jsonl"
+        novo = not os.path.exists(caminho)
+        estado = EstadoJsonl(caminho)
+    else:
+        raise ValueError(f"Backend de estado desconhecido: {backend}")
+
+    caminho_json = f"{caminho_colecao}/urls.json"
+    if novo and os.path.exists(caminho_json):
+        estado.importar_json(caminho_json)
+    return estado
@@ -0,0 +1,57 @@
+class FalhaBusca(ValueError):
+    """
+    Resultado malsucedido da busca de uma URL pelo httpx.
+
+    'precisa_navegador' indica se vale a pena tentar a URL de novo pelo
+    Playwright; os demais resultados são definitivos para a URL.
+    """
+
+    precisa_navegador = False
+
+
+class PaginaNaoEncontrada(FalhaBusca):
+    """
+    O servidor respondeu 404 ou 410.
+    """
+
+
+class ConteudoNaoHtml(FalhaBusca):
+    """
+    A resposta não é HTML (PDF, imagem, arquivo para download...).
+    """
+
+
+class ConteudoGrandeDemais(FalhaBusca):
+    """
+    A página passa do tamanho máximo aceito (pelo content-length ou durante
+    o download).
+    """
+
+
+class ErroTransitorio(FalhaBusca):
+    """
+    Erro de rede, timeout ou 5xx que persistiu depois das novas tentativas.
+    """
+
+
+class HostSobrecarregado(FalhaBusca):
+    """
+    O host continuou respondendo 429/503 depois das novas tentativas.
+    """
+
+
+class AcessoBloqueado(FalhaBusca):
+    """
+    O servidor recusou a requisição (401, 403...); um navegador de verdade
+    costuma passar pelas proteções contra bots que causam essas respostas.
+    """
+
+    precisa_navegador = True
+
+
+class BloqueadaPorRobots(AcessoBloqueado):
+    """
+    O robots.txt do host não permite acessar a URL.
+    """
+
+    precisa_navegador = False
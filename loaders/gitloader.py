@@ -1,66 +1,547 @@
+import hashlib
 import requests
-from requests.exceptions import HTTPError
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError, RequestException
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+import shutil
+import tempfile
+import time
 import zipfile
-import io
 import os
+from loaders.persistencia import carregar_json, salvar_json
+from loaders.manifesto import (
+    DiffManifesto,
+    carregar_manifesto,
+    comparar_manifestos,
+    gerar_manifesto,
+    salvar_manifesto,
+)
 
+PADROES_EXCLUIDOS_PADRAO = (
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.ico",
+    "*.pdf",
+    "*.zip",
+    "*.gz",
+    "*.tar",
+    "*.jar",
+    "*.exe",
+    "*.dll",
+    "*.so",
+    "*.dylib",
+    "*.bin",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.mp3",
+    "*.mp4",
+)
+TAMANHO_BLOCO_DOWNLOAD = 1024 * 1024
+URL_API_GITHUB = "https://api.github.com"
+URL_GITHUB = "https://github.com"
+ARQUIVOS_CONTROLE = (".commit.json", ".manifesto.json", ".manifesto.anterior.json")
 
-def validar_url(url_repo: str) -> tuple[bool, str | HTTPError | str]:
+
+def mostrar_progresso(baixados: int, total: int | None) -> None:
     """
-    Valida se uma URL de repositório GitHub é acessível.
+    Mostra o progresso do download no terminal.
 
     Args:
-        url_repo: URL do repositório a validar
+        baixados: Bytes baixados até agora
+        total: Tamanho total em bytes, se o servidor informar
+    """
+    mb = baixados / (1024 * 1024)
+    if total:
+        print(f"\rBaixando: {mb:.1f} MB ({baixados / total:.0%})", end="", flush=True)
+    else:
+        print(f"\rBaixando: {mb:.1f} MB", end="", flush=True)
 
-    Returns:
-        Tupla contendo (é_válida, mensagem_ou_erro)
+
+def _baixar_para_arquivo(
+    sessao: requests.Session, url: str, arquivo, progresso
+) -> None:
     """
-    try:
-        resposta = requests.get(url_repo)
+    Função interna que baixa a URL em blocos direto para um arquivo aberto,
+    sem manter a resposta inteira na memória
+    """
+    with sessao.get(url, stream=True, timeout=30) as resposta:
         resposta.raise_for_status()
-        print(resposta.status_code)
-        return (True, "URL válida")
-    except HTTPError as httperror:
-        print(f"Repositório não encontrado: {httperror}")
-        return (False, httperror)
-    except Exception as e:
-        print(f"Ocorreu um erro ao acessar a url: {e}")
-        return (False, f"URL invalida: {e}")
+        tamanho = resposta.headers.get("content-length", "")
+        total = int(tamanho) if tamanho.isdigit() else None
+        baixados = 0
+        for bloco in resposta.iter_content(chunk_size=TAMANHO_BLOCO_DOWNLOAD):
+            arquivo.write(bloco)
+            baixados += len(bloco)
+            if progresso:
+                progresso(baixados, total)
+    # Só a barra padrão escreve na mesma linha do terminal e precisa fechá-la
+    if progresso is mostrar_progresso:
+        print()
+
+
+def _deve_extrair(
+    caminho: str,
+    tamanho: int,
+    padroes_incluidos,
+    padroes_excluidos,
+    tamanho_maximo_arquivo: int | None,
+) -> bool:
+    """
+    Função interna que aplica os filtros de glob e de tamanho a um arquivo
+    """
+    if tamanho_maximo_arquivo is not None and tamanho > tamanho_maximo_arquivo:
+        return False
+    nome = os.path.basename(caminho)
+    if any(fnmatch(caminho, p) or fnmatch(nome, p) for p in padroes_excluidos):
+        return False
+    if padroes_incluidos:
+        return any(fnmatch(caminho, p) or fnmatch(nome, p) for p in padroes_incluidos)
+    return True
 
 
-def download_repo(url_repo: str) -> None:
+def _extrair_arquivo(zfile: zipfile.ZipFile, info: zipfile.ZipInfo, destino: str):
+    """
+    Função interna que copia um arquivo do zip em blocos, calculando o
+    SHA-256 no caminho, e aplica ao arquivo a data registrada no zip
     """
-    Baixa um repositório GitHub e extrai em data/repos/.
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    sha = hashlib.sha256()
+    with zfile.open(info) as origem, open(destino, "wb") as saida:
+        for bloco in iter(lambda: origem.read(TAMANHO_BLOCO_DOWNLOAD), b""):
+            sha.update(bloco)
+            saida.write(bloco)
+    data_zip = time.mktime(info.date_time + (0, 0, -1))
+    os.utime(destino, (data_zip, data_zip))
+    return sha.hexdigest()
+
+
+def extrair_selecionados(
+    caminho_zip: str,
+    caminho_destino: str,
+    padroes_incluidos=None,
+    padroes_excluidos=PADROES_EXCLUIDOS_PADRAO,
+    tamanho_maximo_arquivo: int | None = 2 * 1024 * 1024,
+    manifesto_anterior: dict | None = None,
+) -> dict:
+    """
+    Extrai de um zip só os arquivos que passam nos filtros, sem a pasta raiz
+    do zip, e devolve o manifesto dos arquivos extraídos.
+
+    Os padrões são globs (fnmatch) comparados ao caminho dentro do
+    repositório e ao nome do arquivo; '*' também casa com '/', então '*.md'
+    pega os .md de qualquer pasta. Com o manifesto anterior, um arquivo com
+    o mesmo tamanho e CRC do zip que ainda está no disco não é reescrito.
 
     Args:
-        url_repo: URL do repositório GitHub a baixar
+        caminho_zip: Caminho do arquivo zip
+        caminho_destino: Pasta onde os arquivos são extraídos
+        padroes_incluidos: Se informados, só arquivos que casam com algum
+        padroes_excluidos: Arquivos que casam com algum são ignorados
+        tamanho_maximo_arquivo: Bytes máximos de um arquivo (None = sem limite)
+        manifesto_anterior: Manifesto da extração anterior na mesma pasta
+
+    Returns:
+        Manifesto caminho_relativo -> {"tamanho", "mtime", "hash", "crc"}
+
+    Raises:
+        ValueError: Se o zip tiver um caminho que sai da pasta de destino
     """
-    url_valida = validar_url(url_repo)
-    valida, motivo = url_valida
-    if valida:
-        url_split = url_repo.split("/")
-        repositorio = url_split[-1]
-        username = url_split[-2]
-        zip_url = (
-            f"https://github.com/{username}/{repositorio}/archive/refs/heads/main.zip"
-        )
+    manifesto_anterior = manifesto_anterior or {}
+    raiz_destino = os.path.abspath(caminho_destino)
+    manifesto = {}
+    with zipfile.ZipFile(caminho_zip) as zfile:
+        for info in zfile.infolist():
+            if info.is_dir() or "/" not in info.filename:
+                continue
+            caminho_no_repo = info.filename.split("/", 1)[1]
+            if caminho_no_repo in ARQUIVOS_CONTROLE or not _deve_extrair(
+                caminho_no_repo,
+                info.file_size,
+                padroes_incluidos,
+                padroes_excluidos or (),
+                tamanho_maximo_arquivo,
+            ):
+                continue
+            destino = os.path.abspath(os.path.join(raiz_destino, caminho_no_repo))
+            if not destino.startswith(raiz_destino + os.sep):
+                raise ValueError(f"Caminho inválido no zip: {info.filename}")
+
+            entrada = manifesto_anterior.get(caminho_no_repo)
+            if (
+                entrada
+                and entrada.get("crc") == info.CRC
+                and entrada["tamanho"] == info.file_size
+                and os.path.exists(destino)
+                and os.path.getsize(destino) == info.file_size
+            ):
+                manifesto[caminho_no_repo] = dict(entrada)
+                continue
+            hash_conteudo = _extrair_arquivo(zfile, info, destino)
+            manifesto[caminho_no_repo] = {
+                "tamanho": info.file_size,
+                "mtime": os.path.getmtime(destino),
+                "hash": hash_conteudo,
+                "crc": info.CRC,
+            }
+    return manifesto
 
-        caminho_destino = f"data/repos/{repositorio}"
-        os.makedirs(caminho_destino, exist_ok=True)
 
+def _remover_arquivos(caminho_destino: str, caminhos: list) -> None:
+    """
+    Função interna que apaga arquivos removidos do repositório e as pastas
+    que ficaram vazias
+    """
+    for caminho in caminhos:
+        completo = os.path.join(caminho_destino, caminho)
         try:
-            resposta = requests.get(zip_url)
-            resposta.raise_for_status()
+            os.remove(completo)
+        except FileNotFoundError:
+            continue
+        pasta = os.path.dirname(completo)
+        while os.path.abspath(pasta) != os.path.abspath(caminho_destino):
+            try:
+                os.rmdir(pasta)
+            except OSError:
+                break
+            pasta = os.path.dirname(pasta)
 
-            with zipfile.ZipFile(io.BytesIO(resposta.content)) as zfile:
-                zfile.extractall(caminho_destino)
 
-            print(f"repositório baixado com sucesso em: {caminho_destino}")
-        except Exception as e:
-            print(f"ocorreu um erro na aplicação, erro: {e}")
-    else:
-        print(f"A URL é inválida, motivo: {motivo}")
+def _editados_localmente(caminho_destino: str, manifesto: dict) -> list:
+    """
+    Função interna que lista os arquivos extraídos cujo conteúdo no disco não
+    bate mais com o manifesto (editados ou apagados fora da sincronização)
+    """
+    if not manifesto or not os.path.isdir(caminho_destino):
+        return []
+    no_disco = gerar_manifesto(caminho_destino, manifesto, ARQUIVOS_CONTROLE)
+    diff = comparar_manifestos(manifesto, no_disco)
+    return diff.modificados + diff.removidos
+
+
+def diff_ultima_sincronizacao(caminho_repo: str) -> DiffManifesto:
+    """
+    Retorna os arquivos que mudaram na última sincronização de um repositório.
+
+    Args:
+        caminho_repo: Pasta do repositório (ex: retorno de download_repo)
+
+    Returns:
+        DiffManifesto entre a penúltima e a última sincronização (vazio se a
+        última não trouxe mudanças; tudo adicionado na primeira)
+    """
+    return comparar_manifestos(
+        carregar_manifesto(f"{caminho_repo}/.manifesto.anterior.json"),
+        carregar_manifesto(f"{caminho_repo}/.manifesto.json"),
+    )
+
+
+def criar_sessao(max_conexoes: int = 10, token: str | None = None) -> requests.Session:
+    """
+    Cria a sessão HTTP compartilhada pelos downloads de repositórios.
+
+    Args:
+        max_conexoes: Conexões mantidas abertas por host no pool
+        token: Token do GitHub, para o limite maior da API (opcional)
+
+    Returns:
+        Sessão requests configurada
+    """
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=max_conexoes)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    if token:
+        sessao.headers["Authorization"] = f"Bearer {token}"
+    return sessao
+
+
+def resolver_commit(
+    sessao: requests.Session,
+    usuario: str,
+    repositorio: str,
+    ref: str | None = None,
+    url_api: str = URL_API_GITHUB,
+) -> tuple[str, str]:
+    """
+    Descobre o branch padrão (se ref não for informado) e o SHA do commit
+    atual de um repositório pela API do GitHub.
+
+    Args:
+        sessao: Sessão HTTP compartilhada
+        usuario: Dono do repositório
+        repositorio: Nome do repositório
+        ref: Branch, tag ou SHA desejado (padrão: branch padrão do repositório)
+        url_api: URL base da API do GitHub
+
+    Returns:
+        Tupla (ref, sha_do_commit)
+
+    Raises:
+        HTTPError: Se o repositório ou a ref não existir
+    """
+    base = f"{url_api}/repos/{usuario}/{repositorio}"
+    if not ref:
+        resposta = sessao.get(base, timeout=30)
+        resposta.raise_for_status()
+        ref = resposta.json()["default_branch"]
+    resposta = sessao.get(
+        f"{base}/commits/{ref}",
+        headers={"Accept": "application/vnd.github.sha"},
+        timeout=30,
+    )
+    resposta.raise_for_status()
+    return (ref, resposta.text.strip())
+
+
+def _arquivo_em_cache(
+    sessao: requests.Session, url_zip: str, caminho_cache: str, progresso
+) -> str:
+    """
+    Função interna que garante o zip no cache, baixando-o só se faltar; o
+    download vai para um temporário na pasta do cache e é renomeado no fim
+    """
+    if os.path.exists(caminho_cache):
+        return caminho_cache
+    pasta_cache = os.path.dirname(caminho_cache)
+    os.makedirs(pasta_cache, exist_ok=True)
+    arquivo_temp = tempfile.NamedTemporaryFile(
+        dir=pasta_cache, suffix=".zip.tmp", delete=False
+    )
+    try:
+        with arquivo_temp:
+            _baixar_para_arquivo(sessao, url_zip, arquivo_temp, progresso)
+        os.replace(arquivo_temp.name, caminho_cache)
+    finally:
+        if os.path.exists(arquivo_temp.name):
+            os.remove(arquivo_temp.name)
+    return caminho_cache
+
+
+def _nome_repo(url_repo: str) -> tuple[str, str]:
+    """
+    Função interna que extrai (usuário, repositório) da URL do repositório
+    """
+    url_split = url_repo.rstrip("/").split("/")
+    return url_split[-2], url_split[-1]
+
+
+def _ingerir_repo(
+    sessao: requests.Session,
+    url_repo: str,
+    ref: str | None,
+    padroes_incluidos,
+    padroes_excluidos,
+    tamanho_maximo_arquivo: int | None,
+    progresso,
+    pasta_cache: str,
+    url_api: str,
+    url_github: str,
+) -> str | None:
+    """
+    Função interna que resolve o commit, baixa (ou reaproveita) o zip e
+    atualiza a árvore extraída, mexendo só nos arquivos que mudaram
+    """
+    username, repositorio = _nome_repo(url_repo)
+    caminho_destino = f"data/repos/{username}/{repositorio}"
+    caminho_marcador = f"{caminho_destino}/.commit.json"
+    caminho_manifesto = f"{caminho_destino}/.manifesto.json"
+    caminho_anterior = f"{caminho_destino}/.manifesto.anterior.json"
+
+    try:
+        ref, sha = resolver_commit(sessao, username, repositorio, ref, url_api)
+        marcador = {
+            "repositorio": f"{username}/{repositorio}",
+            "sha": sha,
+            "padroes_incluidos": list(padroes_incluidos or []),
+            "padroes_excluidos": list(padroes_excluidos or []),
+            "tamanho_maximo_arquivo": tamanho_maximo_arquivo,
+        }
+        anterior = carregar_manifesto(caminho_manifesto)
+        editados = _editados_localmente(caminho_destino, anterior)
+        if editados:
+            print(
+                f"{username}/{repositorio}: {len(editados)} arquivos alterados "
+                "localmente serão restaurados"
+            )
+        elif (
+            os.path.exists(caminho_manifesto)
+            and carregar_json(caminho_marcador) == marcador
+        ):
+            print(f"{username}/{repositorio} já está no commit {sha[:7]}")
+            shutil.copyfile(caminho_manifesto, caminho_anterior)
+            return caminho_destino
+
+        caminho_zip = _arquivo_em_cache(
+            sessao,
+            f"{url_github}/{username}/{repositorio}/archive/{sha}.zip",
+            f"{pasta_cache}/{username}/{repositorio}/{sha}.zip",
+            progresso,
+        )
+        if not os.path.exists(caminho_manifesto):
+            shutil.rmtree(caminho_destino, ignore_errors=True)
+        os.makedirs(caminho_destino, exist_ok=True)
+        # Os arquivos editados localmente ficam fora do manifesto passado para
+        # a extração, então são reescritos com o conteúdo do zip
+        atual = extrair_selecionados(
+            caminho_zip,
+            caminho_destino,
+            padroes_incluidos,
+            padroes_excluidos,
+            tamanho_maximo_arquivo,
+            {
+                caminho: entrada
+                for caminho, entrada in anterior.items()
+                if caminho not in editados
+            },
+        )
+        diff = comparar_manifestos(anterior, atual)
+        _remover_arquivos(caminho_destino, diff.removidos)
+        salvar_manifesto(anterior, caminho_anterior)
+        salvar_manifesto(atual, caminho_manifesto)
+        salvar_json(marcador, caminho_marcador)
+        print(
+            f"repositório baixado com sucesso em: {caminho_destino} "
+            f"({ref} @ {sha[:7]}: {len(diff.adicionados)} adicionados, "
+            f"{len(diff.modificados)} modificados, {len(diff.removidos)} removidos)"
+        )
+        return caminho_destino
+    except HTTPError as httperror:
+        print(f"Repositório não encontrado: {url_repo} ({httperror})")
         print("Por favor forneça uma url válida")
+    except (RequestException, OSError, zipfile.BadZipFile, ValueError) as e:
+        print(f"ocorreu um erro ao baixar {url_repo}, erro: {e}")
+    return None
+
+
+def download_repos(
+    urls_repos: list,
+    max_workers: int = 4,
+    padroes_incluidos=None,
+    padroes_excluidos=PADROES_EXCLUIDOS_PADRAO,
+    tamanho_maximo_arquivo: int | None = 2 * 1024 * 1024,
+    progresso=None,
+    pasta_cache: str = "data/cache_repos",
+    token: str | None = None,
+    url_api: str = URL_API_GITHUB,
+    url_github: str = URL_GITHUB,
+) -> dict:
+    """
+    Baixa vários repositórios GitHub em paralelo e extrai em
+    data/repos/<usuário>/<repositório>.
+
+    O branch padrão de cada repositório é descoberto pela API, e o zip do
+    commit atual fica em um cache indexado por repositório + SHA: um
+    repositório sem commits novos não é baixado de novo, e a árvore já
+    extraída com os mesmos filtros é reaproveitada. Todos os downloads
+    compartilham o pool de conexões de uma única sessão.
+
+    Cada pasta guarda o manifesto dos arquivos (.manifesto.json), e uma
+    sincronização só reescreve os arquivos adicionados ou modificados e
+    apaga os removidos; diff_ultima_sincronizacao informa o que mudou.
+    Arquivos editados ou apagados localmente na pasta são detectados pelo
+    manifesto e restaurados a partir do zip em cache.
+
+    Args:
+        urls_repos: URLs dos repositórios (uma URL pode terminar em
+            '@ref' para fixar um branch, tag ou SHA)
+        max_workers: Repositórios baixados ao mesmo tempo
+        padroes_incluidos: Globs dos arquivos a extrair (padrão: todos)
+        padroes_excluidos: Globs dos arquivos a ignorar (padrão: binários
+            comuns, como imagens, fontes e arquivos compactados)
+        tamanho_maximo_arquivo: Bytes máximos de um arquivo extraído
+            (padrão: 2 MB; None = sem limite)
+        progresso: Função chamada com (bytes_baixados, total_ou_None) a cada
+            bloco baixado (padrão: nenhuma)
+        pasta_cache: Pasta do cache de zips
+        token: Token do GitHub, para o limite maior da API (opcional)
+        url_api: URL base da API do GitHub
+        url_github: URL base de onde os zips são baixados
+
+    Returns:
+        Dicionário URL -> pasta do repositório extraído (None se falhou)
+
+    Raises:
+        ValueError: Se duas URLs diferentes apontarem para o mesmo
+            repositório (ex: refs diferentes), já que seriam extraídas na
+            mesma pasta
+    """
+    repos = []
+    pastas = {}
+    # URLs repetidas são baixadas uma vez só
+    for url_repo in dict.fromkeys(urls_repos):
+        url, _, ref = url_repo.partition("@")
+        pasta = "/".join(_nome_repo(url)).lower()
+        if pasta in pastas:
+            raise ValueError(
+                f"{pastas[pasta]} e {url_repo} seriam extraídos na mesma pasta"
+            )
+        pastas[pasta] = url_repo
+        repos.append((url_repo, url, ref or None))
+
+    sessao = criar_sessao(max(max_workers, 1) * 2, token)
+
+    with sessao, ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        futuros = {
+            url_repo: executor.submit(
+                _ingerir_repo,
+                sessao,
+                url,
+                ref,
+                padroes_incluidos,
+                padroes_excluidos,
+                tamanho_maximo_arquivo,
+                progresso,
+                pasta_cache,
+                url_api,
+                url_github,
+            )
+            for url_repo, url, ref in repos
+        }
+        return {url_repo: futuro.result() for url_repo, futuro in futuros.items()}
+
+
+def download_repo(
+    url_repo: str,
+    padroes_incluidos=None,
+    padroes_excluidos=PADROES_EXCLUIDOS_PADRAO,
+    tamanho_maximo_arquivo: int | None = 2 * 1024 * 1024,
+    progresso=mostrar_progresso,
+    **params,
+) -> str | None:
+    """
+    Baixa um repositório GitHub e extrai em data/repos/<usuário>/<repositório>.
+
+    O zip do commit atual do branch padrão é baixado em streaming para o
+    cache (memória limitada a um bloco) e só os arquivos selecionados são
+    extraídos. Um repositório inexistente aparece como erro HTTP da API.
+
+    Args:
+        url_repo: URL do repositório GitHub a baixar
+        padroes_incluidos: Globs dos arquivos a extrair (padrão: todos)
+        padroes_excluidos: Globs dos arquivos a ignorar (padrão: binários
+            comuns, como imagens, fontes e arquivos compactados)
+        tamanho_maximo_arquivo: Bytes máximos de um arquivo extraído
+            (padrão: 2 MB; None = sem limite)
+        progresso: Função chamada com (bytes_baixados, total_ou_None) a cada
+            bloco; None para não mostrar progresso
+        **params: Demais parâmetros de download_repos (pasta_cache, token...)
+
+    Returns:
+        Pasta do repositório extraído, ou None se o download falhar
+    """
+    return download_repos(
+        [url_repo],
+        max_workers=1,
+        padroes_incluidos=padroes_incluidos,
+        padroes_excluidos=padroes_excluidos,
+        tamanho_maximo_arquivo=tamanho_maximo_arquivo,
+        progresso=progresso,
+        **params,
+    )[url_repo]
 
 
 if __name__ == "__main__":
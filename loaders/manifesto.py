@@ -0,0 +1,133 @@
+import hashlib
+import os
+from dataclasses import dataclass, field
+from loaders.persistencia import carregar_json, salvar_json
+
+TAMANHO_BLOCO_HASH = 1024 * 1024
+
+
+@dataclass
+class DiffManifesto:
+    """
+    Arquivos que mudaram entre dois manifestos (caminhos relativos à pasta).
+    """
+
+    adicionados: list = field(default_factory=list)
+    modificados: list = field(default_factory=list)
+    removidos: list = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.adicionados or self.modificados or self.removidos)
+
+    @property
+    def alterados(self) -> list:
+        """
+        Arquivos que precisam ser processados de novo (novos ou modificados).
+        """
+        return self.adicionados + self.modificados
+
+
+def hash_arquivo(caminho: str) -> str:
+    """
+    Calcula o SHA-256 de um arquivo lendo-o em blocos.
+
+    Args:
+        caminho: Caminho do arquivo
+
+    Returns:
+        Hash hexadecimal do conteúdo
+    """
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def gerar_manifesto(
+    pasta: str, anterior: dict | None = None, ignorar: tuple = ()
+) -> dict:
+    """
+    Gera o manifesto de uma pasta: caminho, tamanho, mtime e hash de cada
+    arquivo.
+
+    O hash de um arquivo com o mesmo tamanho e mtime do manifesto anterior é
+    reaproveitado, então só os arquivos alterados são lidos.
+
+    Args:
+        pasta: Pasta a percorrer
+        anterior: Manifesto anterior da mesma pasta (opcional)
+        ignorar: Nomes de arquivo da raiz que ficam fora do manifesto
+
+    Returns:
+        Dicionário caminho_relativo -> {"tamanho", "mtime", "hash"}
+    """
+    anterior = anterior or {}
+    manifesto = {}
+    for raiz, _, arquivos in os.walk(pasta):
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            relativo = os.path.relpath(caminho, pasta).replace(os.sep, "/")
+            if relativo in ignorar:
+                continue
+            info = os.stat(caminho)
+            entrada = anterior.get(relativo)
+            if (
+                entrada
+                and entrada["tamanho"] == info.st_size
+                and entrada["mtime"] == info.st_mtime
+            ):
+                manifesto[relativo] = dict(entrada)
+                continue
+            manifesto[relativo] = {
+                "tamanho": info.st_size,
+                "mtime": info.st_mtime,
+                "hash": hash_arquivo(caminho),
+            }
+    return manifesto
+
+
+def comparar_manifestos(anterior: dict, atual: dict) -> DiffManifesto:
+    """
+    Compara dois manifestos pelo hash do conteúdo.
+
+    Args:
+        anterior: Manifesto da sincronização anterior
+        atual: Manifesto da sincronização atual
+
+    Returns:
+        DiffManifesto com os caminhos adicionados, modificados e removidos
+    """
+    return DiffManifesto(
+        adicionados=sorted(atual.keys() - anterior.keys()),
+        modificados=sorted(
+            caminho
+            for caminho in atual.keys() & anterior.keys()
+            if atual[caminho]["hash"] != anterior[caminho]["hash"]
+        ),
+        removidos=sorted(anterior.keys() - atual.keys()),
+    )
+
+
+def carregar_manifesto(caminho: str) -> dict:
+    """
+    Carrega um manifesto salvo, ou um vazio se o arquivo não existir.
+
+    Args:
+        caminho: Caminho do arquivo do manifesto
+
+    Returns:
+        Manifesto carregado
+    """
+    return carregar_json(caminho, {})
+
+
+def salvar_manifesto(manifesto: dict, caminho: str) -> None:
+    """
+    Grava um manifesto em JSON de forma atômica (arquivo temporário + rename).
+
+    Args:
+        manifesto: Manifesto a gravar
+        caminho: Caminho do arquivo do manifesto
+    """
+    salvar_json(manifesto, caminho, sort_keys=True)
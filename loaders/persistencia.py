@@ -0,0 +1,43 @@
+import json
+import logging
+import os
+
+
+def salvar_json(dados, caminho: str, **opcoes_json) -> None:
+    """
+    Grava dados em JSON de forma atômica: o arquivo temporário é gravado,
+    sincronizado com o disco e só então substitui o destino, então uma
+    interrupção deixa o arquivo antigo ou o novo, nunca um pela metade.
+
+    Args:
+        dados: Dados serializáveis em JSON
+        caminho: Caminho do arquivo
+        **opcoes_json: Opções extras do json.dump (ex: sort_keys=True)
+    """
+    caminho_temp = f"{caminho}.tmp"
+    with open(caminho_temp, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, **opcoes_json)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(caminho_temp, caminho)
+
+
+def carregar_json(caminho: str, padrao=None):
+    """
+    Carrega um arquivo JSON, tolerando a sua ausência ou corrupção.
+
+    Args:
+        caminho: Caminho do arquivo
+        padrao: Valor retornado se o arquivo não existir ou for inválido
+
+    Returns:
+        Dados carregados, ou o valor padrão
+    """
+    if not os.path.exists(caminho):
+        return padrao
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.error(f"Erro ao carregar {caminho}: {e}")
+        return padrao
@@ -0,0 +1,275 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from time import monotonic, time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import httpx
+from loaders.falhas import BloqueadaPorRobots
+
+
+@dataclass
+class EstadoHost:
+    """
+    Ritmo e limites adaptativos de um host.
+
+    O balde de tokens tem capacidade 1: cada requisição reserva o próximo
+    horário livre, espaçado em 1/taxa segundos do anterior.
+    """
+
+    taxa: float
+    concorrencia: int
+    taxa_maxima: float
+    concorrencia_maxima: int
+    robots: RobotFileParser | None = None
+    proximo_horario: float = 0.0
+    pausado_ate: float = 0.0
+    em_uso: int = 0
+    falhas_seguidas: int = 0
+    sucessos_seguidos: int = 0
+    latencia_media: float | None = None
+    limitado: bool = False
+    condicao: asyncio.Condition = field(default_factory=asyncio.Condition)
+    trava_robots: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class PolidezHosts:
+    """
+    Agenda as requisições por host respeitando o robots.txt e o ritmo do servidor.
+
+    Cada host tem um balde de tokens e um limite de requisições simultâneas.
+    Enquanto a latência fica saudável, a taxa e a concorrência crescem, de
+    forma multiplicativa até o primeiro sinal de limite do host e aditiva
+    depois dele; respostas 429/503 pausam o host (pelo Retry-After, quando
+    informado) e cortam ambas pela metade. O Crawl-delay do robots.txt limita
+    a taxa máxima do host.
+    """
+
+    def __init__(
+        self,
+        cliente: httpx.AsyncClient,
+        taxa_inicial: float = 2.0,
+        taxa_maxima: float = 20.0,
+        concorrencia_inicial: int = 2,
+        concorrencia_maxima: int = 10,
+        latencia_saudavel: float = 1.0,
+        respeitar_robots: bool = True,
+        pausa_maxima: float = 120.0,
+    ):
+        """
+        Inicializa o agendador.
+
+        Args:
+            cliente: Cliente HTTP compartilhado, usado para baixar o robots.txt
+            taxa_inicial: Requisições por segundo iniciais de cada host
+            taxa_maxima: Teto de requisições por segundo por host
+            concorrencia_inicial: Requisições simultâneas iniciais por host
+            concorrencia_maxima: Teto de requisições simultâneas por host
+            latencia_saudavel: Latência média (s) abaixo da qual o ritmo sobe
+            respeitar_robots: Se deve ler o robots.txt (Disallow e Crawl-delay)
+            pausa_maxima: Maior pausa (s) aplicada a um host após 429/503
+        """
+        self.cliente = cliente
+        self.taxa_inicial = taxa_inicial
+        self.taxa_maxima = taxa_maxima
+        self.concorrencia_maxima = max(1, concorrencia_maxima)
+        self.concorrencia_inicial = min(
+            max(1, concorrencia_inicial), self.concorrencia_maxima
+        )
+        self.latencia_saudavel = latencia_saudavel
+        self.respeitar_robots = respeitar_robots
+        self.pausa_maxima = pausa_maxima
+        self.user_agent = cliente.headers.get("User-Agent", "*")
+        self._hosts: dict[str, EstadoHost] = {}
+
+    def _host(self, url: str) -> EstadoHost:
+        """
+        Método interno que retorna (criando se preciso) o estado do host da URL
+        """
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = EstadoHost(
+                taxa=min(self.taxa_inicial, self.taxa_maxima),
+                concorrencia=self.concorrencia_inicial,
+                taxa_maxima=self.taxa_maxima,
+                concorrencia_maxima=self.concorrencia_maxima,
+            )
+        return self._hosts[host]
+
+    async def _carregar_robots(self, url: str, estado_host: EstadoHost) -> None:
+        """
+        Método interno que baixa o robots.txt do host uma única vez
+        """
+        async with estado_host.trava_robots:
+            if estado_host.robots is not None:
+                return
+            partes = urlparse(url)
+            url_robots = f"{partes.scheme}://{partes.netloc}/robots.txt"
+            robots = RobotFileParser(url_robots)
+            try:
+                response = await self.cliente.get(url_robots)
+                if response.status_code == 200:
+                    robots.parse(response.text.splitlines())
+                else:
+                    robots.allow_all = True
+            except httpx.HTTPError as e:
+                logging.warning(f"Não foi possível ler {url_robots}: {e}")
+                robots.allow_all = True
+
+            atraso = robots.crawl_delay(self.user_agent)
+            taxa_robots = robots.request_rate(self.user_agent)
+            limites = []
+            if atraso:
+                limites.append(1 / float(atraso))
+            if taxa_robots:
+                limites.append(taxa_robots.requests / taxa_robots.seconds)
+            if limites:
+                estado_host.taxa_maxima = min([estado_host.taxa_maxima, *limites])
+                estado_host.taxa = min(estado_host.taxa, estado_host.taxa_maxima)
+                estado_host.concorrencia = estado_host.concorrencia_maxima = 1
+                logging.info(
+                    f"robots.txt de {partes.netloc}: no máximo "
+                    f"{estado_host.taxa_maxima:.2f} requisições/s"
+                )
+            estado_host.robots = robots
+
+    async def urls_sitemap(self, url: str) -> list:
+        """
+        Lista os sitemaps declarados no robots.txt do host da URL.
+
+        Args:
+            url: Qualquer URL do host
+
+        Returns:
+            Lista de URLs de sitemap (vazia se não houver)
+        """
+        estado_host = self._host(url)
+        await self._carregar_robots(url, estado_host)
+        return list(estado_host.robots.site_maps() or [])
+
+    @asynccontextmanager
+    async def vez(self, url: str):
+        """
+        Aguarda a vez de requisitar a URL, segundo o ritmo atual do host.
+
+        Args:
+            url: URL que será requisitada
+
+        Raises:
+            BloqueadaPorRobots: Se o robots.txt não permitir a URL
+        """
+        estado_host = self._host(url)
+        if self.respeitar_robots:
+            if estado_host.robots is None:
+                await self._carregar_robots(url, estado_host)
+            if not estado_host.robots.can_fetch(self.user_agent, url):
+                raise BloqueadaPorRobots(url)
+
+        async with estado_host.condicao:
+            await estado_host.condicao.wait_for(
+                lambda: estado_host.em_uso < estado_host.concorrencia
+            )
+            estado_host.em_uso += 1
+        try:
+            while True:
+                agora = monotonic()
+                inicio = max(
+                    agora, estado_host.proximo_horario, estado_host.pausado_ate
+                )
+                if inicio <= agora:
+                    break
+                await asyncio.sleep(inicio - agora)
+            estado_host.proximo_horario = monotonic() + 1 / estado_host.taxa
+            yield
+        finally:
+            async with estado_host.condicao:
+                estado_host.em_uso -= 1
+                estado_host.condicao.notify_all()
+
+    def registrar_resposta(
+        self, url: str, status: int, latencia: float, retry_after: str | None = None
+    ) -> None:
+        """
+        Ajusta o ritmo do host a partir de uma resposta recebida.
+
+        Args:
+            url: URL requisitada
+            status: Código HTTP da resposta
+            latencia: Segundos até a resposta
+            retry_after: Valor do cabeçalho Retry-After, se houver
+        """
+        estado_host = self._host(url)
+        if status in (429, 503):
+            estado_host.falhas_seguidas += 1
+            estado_host.sucessos_seguidos = 0
+            estado_host.limitado = True
+            pausa = self._segundos_retry_after(retry_after)
+            if pausa is None:
+                pausa = 2**estado_host.falhas_seguidas
+            pausa = min(pausa, self.pausa_maxima)
+            estado_host.pausado_ate = max(estado_host.pausado_ate, monotonic() + pausa)
+            estado_host.taxa = max(estado_host.taxa / 2, 0.1)
+            estado_host.concorrencia = max(1, estado_host.concorrencia // 2)
+            logging.warning(
+                f"{urlparse(url).netloc} respondeu {status}: pausa de {pausa:.1f}s, "
+                f"{estado_host.taxa:.2f} requisições/s, "
+                f"{estado_host.concorrencia} simultâneas"
+            )
+            return
+
+        estado_host.falhas_seguidas = 0
+        if estado_host.latencia_media is None:
+            estado_host.latencia_media = latencia
+        else:
+            estado_host.latencia_media = (
+                0.8 * estado_host.latencia_media + 0.2 * latencia
+            )
+
+        if estado_host.latencia_media > 2 * self.latencia_saudavel:
+            estado_host.sucessos_seguidos = 0
+            estado_host.limitado = True
+            estado_host.taxa = max(estado_host.taxa * 0.8, 0.1)
+            estado_host.concorrencia = max(1, estado_host.concorrencia - 1)
+        elif estado_host.latencia_media <= self.latencia_saudavel:
+            estado_host.sucessos_seguidos += 1
+            if estado_host.limitado:
+                nova_taxa, passo_concorrencia = estado_host.taxa + 0.5, 10
+            else:
+                nova_taxa, passo_concorrencia = estado_host.taxa * 1.5, 2
+            estado_host.taxa = min(nova_taxa, estado_host.taxa_maxima)
+            if (
+                estado_host.sucessos_seguidos % passo_concorrencia == 0
+                and estado_host.concorrencia < estado_host.concorrencia_maxima
+            ):
+                estado_host.concorrencia += 1
+
+    @staticmethod
+    def _segundos_retry_after(retry_after: str | None) -> float | None:
+        """
+        Método interno que converte o Retry-After (segundos ou data HTTP)
+        """
+        if not retry_after:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time())
+        except (TypeError, ValueError):
+            return None
+
+    @property
+    def estatisticas(self) -> dict:
+        """
+        Ritmo atual de cada host (requisições/s e requisições simultâneas).
+        """
+        return {
+            host: {
+                "taxa": round(estado_host.taxa, 2),
+                "concorrencia": estado_host.concorrencia,
+            }
+            for host, estado_host in self._hosts.items()
+        }
@@ -0,0 +1,336 @@
+from abc import ABC, abstractmethod
+import io
+import json
+import logging
+import os
+import queue
+import tarfile
+import threading
+from time import time
+from loaders.persistencia import carregar_json, salvar_json
+
+
+class EscritorSaida(ABC):
+    """
+    Grava o Markdown das páginas de uma coleção fora do event loop.
+
+    As páginas entram em uma fila e uma thread em segundo plano as grava em
+    lotes, então o disco não atrasa as buscas. escrever() nunca bloqueia;
+    fechar() espera a fila esvaziar.
+    """
+
+    def __init__(self, caminho_colecao: str, tamanho_lote: int = 64):
+        """
+        Inicializa o escritor e a thread de gravação.
+
+        Args:
+            caminho_colecao: Pasta da coleção (criada uma única vez aqui)
+            tamanho_lote: Número máximo de páginas gravadas por lote
+        """
+        self.caminho_colecao = caminho_colecao
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.paginas_gravadas = 0
+        self.erros = 0
+        os.makedirs(caminho_colecao, exist_ok=True)
+        self._fila: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._gravar_continuamente, name="escritor-saida", daemon=True
+        )
+        self._thread.start()
+
+    def escrever(self, nome_arquivo: str, conteudo: str, url: str = "") -> None:
+        """
+        Enfileira uma página para gravação.
+
+        Args:
+            nome_arquivo: Nome da página, sem extensão
+            conteudo: Markdown da página
+            url: URL de origem da página
+        """
+        self._fila.put((nome_arquivo, conteudo, url))
+
+    def fechar(self) -> None:
+        """
+        Grava o que falta na fila e encerra a thread de gravação.
+        """
+        if self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join()
+
+    def _gravar_continuamente(self) -> None:
+        """
+        Método interno da thread: junta as páginas da fila em lotes e os grava
+        """
+        encerrar = False
+        while not encerrar:
+            lote = [self._fila.get()]
+            while len(lote) < self.tamanho_lote:
+                try:
+                    lote.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            encerrar = None in lote
+            paginas = [pagina for pagina in lote if pagina is not None]
+            try:
+                if paginas:
+                    self._gravar_lote(paginas)
+            except (OSError, TypeError, ValueError) as e:
+                self.erros += len(paginas)
+                logging.error(f"Erro ao gravar um lote de {len(paginas)} páginas: {e}")
+            finally:
+                for _ in lote:
+                    self._fila.task_done()
+
+    @abstractmethod
+    def _gravar_lote(self, paginas: list) -> None:
+        """
+        Grava um lote de páginas (tuplas nome_arquivo, conteudo, url).
+        """
+
+
+class EscritorArquivos(EscritorSaida):
+    """
+    Um arquivo .md por página, gravado de forma atômica (temporário + rename).
+
+    O índice paginas.indice.json guarda a URL de origem de cada página, por
+    nome de arquivo (sem extensão).
+    """
+
+    def __init__(self, caminho_colecao: str, tamanho_lote: int = 64):
+        """
+        Inicializa o escritor, continuando o índice de URLs existente.
+
+        Args:
+            caminho_colecao: Pasta da coleção
+            tamanho_lote: Número máximo de páginas gravadas por lote
+        """
+        self.caminho_indice = f"{caminho_colecao}/paginas.indice.json"
+        self.indice = carregar_json(self.caminho_indice, {})
+        super().__init__(caminho_colecao, tamanho_lote)
+
+    def _gravar_lote(self, paginas: list) -> None:
+        indice_alterado = False
+        for nome_arquivo, conteudo, url in paginas:
+            caminho = f"{self.caminho_colecao}/{nome_arquivo}.md"
+            caminho_temp = f"{caminho}.tmp"
+            try:
+                with open(caminho_temp, "w", encoding="utf-8") as f:
+                    f.write(conteudo)
+                os.replace(caminho_temp, caminho)
+                self.paginas_gravadas += 1
+                logging.info(f"Página salva: {nome_arquivo}")
+            except (OSError, TypeError) as e:
+                self.erros += 1
+                logging.error(f"Erro ao salvar o arquivo {nome_arquivo}: {e}")
+                continue
+            if url and self.indice.get(nome_arquivo) != url:
+                self.indice[nome_arquivo] = url
+                indice_alterado = True
+        if indice_alterado:
+            salvar_json(self.indice, self.caminho_indice)
+
+
+class EscritorPacote(EscritorSaida):
+    """
+    Todas as páginas da coleção em um único arquivo (JSONL ou tar), com um
+    índice JSON de posições para ler cada página sem percorrer o pacote.
+
+    O índice (paginas.<formato>.indice.json) guarda, por nome de página, a
+    URL, o offset e o tamanho em bytes: no JSONL, da linha da página; no tar,
+    do Markdown puro, que pode ser lido direto de um mmap do arquivo. Uma
+    página gravada de novo aponta para a versão mais recente.
+
+    O pacote só recebe acréscimos durante o rastreamento (o tar fica aberto
+    do primeiro lote até fechar()). As versões antigas das páginas gravadas
+    de novo ficam no arquivo até a compactação, feita em fechar() quando o
+    pacote passa de 'fator_compactacao' vezes o tamanho das versões atuais.
+    """
+
+    FORMATOS = ("jsonl", "tar")
+
+    def __init__(
+        self,
+        caminho_colecao: str,
+        formato: str = "jsonl",
+        tamanho_lote: int = 64,
+        fator_compactacao: float = 2.0,
+    ):
+        """
+        Inicializa o escritor do pacote, continuando um pacote existente.
+
+        Args:
+            caminho_colecao: Pasta da coleção
+            formato: 'jsonl' ou 'tar'
+            tamanho_lote: Número máximo de páginas gravadas por lote
+            fator_compactacao: Razão entre o tamanho do pacote e o das
+                versões atuais a partir da qual fechar() compacta o pacote
+
+        Raises:
+            ValueError: Se o formato for desconhecido
+        """
+        if formato not in self.FORMATOS:
+            raise ValueError(f"Formato de pacote desconhecido: {formato}")
+        self.formato = formato
+        self.fator_compactacao = fator_compactacao
+        self.caminho_pacote = f"{caminho_colecao}/paginas.{formato}"
+        self.caminho_indice = f"{self.caminho_pacote}.indice.json"
+        self.indice = carregar_json(self.caminho_indice, {})
+        self._tar: tarfile.TarFile | None = None
+        super().__init__(caminho_colecao, tamanho_lote)
+
+    def fechar(self) -> None:
+        """
+        Grava o que falta na fila, fecha o pacote e o compacta se as versões
+        antigas das páginas ocuparem espaço demais.
+        """
+        super().fechar()
+        if self._tar is not None:
+            self._tar.close()
+            self._tar = None
+        if os.path.exists(self.caminho_pacote):
+            tamanho_atual = sum(
+                self._tamanho_no_pacote(entrada) for entrada in self.indice.values()
+            )
+            tamanho_pacote = os.path.getsize(self.caminho_pacote)
+            if tamanho_pacote > self.fator_compactacao * max(tamanho_atual, 1):
+                self.compactar()
+
+    def _gravar_lote(self, paginas: list) -> None:
+        if self.formato == "jsonl":
+            self._gravar_jsonl(paginas)
+        else:
+            self._gravar_tar(paginas)
+        self.paginas_gravadas += len(paginas)
+        self._salvar_indice()
+        logging.info(f"{len(paginas)} páginas salvas em {self.caminho_pacote}")
+
+    def _gravar_jsonl(self, paginas: list) -> None:
+        """
+        Método interno que acrescenta um lote de linhas ao pacote JSONL
+        """
+        with open(self.caminho_pacote, "ab") as f:
+            for nome_arquivo, conteudo, url in paginas:
+                linha = (
+                    json.dumps(
+                        {"nome": nome_arquivo, "url": url, "conteudo": conteudo},
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                ).encode("utf-8")
+                self.indice[nome_arquivo] = {
+                    "url": url,
+                    "offset": f.tell(),
+                    "tamanho": len(linha),
+                }
+                f.write(linha)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _gravar_tar(self, paginas: list) -> None:
+        """
+        Método interno que acrescenta um lote de membros .md ao pacote tar
+
+        O TarFile é aberto uma vez (o modo 'a' relê todos os cabeçalhos
+        existentes) e mantido aberto entre os lotes.
+        """
+        if self._tar is None:
+            self._tar = tarfile.open(self.caminho_pacote, "a")
+        for nome_arquivo, conteudo, url in paginas:
+            self.indice[nome_arquivo] = {
+                "url": url,
+                **self._adicionar_membro_tar(self._tar, nome_arquivo, conteudo),
+            }
+        self._tar.fileobj.flush()
+        os.fsync(self._tar.fileobj.fileno())
+
+    @staticmethod
+    def _adicionar_membro_tar(pacote: tarfile.TarFile, nome: str, conteudo) -> dict:
+        """
+        Método interno que acrescenta um membro .md ao tar e devolve o offset
+        e o tamanho do seu conteúdo
+        """
+        dados = conteudo.encode("utf-8") if isinstance(conteudo, str) else conteudo
+        info = tarfile.TarInfo(f"{nome}.md")
+        info.size = len(dados)
+        info.mtime = int(time())
+        pacote.addfile(info, io.BytesIO(dados))
+        blocos = -(-len(dados) // tarfile.BLOCKSIZE)
+        return {
+            "offset": pacote.offset - blocos * tarfile.BLOCKSIZE,
+            "tamanho": len(dados),
+        }
+
+    def _tamanho_no_pacote(self, entrada: dict) -> int:
+        """
+        Método interno que estima os bytes de uma página no pacote (no tar,
+        com o cabeçalho e o preenchimento do bloco)
+        """
+        if self.formato == "jsonl":
+            return entrada["tamanho"]
+        blocos = -(-entrada["tamanho"] // tarfile.BLOCKSIZE)
+        return (blocos + 1) * tarfile.BLOCKSIZE
+
+    def compactar(self) -> None:
+        """
+        Reescreve o pacote só com a versão atual de cada página, de forma
+        atômica, e atualiza os offsets do índice.
+        """
+        caminho_temp = f"{self.caminho_pacote}.tmp"
+        indice = {}
+        with open(self.caminho_pacote, "rb") as antigo:
+            entradas = sorted(self.indice.items(), key=lambda item: item[1]["offset"])
+            if self.formato == "jsonl":
+                with open(caminho_temp, "wb") as novo:
+                    for nome, entrada in entradas:
+                        antigo.seek(entrada["offset"])
+                        indice[nome] = dict(entrada, offset=novo.tell())
+                        novo.write(antigo.read(entrada["tamanho"]))
+                    novo.flush()
+                    os.fsync(novo.fileno())
+            else:
+                with open(caminho_temp, "wb") as arquivo_novo:
+                    with tarfile.open(fileobj=arquivo_novo, mode="w") as novo:
+                        for nome, entrada in entradas:
+                            antigo.seek(entrada["offset"])
+                            dados = antigo.read(entrada["tamanho"])
+                            indice[nome] = {
+                                "url": entrada.get("url"),
+                                **self._adicionar_membro_tar(novo, nome, dados),
+                            }
+                    arquivo_novo.flush()
+                    os.fsync(arquivo_novo.fileno())
+        tamanho_antes = os.path.getsize(self.caminho_pacote)
+        os.replace(caminho_temp, self.caminho_pacote)
+        self.indice = indice
+        self._salvar_indice()
+        logging.info(
+            f"Pacote {self.caminho_pacote} compactado: {tamanho_antes} -> "
+            f"{os.path.getsize(self.caminho_pacote)} bytes"
+        )
+
+    def _salvar_indice(self) -> None:
+        """
+        Método interno que regrava o índice de forma atômica
+        """
+        salvar_json(self.indice, self.caminho_indice)
+
+
+def abrir_escritor(nome_colecao: str, formato: str = "arquivos") -> EscritorSaida:
+    """
+    Abre o escritor de saída de uma coleção.
+
+    Args:
+        nome_colecao: Nome da coleção
+        formato: 'arquivos' (um .md por página), 'jsonl' ou 'tar' (pacote
+            único com índice de posições)
+
+    Returns:
+        Escritor da coleção
+
+    Raises:
+        ValueError: Se o formato for desconhecido
+    """
+    caminho_colecao = f"data/collections/{nome_colecao}"
+    if formato == "arquivos":
+        return EscritorArquivos(caminho_colecao)
+    return EscritorPacote(caminho_colecao, formato)
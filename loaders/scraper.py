@@ -1,11 +1,15 @@
 from playwright.async_api import async_playwright
-from markdownify import markdownify as md
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 from urllib.parse import urljoin, urlparse
 import os
+import hashlib
+import math
 import json
-from time import time
+from time import monotonic, time
 from readability import Document
+from readability.htmls import get_title
 from dataclasses import dataclass
 import re
 from packaging import version
@@ -13,8 +17,52 @@ import logging
 import httpx
 from fake_useragent import UserAgent
 import asyncio
+import codecs
+import random
+import heapq
+from itertools import count
+from functools import lru_cache
+from contextlib import asynccontextmanager
 from fuzzywuzzy import fuzz
 from pathlib import Path
+from importlib.util import find_spec
+from concurrent.futures import ProcessPoolExecutor
+from loaders.canonizacao import Canonizador
+from loaders.conversor_markdown import markdown_da_arvore
+from loaders.duplicatas import IndiceDuplicatas, simhash
+from loaders.estado import EstadoRastreamento, abrir_estado
+from loaders.falhas import (
+    AcessoBloqueado,
+    BloqueadaPorRobots,
+    ConteudoGrandeDemais,
+    ConteudoNaoHtml,
+    ErroTransitorio,
+    FalhaBusca,
+    HostSobrecarregado,
+    PaginaNaoEncontrada,
+)
+from loaders.polidez import PolidezHosts
+from loaders.saida import abrir_escritor
+from loaders.sitemap import descobrir_sitemaps, ler_sitemaps
+
+_PARSER_HTML = lxml.html.HTMLParser(encoding="utf-8")
+TAMANHO_MAXIMO_PAGINA = 10 * 1024 * 1024
+
+
+class PaginaNaoModificada(Exception):
+    """
+    Indica que a página não mudou desde o último rastreamento (HTTP 304 ou
+    hash de conteúdo igual ao salvo).
+    """
+
+    def __init__(self, url: str, metadados: dict | None = None):
+        """
+        Args:
+            url: URL da página
+            metadados: Metadados atualizados pela nova resposta (opcional)
+        """
+        super().__init__(url)
+        self.metadados = metadados
 
 
 @dataclass
@@ -23,6 +71,9 @@ class DadosPagina:
     conteudo_markdown: str
     links: list
     titulo_pagina: str
+    url_canonica: str | None = None
+    metadados: dict | None = None
+    url_final: str | None = None
 
 
 class Validador:
@@ -33,14 +84,27 @@ class Validador:
     extensão, segmentos de caminho, versão e conteúdo da página.
     """
 
-    def __init__(self, config: dict, versao: float):
+    def __init__(
+        self,
+        config: dict,
+        versao: float,
+        tamanho_cache: int = 10000,
+        canonizador: Canonizador | None = None,
+    ):
         """
         Inicializa o validador com configurações e versão.
 
+        As regras de validação de links são pré-compiladas aqui, e os veredictos
+        ficam em um cache LRU indexado pela URL normalizada.
+
         Args:
             config: Dicionário com configurações de validação
             versao: Versão esperada da documentação
+            tamanho_cache: Número máximo de veredictos de links mantidos em cache
+            canonizador: Canonizador usado para normalizar os links (padrão:
+                um Canonizador com as regras do config)
         """
+        self.canonizador = canonizador or Canonizador.de_config(config)
         self.extensoes_invalidas = config.get("extensoes_invalidas", [])
         self.segmentos_invalidos = config.get("segmentos_de_caminho_invalidos", [])
         self.protocolos_invalidos = config.get("protocolos_invalidos", [])
@@ -61,6 +125,70 @@ class Validador:
 
         self._versao_pattern = re.compile(r"/(?:v|version/)?(\d+(?:\.\d+)?)/")
 
+        self._protocolos_invalidos = tuple(self.protocolos_invalidos_set)
+        self._extensoes_invalidas = tuple(self.extensoes_invalidas_set)
+        self._dominios_permitidos = frozenset(
+            dominio
+            for dominios_list in (
+                self.dominios_permitidos.values()
+                if isinstance(self.dominios_permitidos, dict)
+                else []
+            )
+            if isinstance(dominios_list, list)
+            for dominio in dominios_list
+        )
+        self._prefixo_pattern = self._compilar_alternativas(
+            self.prefixos_permitidos_set, r"^/(?:{})(?:/|$)"
+        )
+        self._segmento_invalido_pattern = self._compilar_alternativas(
+            self.segmentos_invalidos_set, r"{}"
+        )
+        self._prefixos_fuzzy = [f"/{p}/" for p in self.prefixos_permitidos]
+        try:
+            self._versao_desejada = version.parse(self.versao) if self.versao else None
+        except version.InvalidVersion:
+            logging.debug(f"Versão desejada inválida: {self.versao}")
+            self._versao_desejada = None
+
+        self._avaliar_link_em_cache = lru_cache(maxsize=tamanho_cache)(
+            self._avaliar_link
+        )
+
+    @staticmethod
+    def _compilar_alternativas(valores: set, modelo: str) -> re.Pattern | None:
+        """
+        Método interno que compila um conjunto de textos em uma única regex
+
+        Args:
+            valores: Textos literais a combinar
+            modelo: Modelo da regex, com '{}' no lugar das alternativas
+
+        Returns:
+            Regex compilada, ou None se não houver valores
+        """
+        if not valores:
+            return None
+        alternativas = "|".join(
+            re.escape(v) for v in sorted(valores, key=len, reverse=True)
+        )
+        return re.compile(modelo.format(alternativas))
+
+    @property
+    def estatisticas_cache(self) -> dict:
+        """
+        Estatísticas do cache de veredictos de links.
+
+        Returns:
+            Dicionário com acertos, falhas, tamanho atual e tamanho máximo
+        """
+        info = self._avaliar_link_em_cache.cache_info()
+        return {
+            "acertos": info.hits,
+            "falhas": info.misses,
+            "tamanho": info.currsize,
+            "tamanho_maximo": info.maxsize,
+        }
+
     def _extrair_versao_da_url(self, url: str) -> str | None:
         """
         Método interno responsável por extrair a versão de uma url
@@ -166,11 +294,72 @@ class Validador:
             logging.error(f"Erro ao validar página {dados.url_original}: {e}")
             return (False, f"Erro na validação: {str(e)}")
 
+    def _avaliar_link(self, link_completo: str) -> tuple[bool, str]:
+        """
+        Método interno que aplica as regras pré-compiladas a um link absoluto
+
+        Args:
+            link_completo: URL absoluta e normalizada do link
+
+        Returns:
+            Tupla (válido, mensagem)
+        """
+        parsed_link = urlparse(link_completo)
+        dominio_do_link = parsed_link.hostname
+        caminho_do_link = (parsed_link.path or "/").lower()
+
+        if link_completo.startswith(self._protocolos_invalidos):
+            return (False, "Protocolo inválido")
+
+        dominio_valido = (
+            dominio_do_link == self.dominio_base
+            or dominio_do_link in self._dominios_permitidos
+        )
+        if not dominio_valido:
+            return (False, "Domínio inválido")
+
+        prefixo_valido = bool(
+            self._prefixo_pattern and self._prefixo_pattern.match(caminho_do_link)
+        )
+        if not prefixo_valido:
+            razao_fuzzy = max(
+                [fuzz.ratio(caminho_do_link, p) for p in self._prefixos_fuzzy] + [0]
+            )
+            if razao_fuzzy <= 75:
+                return (False, "Nenhum prefixo compatível encontrado")
+
+        if caminho_do_link.rstrip("/").endswith(self._extensoes_invalidas):
+            return (False, "Extensão inválida")
+
+        if self._segmento_invalido_pattern:
+            segmento_invalido = self._segmento_invalido_pattern.search(caminho_do_link)
+            if segmento_invalido:
+                return (
+                    False,
+                    f"Segmento inválido encontrado: {segmento_invalido.group(0)}",
+                )
+
+        if self._versao_desejada:
+            versao_encontrada = self._extrair_versao_da_url(link_completo)
+            if versao_encontrada:
+                try:
+                    v_encontrada = version.parse(versao_encontrada)
+                    if v_encontrada.major != self._versao_desejada.major:
+                        return (
+                            False,
+                            f"Versão incompatível: {v_encontrada} com versão desejada: {self._versao_desejada}",
+                        )
+                except Exception as e:
+                    logging.debug(f"Erro ao validar versão: {e}")
+
+        return (True, f"Link válido: {link_completo}")
+
     async def validar_link_novo(self, url_base: str, link_url: str) -> tuple[bool, str]:
         """
         Valida um novo link encontrado em uma página.
 
-        Verifica protocolo, domínio, prefixo, extensão, segmentos e versão.
+        Verifica protocolo, domínio, prefixo, extensão, segmentos e versão. O
+        veredicto é memorizado pela forma canônica da URL.
 
         Args:
             url_base: URL base da página atual
@@ -180,86 +369,19 @@ class Validador:
             Tupla (válido, mensagem)
         """
         try:
-            link_completo = urljoin(url_base, link_url)
-            parsed_link = urlparse(link_completo)
-            dominio_do_link = parsed_link.hostname
-            caminho_do_link = (parsed_link.path or "/").lower()
-
             if not self.dominio_base:
                 self.dominio_base = urlparse(url_base).hostname
 
-            protocolo_valido = not any(
-                link_completo.startswith(p) for p in self.protocolos_invalidos
-            )
-            if not protocolo_valido:
-                return (False, "Protocolo inválido")
-
-            lista_dominios_permitidos = set()
-            if isinstance(self.dominios_permitidos, dict):
-                for dominios_list in self.dominios_permitidos.values():
-                    if isinstance(dominios_list, list):
-                        lista_dominios_permitidos.update(dominios_list)
-
-            dominio_valido = (
-                dominio_do_link == self.dominio_base
-                or dominio_do_link in lista_dominios_permitidos
-            )
-            if not dominio_valido:
-                return (False, "Domínio inválido")
-
-            prefixo_valido = False
-            for prefixo in self.prefixos_permitidos_set:
-                if (
-                    caminho_do_link.startswith(f"/{prefixo}/")
-                    or caminho_do_link == f"/{prefixo}"
-                ):
-                    prefixo_valido = True
-                    break
-
-            if not prefixo_valido:
-                razao_fuzzy = max(
-                    [
-                        fuzz.ratio(caminho_do_link, f"/{p}/")
-                        for p in self.prefixos_permitidos
-                    ]
-                    + [0]
-                )
-                if razao_fuzzy <= 75:
-                    return (False, "Nenhum prefixo compatível encontrado")
-
-            caminho_sem_barra = caminho_do_link.rstrip("/")
-            if any(
-                caminho_sem_barra.endswith(ext) for ext in self.extensoes_invalidas_set
-            ):
-                return (False, "Extensão inválida")
-
-            segmento_invalido = any(
-                seg in caminho_do_link.lower() for seg in self.segmentos_invalidos_set
-            )
-            if segmento_invalido:
-                return (False, f"Segmento inválido encontrado: {segmento_invalido}")
-
-            if self.versao:
-                versao_encontrada = self._extrair_versao_da_url(link_url)
-                if versao_encontrada:
-                    try:
-                        v_desejada = version.parse(self.versao)
-                        v_encontrada = version.parse(versao_encontrada)
-                        if v_encontrada.major != v_desejada.major:
-                            return (
-                                False,
-                                f"Versão incompatível: {v_encontrada} com versão desejada: {v_desejada}",
-                            )
-                    except Exception as e:
-                        logging.debug(f"Erro ao validar versão: {e}")
-
-            return (True, f"Link válido: {link_url}")
+            link_completo = self.canonizador.canonizar(link_url, url_base)
+            return self._avaliar_link_em_cache(link_completo)
 
         except Exception as e:
             logging.error(f"Erro ao validar link {link_url}: {e}")
             return (False, f"Erro na validação: {str(e)}")
 
-    async def validar_url_inicial(self, url: str, user_agent: str) -> tuple[bool, str]:
+    async def validar_url_inicial(
+        self, url: str, cliente: httpx.AsyncClient
+    ) -> tuple[bool, str]:
         """
         Valida a URL inicial fornecida pelo usuário.
 
@@ -267,7 +389,7 @@ class Validador:
 
         Args:
             url: URL a validar
-            user_agent: User-Agent para a requisição HTTP
+            cliente: Cliente HTTP compartilhado do rastreamento
 
         Returns:
             Tupla (válida, mensagem)
@@ -290,7 +412,7 @@ class Validador:
             return (True, "URL aprovada pelo prefixo do caminho.")
 
         try:
-            html = await fazer_request(url, user_agent)
+            html = await fazer_request(url, cliente)
             soup = BeautifulSoup(html, "lxml")
         except Exception as e:
             return (False, f"Não foi possível buscar a URL inicial para validação: {e}")
@@ -313,73 +435,360 @@ class Validador:
             return (False, "URL rejeitada. Não é uma documentação")
 
 
-class GerenciarJson:
+_PADROES_SECUNDARIOS = re.compile(
+    r"(changelog|release[-_]?notes|whatsnew|what-s-new|history|genindex|"
+    r"modindex|search|/tags?/|archive|/blog/|/news/)",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class InfoUrl:
+    url: str
+    profundidade: int
+    links_recebidos: int = 0
+    prioridade_sitemap: float | None = None
+
+
+def criar_pontuacao(prefixos_prioritarios=()):
     """
-    Gerencia carregamento e salvação de URLs em arquivos JSON.
+    Cria a função de pontuação padrão da fronteira.
+
+    A pontuação favorece URLs rasas (em profundidade de link e de caminho),
+    muito linkadas, com prioridade alta no sitemap e dentro dos prefixos
+    prioritários, e penaliza páginas secundárias (changelogs, índices gerais,
+    busca, blog).
+
+    Args:
+        prefixos_prioritarios: Prefixos de URL que recebem um bônus
+
+    Returns:
+        Função que recebe um InfoUrl e retorna a pontuação (maior sai antes)
+    """
+    prefixos = tuple(prefixos_prioritarios)
+
+    def pontuar(info: InfoUrl) -> float:
+        caminho = urlparse(info.url).path
+        segmentos_caminho = sum(1 for segmento in caminho.split("/") if segmento)
+        pontos = -info.profundidade - 0.5 * segmentos_caminho
+        pontos += math.log1p(info.links_recebidos)
+        if info.prioridade_sitemap is not None:
+            pontos += 2 * (info.prioridade_sitemap - 0.5)
+        if prefixos and info.url.startswith(prefixos):
+            pontos += 1
+        if _PADROES_SECUNDARIOS.search(caminho):
+            pontos -= 3
+        return pontos
+
+    return pontuar
+
 
-    Implementa cache em memória para evitar leituras repetidas de arquivo.
+class Fronteira:
     """
+    Fronteira do rastreamento com prioridade.
 
-    def __init__(self, nome_colecao=None):
+    Mantém a fila de URLs a acessar em um heap ordenado pela função de
+    pontuação (sem pontuação, a ordem é a de chegada) e um único mapa de
+    estados (na fila, vista ou rejeitada) usado para as verificações de
+    pertinência. Para cada URL guarda a profundidade de link real (o menor
+    caminho a partir das URLs iniciais), os links recebidos e a prioridade
+    do sitemap.
+
+    Quando a pontuação de uma URL na fila muda, uma nova entrada é empilhada
+    e a antiga é descartada ao sair do heap.
+
+    Com um canonizador, toda URL recebida é reduzida à forma canônica, então
+    URLs equivalentes ocupam uma única entrada.
+    """
+
+    NA_FILA = "na_fila"
+    VISTA = "vista"
+    REJEITADA = "rejeitada"
+
+    def __init__(
+        self,
+        urls_iniciais: list | None = None,
+        pontuacao=None,
+        profundidade_maxima: int | None = None,
+        canonizador: Canonizador | None = None,
+    ):
         """
-        Inicializa o gerenciador de JSON.
+        Inicializa a fronteira.
 
         Args:
-            nome_colecao: Caminho da coleção (opcional)
+            urls_iniciais: URLs que entram na fila de início (opcional)
+            pontuacao: Função que recebe um InfoUrl e retorna a pontuação da
+                URL; as maiores saem antes (opcional)
+            profundidade_maxima: Profundidade de link máxima aceita (opcional)
+            canonizador: Canonizador aplicado às URLs recebidas (opcional)
+        """
+        self.canonizador = canonizador
+        self.pontuacao = pontuacao
+        self.profundidade_maxima = profundidade_maxima
+        self._fila: list[tuple[float, int, str]] = []
+        self._ordem = count()
+        self._tamanho = 0
+        self._estados: dict[str, str] = {}
+        self._profundidades: dict[str, int] = {}
+        self._links_recebidos: dict[str, int] = {}
+        self._prioridades_sitemap: dict[str, float] = {}
+        self._pontuacoes: dict[str, float] = {}
+        for url in urls_iniciais or []:
+            self.adicionar(url)
+
+    def __contains__(self, url: str) -> bool:
+        return self._canonizar(url) in self._estados
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def _canonizar(self, url: str) -> str:
         """
-        self.nome_colecao = nome_colecao
-        self.dados_cache = {}
-        self._carregado = False
+        Método interno que reduz a URL à forma canônica, se houver canonizador
+        """
+        return self.canonizador.canonizar(url) if self.canonizador else url
 
-    def _garantir_carregado(self) -> None:
+    def estado(self, url: str) -> str | None:
         """
-        Função que garante que o arquivo urls.json existe e esta carregado para cada coleção
+        Retorna o estado de uma URL na fronteira, ou None se ela é desconhecida.
         """
-        if self.nome_colecao and not self._carregado:
-            caminho = f"data/collections/{self.nome_colecao}"
-            caminho_json = f"{caminho}/urls.json"
-            try:
-                if os.path.exists(caminho_json):
-                    with open(caminho_json, "r", encoding="utf-8") as f:
-                        self.dados_cache = json.load(f)
-                else:
-                    self.dados_cache = {}
-            except Exception as e:
-                logging.error(f"Erro ao ler o arquivo JSON: {e}")
-                self.dados_cache = {}
-            self._carregado = True
+        return self._estados.get(self._canonizar(url))
+
+    def profundidade(self, url: str) -> int:
+        """
+        Retorna a profundidade de link de uma URL (0 para as URLs iniciais).
+        """
+        return self._profundidades.get(self._canonizar(url), 0)
 
-    def adicionar_no_json(self, url: str, tipo_url: str) -> None:
+    def info(self, url: str) -> InfoUrl:
         """
-        Adiciona uma URL ao cache de JSON.
+        Retorna os dados de uma URL usados na pontuação.
+        """
+        return InfoUrl(
+            url=url,
+            profundidade=self.profundidade(url),
+            links_recebidos=self._links_recebidos.get(url, 0),
+            prioridade_sitemap=self._prioridades_sitemap.get(url),
+        )
+
+    def _enfileirar(self, url: str) -> None:
+        """
+        Método interno que (re)empilha uma URL com a pontuação atual
+        """
+        pontos = self.pontuacao(self.info(url)) if self.pontuacao else 0.0
+        if self._pontuacoes.get(url) == pontos:
+            return
+        self._pontuacoes[url] = pontos
+        heapq.heappush(self._fila, (-pontos, next(self._ordem), url))
+
+    def adicionar(
+        self,
+        url: str,
+        profundidade: int = 0,
+        prioridade_sitemap: float | None = None,
+    ) -> bool:
+        """
+        Enfileira uma URL ainda desconhecida.
+
+        Para uma URL que já está na fila, só atualiza a profundidade (se o novo
+        caminho for menor) e a prioridade do sitemap.
 
         Args:
-            url: URL a adicionar
-            tipo_url: Tipo de URL (ex: 'urls_vistas', 'urls_para_acessar')
+            url: URL a enfileirar
+            profundidade: Profundidade de link da URL
+            prioridade_sitemap: <priority> da URL no sitemap (opcional)
+
+        Returns:
+            True se a URL entrou na fila, False se já era conhecida ou passa da
+            profundidade máxima
+        """
+        url = self._canonizar(url)
+        if (
+            self.profundidade_maxima is not None
+            and profundidade > self.profundidade_maxima
+        ):
+            return False
+        if prioridade_sitemap is not None:
+            self._prioridades_sitemap[url] = prioridade_sitemap
+
+        if url in self._estados:
+            if self._estados[url] == self.NA_FILA:
+                self._profundidades[url] = min(self._profundidades[url], profundidade)
+                self._enfileirar(url)
+            return False
+
+        self._estados[url] = self.NA_FILA
+        self._profundidades[url] = profundidade
+        self._tamanho += 1
+        self._enfileirar(url)
+        return True
+
+    def registrar_link(self, url: str, profundidade: int) -> None:
         """
-        self._garantir_carregado()
+        Registra mais um link encontrado para uma URL já conhecida.
 
-        if tipo_url not in self.dados_cache:
-            self.dados_cache[tipo_url] = []
+        Args:
+            url: URL de destino do link
+            profundidade: Profundidade de link da URL por esse caminho
+        """
+        url = self._canonizar(url)
+        if url not in self._estados:
+            return
+        self._links_recebidos[url] = self._links_recebidos.get(url, 0) + 1
+        if self._estados[url] == self.NA_FILA:
+            self._profundidades[url] = min(self._profundidades[url], profundidade)
+            self._enfileirar(url)
+
+    def rejeitar(self, url: str) -> None:
+        """
+        Marca uma URL ainda desconhecida como rejeitada.
+
+        Args:
+            url: URL rejeitada
+        """
+        self._estados.setdefault(self._canonizar(url), self.REJEITADA)
 
-        if url not in self.dados_cache[tipo_url]:
-            self.dados_cache[tipo_url].append(url)
+    def marcar_vista(self, url: str) -> bool:
+        """
+        Marca uma URL como vista sem passar pela fila (ex: a URL canônica de
+        uma página obtida por outro endereço), tirando-a da fila se preciso.
+
+        Args:
+            url: URL a marcar
 
-    def salvar_json(self) -> None:
+        Returns:
+            True se a URL já estava vista
         """
-        Salva o cache JSON em arquivo.
+        url = self._canonizar(url)
+        anterior = self._estados.get(url)
+        if anterior == self.NA_FILA:
+            self._tamanho -= 1
+            self._pontuacoes.pop(url, None)
+        self._estados[url] = self.VISTA
+        return anterior == self.VISTA
+
+    def proxima(self) -> str:
         """
-        caminho = f"data/collections/{self.nome_colecao}"
-        caminho_json = f"{caminho}/urls.json"
+        Retira a URL de maior pontuação da fila e a marca como vista.
 
-        os.makedirs(caminho, exist_ok=True)
+        Returns:
+            URL a acessar
 
-        try:
-            with open(caminho_json, "w", encoding="utf-8") as f:
-                json.dump(self.dados_cache, f, ensure_ascii=False, indent=2)
-            logging.info(f"JSON salvo com sucesso em {caminho_json}")
-        except Exception as e:
-            logging.error(f"Erro ao salvar o arquivo JSON: {e}")
+        Raises:
+            IndexError: Se a fila estiver vazia
+        """
+        while True:
+            negativo, _, url = heapq.heappop(self._fila)
+            if (
+                self._estados.get(url) == self.NA_FILA
+                and self._pontuacoes.get(url) == -negativo
+            ):
+                break
+        del self._pontuacoes[url]
+        self._estados[url] = self.VISTA
+        self._tamanho -= 1
+        return url
+
+    def urls_com_estado(self, estado: str) -> list:
+        """
+        Lista as URLs que estão em um determinado estado.
+
+        Args:
+            estado: Um dos estados da fronteira (NA_FILA, VISTA ou REJEITADA)
+
+        Returns:
+            Lista de URLs (as da fila, em ordem de prioridade)
+        """
+        if estado == self.NA_FILA:
+            return [
+                url
+                for negativo, _, url in sorted(self._fila)
+                if self._estados.get(url) == self.NA_FILA
+                and self._pontuacoes.get(url) == -negativo
+            ]
+        return [url for url, atual in self._estados.items() if atual == estado]
+
+    def para_dict(self, em_andamento=()) -> dict:
+        """
+        Serializa a fronteira para um checkpoint.
+
+        As URLs em andamento (retiradas da fila, mas ainda sem resultado) voltam
+        para a fila, para serem buscadas de novo ao retomar.
+
+        Args:
+            em_andamento: URLs retiradas da fila que ainda não terminaram
+
+        Returns:
+            Dicionário serializável em JSON
+        """
+        estados = dict(self._estados)
+        for url in em_andamento:
+            estados[url] = self.NA_FILA
+        return {
+            "fila": list(
+                dict.fromkeys(list(em_andamento) + self.urls_com_estado(self.NA_FILA))
+            ),
+            "estados": estados,
+            "profundidades": self._profundidades,
+            "links_recebidos": self._links_recebidos,
+            "prioridades_sitemap": self._prioridades_sitemap,
+        }
+
+    @classmethod
+    def de_dict(
+        cls,
+        dados: dict,
+        pontuacao=None,
+        profundidade_maxima: int | None = None,
+        canonizador: Canonizador | None = None,
+    ) -> "Fronteira":
+        """
+        Reconstrói uma fronteira a partir de um checkpoint.
+
+        Args:
+            dados: Dicionário gerado por para_dict
+            pontuacao: Função de pontuação da fronteira (opcional)
+            profundidade_maxima: Profundidade de link máxima aceita (opcional)
+            canonizador: Canonizador aplicado às URLs recebidas (opcional)
+
+        Returns:
+            Fronteira restaurada
+        """
+        fronteira = cls(
+            pontuacao=pontuacao,
+            profundidade_maxima=profundidade_maxima,
+            canonizador=canonizador,
+        )
+        fronteira._estados.update(dados.get("estados", {}))
+        fronteira._profundidades.update(dados.get("profundidades", {}))
+        fronteira._links_recebidos.update(dados.get("links_recebidos", {}))
+        fronteira._prioridades_sitemap.update(dados.get("prioridades_sitemap", {}))
+        for url in dados.get("fila", []):
+            fronteira._estados[url] = cls.NA_FILA
+            fronteira._tamanho += 1
+            fronteira._enfileirar(url)
+        return fronteira
+
+    def resultado(self) -> dict:
+        """
+        Monta o dicionário de resultado do rastreamento.
+
+        Returns:
+            Dicionário com as URLs vistas, na fila e rejeitadas
+        """
+        return {
+            "urls_vistas": self.urls_com_estado(self.VISTA),
+            "urls_para_acessar": self.urls_com_estado(self.NA_FILA),
+            "urls_rejeitadas": self.urls_com_estado(self.REJEITADA),
+        }
+
+
+class GerenciarJson:
+    """
+    Carrega arquivos JSON de configuração (ex: config_urls.json).
+
+    O estado das URLs do rastreamento fica em EstadoRastreamento.
+    """
 
     def carregar_json(self, caminho_do_arquivo: str = "config_urls.json") -> dict:
         """
@@ -403,6 +812,298 @@ class GerenciarJson:
         return {}
 
 
+class PoolPaginasPlaywright:
+    """
+    Pool de páginas Playwright para o fallback de renderização com JavaScript.
+
+    O Chromium só é iniciado no primeiro fallback real, então rastreamentos
+    servidos inteiramente pelo httpx não pagam a inicialização do navegador.
+    Cada página vive em um contexto próprio do mesmo navegador, então vários
+    fallbacks rodam em paralelo. Depois de 'max_navegacoes' navegações o
+    contexto é fechado e recriado, limitando o consumo de memória.
+
+    As páginas interceptam as requisições e abortam os tipos de recurso e os
+    domínios que a conversão para Markdown descarta (imagens, fontes, mídia,
+    CSS, analytics), registrando uma estimativa dos bytes economizados.
+    """
+
+    TIPOS_BLOQUEADOS_PADRAO = frozenset({"image", "media", "font", "stylesheet"})
+    DOMINIOS_BLOQUEADOS_PADRAO = frozenset(
+        {
+            "google-analytics.com",
+            "googletagmanager.com",
+            "doubleclick.net",
+            "hotjar.com",
+            "segment.io",
+            "facebook.net",
+            "clarity.ms",
+        }
+    )
+    TAMANHOS_ESTIMADOS = {
+        "image": 50_000,
+        "media": 500_000,
+        "font": 40_000,
+        "stylesheet": 20_000,
+        "script": 30_000,
+    }
+
+    def __init__(
+        self,
+        tamanho: int = 4,
+        max_navegacoes: int = 50,
+        tipos_bloqueados=None,
+        dominios_bloqueados=None,
+        bloquear_terceiros: bool = False,
+    ):
+        """
+        Inicializa o pool. O navegador e as páginas são criados sob demanda.
+
+        Args:
+            tamanho: Número máximo de páginas simultâneas
+            max_navegacoes: Navegações por página antes de reciclá-la
+            tipos_bloqueados: Tipos de recurso do Playwright a abortar
+                (padrão: TIPOS_BLOQUEADOS_PADRAO)
+            dominios_bloqueados: Domínios (e subdomínios) a abortar
+                (padrão: DOMINIOS_BLOQUEADOS_PADRAO)
+            bloquear_terceiros: Se deve abortar qualquer recurso de outro domínio
+        """
+        self.tipos_bloqueados = frozenset(
+            self.TIPOS_BLOQUEADOS_PADRAO
+            if tipos_bloqueados is None
+            else tipos_bloqueados
+        )
+        self.dominios_bloqueados = frozenset(
+            self.DOMINIOS_BLOQUEADOS_PADRAO
+            if dominios_bloqueados is None
+            else dominios_bloqueados
+        )
+        self.bloquear_terceiros = bloquear_terceiros
+        self.estatisticas_bloqueio = {"requisicoes": 0, "bytes_estimados": 0}
+        self._bloqueios_por_pagina = {}
+        self.navegador = None
+        self._playwright = None
+        self._trava_inicio = asyncio.Lock()
+        self.max_navegacoes = max_navegacoes
+        self._livres = asyncio.Queue()
+        for _ in range(tamanho):
+            self._livres.put_nowait(None)
+        self._navegacoes = {}
+
+    async def _iniciar_navegador(self):
+        """
+        Método interno que inicia o Playwright e o Chromium na primeira chamada
+        """
+        async with self._trava_inicio:
+            if self.navegador is None:
+                self._playwright = await async_playwright().start()
+                self.navegador = await self._playwright.chromium.launch(headless=True)
+                logging.info("Playwright inicializado com sucesso")
+        return self.navegador
+
+    async def _criar_pagina(self):
+        """
+        Método interno que abre um contexto novo com uma página
+        """
+        navegador = await self._iniciar_navegador()
+        contexto = await navegador.new_context()
+        pagina = await contexto.new_page()
+        await pagina.route("**/*", lambda route: self._interceptar(pagina, route))
+        self._navegacoes[pagina] = 0
+        return pagina
+
+    @staticmethod
+    def _pertence_ao_dominio(host: str, dominio: str) -> bool:
+        """
+        Método interno que verifica se o host é o domínio ou um subdomínio dele
+        """
+        return host == dominio or host.endswith(f".{dominio}")
+
+    def _deve_bloquear(self, host_pagina: str | None, requisicao) -> bool:
+        """
+        Método interno que decide se uma requisição da página deve ser abortada
+        """
+        if requisicao.resource_type == "document":
+            return False
+        if requisicao.resource_type in self.tipos_bloqueados:
+            return True
+        host = urlparse(requisicao.url).hostname or ""
+        if any(self._pertence_ao_dominio(host, d) for d in self.dominios_bloqueados):
+            return True
+        return bool(
+            self.bloquear_terceiros
+            and host_pagina
+            and not self._pertence_ao_dominio(host, host_pagina)
+            and not self._pertence_ao_dominio(host_pagina, host)
+        )
+
+    async def _interceptar(self, pagina, route) -> None:
+        """
+        Método interno que aborta ou libera cada requisição feita pela página
+        """
+        bloqueios = self._bloqueios_por_pagina.get(pagina)
+        requisicao = route.request
+        if bloqueios is None or not self._deve_bloquear(bloqueios["host"], requisicao):
+            await route.continue_()
+            return
+
+        await route.abort()
+        bloqueios["requisicoes"] += 1
+        bloqueios["bytes_estimados"] += self.TAMANHOS_ESTIMADOS.get(
+            requisicao.resource_type, 10_000
+        )
+
+    async def renderizar(self, url: str) -> tuple[str, str]:
+        """
+        Renderiza uma URL em uma página do pool, com os recursos pesados bloqueados.
+
+        Args:
+            url: URL a renderizar
+
+        Returns:
+            Tupla (html renderizado, URL final da página após redirecionamentos)
+        """
+        async with self.pagina() as pagina:
+            bloqueios = {
+                "host": urlparse(url).hostname,
+                "requisicoes": 0,
+                "bytes_estimados": 0,
+            }
+            self._bloqueios_por_pagina[pagina] = bloqueios
+            try:
+                await pagina.goto(url, wait_until="domcontentloaded", timeout=15000)
+                return (await pagina.content(), pagina.url or url)
+            finally:
+                del self._bloqueios_por_pagina[pagina]
+                self.estatisticas_bloqueio["requisicoes"] += bloqueios["requisicoes"]
+                self.estatisticas_bloqueio["bytes_estimados"] += bloqueios[
+                    "bytes_estimados"
+                ]
+                logging.info(
+                    f"Playwright {url}: {bloqueios['requisicoes']} requisições "
+                    f"bloqueadas, ~{bloqueios['bytes_estimados'] // 1024} KB "
+                    "economizados (estimativa)"
+                )
+
+    async def _descartar_pagina(self, pagina) -> None:
+        """
+        Método interno que fecha a página e o seu contexto
+        """
+        self._navegacoes.pop(pagina, None)
+        try:
+            await pagina.context.close()
+        except Exception as e:
+            logging.debug(f"Erro ao fechar contexto Playwright: {e}")
+
+    @asynccontextmanager
+    async def pagina(self):
+        """
+        Empresta uma página do pool, esperando se todas estiverem em uso.
+
+        Yields:
+            Página Playwright livre
+        """
+        pagina = await self._livres.get()
+        try:
+            if pagina is None:
+                pagina = await self._criar_pagina()
+            yield pagina
+        finally:
+            try:
+                if pagina is not None:
+                    self._navegacoes[pagina] += 1
+                    if self._navegacoes[pagina] >= self.max_navegacoes:
+                        reciclada, pagina = pagina, None
+                        await self._descartar_pagina(reciclada)
+            finally:
+                self._livres.put_nowait(pagina)
+
+    async def fechar(self) -> None:
+        """
+        Fecha as páginas, os contextos e o navegador, se ele foi iniciado.
+        """
+        for pagina in list(self._navegacoes):
+            await self._descartar_pagina(pagina)
+        if self.navegador is not None:
+            await self.navegador.close()
+            await self._playwright.stop()
+            self.navegador = None
+            self._playwright = None
+
+
+class MemoriaRenderizacao:
+    """
+    Aprende, por host e primeiro segmento do caminho, se o HTML estático basta.
+
+    Uma página cujo Markdown extraído do HTML estático é vazio ou muito pequeno,
+    mas que renderizada pelo navegador tem conteúdo, conta como "precisa de JS".
+    Depois de 'min_amostras' observações concordantes, as seções que precisam
+    de JS vão direto ao Playwright e as estáticas nunca o usam.
+    """
+
+    ESTATICO = "estatico"
+    JS = "js"
+
+    def __init__(self, min_amostras: int = 3, tamanho_minimo: int = 100):
+        """
+        Inicializa a memória.
+
+        Args:
+            min_amostras: Observações necessárias para decidir uma seção
+            tamanho_minimo: Caracteres de Markdown abaixo dos quais o conteúdo
+                é considerado insuficiente
+        """
+        self.min_amostras = min_amostras
+        self.tamanho_minimo = tamanho_minimo
+        self._contagens: dict[str, list[int]] = {}
+
+    @staticmethod
+    def _chave(url: str) -> str:
+        """
+        Método interno que retorna a seção (host + primeiro segmento) da URL
+        """
+        parsed_url = urlparse(url)
+        primeiro_segmento = parsed_url.path.strip("/").split("/", 1)[0]
+        return f"{parsed_url.hostname}/{primeiro_segmento}"
+
+    def modo(self, url: str) -> str | None:
+        """
+        Retorna o modo aprendido para a seção da URL.
+
+        Args:
+            url: URL consultada
+
+        Returns:
+            ESTATICO, JS ou None se a seção ainda não foi decidida
+        """
+        estaticas, com_js = self._contagens.get(self._chave(url), (0, 0))
+        if com_js >= self.min_amostras and com_js > estaticas:
+            return self.JS
+        if estaticas >= self.min_amostras and com_js == 0:
+            return self.ESTATICO
+        return None
+
+    def registrar(self, url: str, precisa_js: bool) -> None:
+        """
+        Registra uma observação para a seção da URL.
+
+        Args:
+            url: URL observada
+            precisa_js: Se a página só teve conteúdo quando renderizada
+        """
+        contagem = self._contagens.setdefault(self._chave(url), [0, 0])
+        modo_anterior = self.modo(url)
+        contagem[1 if precisa_js else 0] += 1
+        modo = self.modo(url)
+        if modo and modo != modo_anterior:
+            logging.info(f"Seção {self._chave(url)} aprendida como: {modo}")
+
+    def conteudo_insuficiente(self, dados: DadosPagina) -> bool:
+        """
+        Verifica se o Markdown extraído de uma página é vazio ou muito pequeno.
+        """
+        return len(dados.conteudo_markdown.strip()) < self.tamanho_minimo
+
+
 def verificar_protocolo_https(url: str) -> str:
     """
     Adiciona protocolo HTTPS a uma URL se não tiver esquema.
@@ -423,112 +1124,685 @@ def verificar_protocolo_https(url: str) -> str:
     return url
 
 
-def verificar_url_completa(url_base: str, url: str) -> str:
+def criar_cliente_http(
+    user_agent: str,
+    max_conexoes: int = 100,
+    max_conexoes_keepalive: int = 20,
+    tempo_keepalive: float = 30.0,
+    http2: bool = False,
+) -> httpx.AsyncClient:
     """
-    Converte uma URL relativa em URL absoluta.
+    Cria o cliente HTTP compartilhado por todo o rastreamento.
+
+    Um único cliente reaproveita as conexões TCP/TLS abertas com o host da
+    documentação, evitando um handshake novo a cada página.
 
     Args:
-        url_base: URL base
-        url: URL relativa ou absoluta
+        user_agent: User-Agent usado em todas as requisições
+        max_conexoes: Número máximo de conexões simultâneas no pool
+        max_conexoes_keepalive: Número máximo de conexões ociosas mantidas abertas
+        tempo_keepalive: Segundos que uma conexão ociosa permanece no pool
+        http2: Se deve habilitar HTTP/2 (requer o pacote 'h2')
 
     Returns:
-        URL absoluta
+        Cliente httpx assíncrono configurado
     """
-    url_absoluta = urljoin(url_base, url)
-    return url_absoluta
+    if http2 and find_spec("h2") is None:
+        logging.warning("Pacote 'h2' não instalado. Usando HTTP/1.1.")
+        http2 = False
+
+    limites = httpx.Limits(
+        max_connections=max_conexoes,
+        max_keepalive_connections=max_conexoes_keepalive,
+        keepalive_expiry=tempo_keepalive,
+    )
+    return httpx.AsyncClient(
+        headers={"User-Agent": user_agent},
+        follow_redirects=True,
+        limits=limites,
+        http2=http2,
+        timeout=10.0,
+    )
 
 
-async def fazer_request(url: str, user_agent: str) -> str:
+@asynccontextmanager
+async def _requisitar(
+    url: str,
+    cliente: httpx.AsyncClient,
+    cabecalhos: dict,
+    polidez: PolidezHosts | None,
+):
+    """
+    Função interna que abre um GET em streaming, esperando a vez do host
+    quando há polidez; o corpo é lido dentro do bloco
+    """
+    if polidez is None:
+        async with cliente.stream("GET", url, headers=cabecalhos) as response:
+            yield response
+        return
+    async with polidez.vez(url):
+        inicio = monotonic()
+        async with cliente.stream("GET", url, headers=cabecalhos) as response:
+            polidez.registrar_resposta(
+                url,
+                response.status_code,
+                monotonic() - inicio,
+                response.headers.get("retry-after"),
+            )
+            yield response
+
+
+async def _ler_html(
+    url: str,
+    response: httpx.Response,
+    metadados: dict | None,
+    tamanho_maximo: int | None,
+) -> str:
+    """
+    Função interna que classifica a resposta pelos cabeçalhos e só então lê
+    o corpo em blocos, decodificando aos poucos e abortando no tamanho máximo
+    """
+    status = response.status_code
+    if status == 304:
+        raise PaginaNaoModificada(url)
+    if status in (404, 410):
+        raise PaginaNaoEncontrada(f"{url} respondeu {status}")
+    if 400 <= status < 500:
+        raise AcessoBloqueado(f"{url} respondeu {status}")
+    if status != 200:
+        raise FalhaBusca(f"{url} respondeu {status}")
+
+    tipo_conteudo = response.headers.get("content-type", "")
+    if "text/html" not in tipo_conteudo:
+        raise ConteudoNaoHtml(f"{url} é {tipo_conteudo or 'sem content-type'}")
+    tamanho_declarado = response.headers.get("content-length", "")
+    if (
+        tamanho_maximo is not None
+        and tamanho_declarado.isdigit()
+        and int(tamanho_declarado) > tamanho_maximo
+    ):
+        raise ConteudoGrandeDemais(
+            f"{url} tem {int(tamanho_declarado)} bytes (máximo {tamanho_maximo})"
+        )
+
+    try:
+        decodificador = codecs.getincrementaldecoder(
+            response.charset_encoding or "utf-8"
+        )(errors="replace")
+    except LookupError:
+        decodificador = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partes = []
+    lidos = 0
+    async for bloco in response.aiter_bytes():
+        lidos += len(bloco)
+        if tamanho_maximo is not None and lidos > tamanho_maximo:
+            raise ConteudoGrandeDemais(
+                f"{url} passou de {tamanho_maximo} bytes; download interrompido"
+            )
+        partes.append(decodificador.decode(bloco))
+    partes.append(decodificador.decode(b"", final=True))
+
+    if metadados is not None:
+        for chave, cabecalho in (("etag", "etag"), ("last_modified", "last-modified")):
+            if cabecalho in response.headers:
+                metadados[chave] = response.headers[cabecalho]
+    return "".join(partes)
+
+
+async def fazer_request(
+    url: str,
+    cliente: httpx.AsyncClient,
+    metadados: dict | None = None,
+    polidez: PolidezHosts | None = None,
+    max_tentativas: int = 3,
+    espera_base: float = 0.5,
+    tamanho_maximo: int | None = TAMANHO_MAXIMO_PAGINA,
+) -> str:
     """
     Faz uma requisição HTTP GET assíncrona para uma URL.
 
+    Se metadados for informado, a requisição é condicional: envia
+    If-None-Match/If-Modified-Since com o ETag e o Last-Modified salvos, e o
+    dicionário é atualizado com os valores da nova resposta.
+
+    A resposta é lida em streaming: o status, o content-type e o
+    content-length são conferidos antes de baixar o corpo, e o download é
+    interrompido assim que passa do tamanho máximo (o limite vale para o
+    conteúdo já descompactado).
+
+    Erros de rede, timeouts, 5xx e 429/503 são tentados de novo com espera
+    exponencial aleatória (jitter). Com polidez, cada tentativa espera a vez
+    do host e a resposta ajusta o ritmo dele.
+
     Args:
         url: URL a acessar
-        user_agent: User-Agent da requisição
+        cliente: Cliente HTTP compartilhado do rastreamento
+        metadados: Metadados salvos da URL no rastreamento anterior (opcional)
+        polidez: Agendador por host do rastreamento (opcional)
+        max_tentativas: Número máximo de tentativas da URL (mínimo 1)
+        espera_base: Espera máxima (s) antes da segunda tentativa; dobra a cada
+            nova tentativa
+        tamanho_maximo: Bytes máximos do corpo da página (None = sem limite)
 
     Returns:
         Conteúdo HTML da resposta
 
     Raises:
-        ValueError: Se a resposta não for HTML ou houver erro
+        PaginaNaoModificada: Se o servidor responder 304
+        PaginaNaoEncontrada: Se o servidor responder 404 ou 410
+        ConteudoNaoHtml: Se a resposta não for HTML
+        ConteudoGrandeDemais: Se o corpo passar do tamanho máximo
+        ErroTransitorio: Se o erro de rede ou 5xx persistir
+        HostSobrecarregado: Se o host continuar respondendo 429/503
+        AcessoBloqueado: Se o servidor recusar a requisição (401, 403...)
+        BloqueadaPorRobots: Se o robots.txt não permitir a URL
+        FalhaBusca: Para qualquer outra resposta diferente de 200
     """
-    headers = {"User-Agent": user_agent}
-    async with httpx.AsyncClient(headers=headers, follow_redirects=True) as client:
-        response = await client.get(url, timeout=10.0)
-    if response.status_code == 200 and "text/html" in response.headers.get(
-        "content-type", ""
-    ):
-        return response.text
-    else:
-        raise ValueError("Resposta não-HTML ou com erro")
+    html, _ = await _buscar_httpx(
+        url, cliente, metadados, polidez, max_tentativas, espera_base, tamanho_maximo
+    )
+    return html
+
+
+async def _buscar_httpx(
+    url: str,
+    cliente: httpx.AsyncClient,
+    metadados: dict | None = None,
+    polidez: PolidezHosts | None = None,
+    max_tentativas: int = 3,
+    espera_base: float = 0.5,
+    tamanho_maximo: int | None = TAMANHO_MAXIMO_PAGINA,
+) -> tuple[str, str]:
+    """
+    Função interna de fazer_request que devolve também a URL final da
+    resposta (após redirecionamentos), base dos links relativos da página
+    """
+    cabecalhos = {}
+    if metadados:
+        if metadados.get("etag"):
+            cabecalhos["If-None-Match"] = metadados["etag"]
+        if metadados.get("last_modified"):
+            cabecalhos["If-Modified-Since"] = metadados["last_modified"]
+
+    # Sempre há ao menos uma tentativa; sem ela não haveria falha a propagar
+    max_tentativas = max(1, max_tentativas)
+    for tentativa in range(max_tentativas):
+        try:
+            async with _requisitar(url, cliente, cabecalhos, polidez) as response:
+                if response.status_code in (429, 503):
+                    falha = HostSobrecarregado(
+                        f"{url} respondeu {response.status_code}"
+                    )
+                elif response.status_code in (500, 502, 504):
+                    falha = ErroTransitorio(f"{url} respondeu {response.status_code}")
+                else:
+                    html = await _ler_html(url, response, metadados, tamanho_maximo)
+                    return (html, str(response.url))
+        except httpx.TransportError as e:
+            falha = ErroTransitorio(f"{type(e).__name__} em {url}: {e}")
+        if tentativa + 1 < max_tentativas:
+            espera = random.uniform(0, espera_base * 2**tentativa)
+            logging.debug(f"{falha}. Nova tentativa em {espera:.2f}s")
+            await asyncio.sleep(espera)
+    raise falha
+
+
+async def buscar_html(
+    url: str,
+    pool_playwright: PoolPaginasPlaywright,
+    cliente: httpx.AsyncClient,
+    metadados: dict | None = None,
+    renderizacao: str | None = None,
+    polidez: PolidezHosts | None = None,
+    tamanho_maximo: int | None = TAMANHO_MAXIMO_PAGINA,
+) -> tuple[str, bool, str]:
+    """
+    Busca o HTML de uma URL, indicando se ele veio do navegador e a URL final
+    após redirecionamentos.
+
+    Tenta httpx primeiro, depois fallback para Playwright se falhar, usando
+    uma página emprestada do pool. O modo de renderização aprendido para a
+    seção pode pular o httpx (JS) ou dispensar o fallback (ESTATICO).
+
+    Só as falhas do httpx que um navegador pode resolver (como um 403 de
+    proteção contra bots, ou uma página vazia) vão para o fallback; 404,
+    conteúdo não-HTML ou grande demais, erros transitórios, 429/503 e o
+    robots.txt são definitivos para a URL.
+
+    Args:
+        url: URL a acessar
+        pool_playwright: Pool de páginas Playwright para fallback
+        cliente: Cliente HTTP compartilhado do rastreamento
+        metadados: Metadados salvos da URL, para a requisição condicional
+        renderizacao: Modo de MemoriaRenderizacao para a seção (opcional)
+        polidez: Agendador por host do rastreamento (opcional)
+        tamanho_maximo: Bytes máximos do corpo da página via httpx
 
+    Returns:
+        Tupla (html, renderizado_pelo_navegador, url_final)
 
-async def obter_varios_conteudos_html(
-    urls: list, pagina_playwright, user_agent: str
-) -> list:
+    Raises:
+        PaginaNaoModificada: Se o servidor indicar que a página não mudou
+        FalhaBusca: Se o httpx falhar de forma que o navegador não resolve
+        Exception: Se nem httpx nem Playwright conseguirem obter o conteúdo
     """
-    Obtém conteúdo HTML de várias URLs de forma assíncrona.
+    if renderizacao != MemoriaRenderizacao.JS:
+        try:
+            html, url_final = await _buscar_httpx(
+                url, cliente, metadados, polidez, tamanho_maximo=tamanho_maximo
+            )
+            if html:
+                return (html, False, url_final)
+        except FalhaBusca as e:
+            if not e.precisa_navegador:
+                raise
+            logging.debug(f"Falha no httpx para {url}, tentando o navegador: {e}")
+        if renderizacao == MemoriaRenderizacao.ESTATICO:
+            raise Exception("Falha ao obter conteúdo com httpx")
 
-    Tenta httpx primeiro, depois fallback para Playwright se falhar.
+    try:
+        if polidez is None:
+            html, url_final = await pool_playwright.renderizar(url)
+        else:
+            async with polidez.vez(url):
+                html, url_final = await pool_playwright.renderizar(url)
+        return (html, True, url_final)
+    except BloqueadaPorRobots:
+        raise
+    except Exception:
+        logging.error(f"Erro Playwright: {url}")
+        raise Exception("Falha ao obter conteúdo com httpx e Playwright")
+
+
+async def obter_conteudo_html(
+    url: str,
+    pool_playwright: PoolPaginasPlaywright,
+    cliente: httpx.AsyncClient,
+    metadados: dict | None = None,
+) -> str:
+    """
+    Obtém o conteúdo HTML de uma URL.
+
+    Tenta httpx primeiro, depois fallback para Playwright se falhar, usando
+    uma página emprestada do pool.
 
     Args:
-        urls: Lista de URLs a acessar
-        pagina_playwright: Página Playwright para fallback
-        user_agent: User-Agent para as requisições
+        url: URL a acessar
+        pool_playwright: Pool de páginas Playwright para fallback
+        cliente: Cliente HTTP compartilhado do rastreamento
+        metadados: Metadados salvos da URL, para a requisição condicional
 
     Returns:
-        Lista de conteúdos HTML
+        Conteúdo HTML da página
+
+    Raises:
+        PaginaNaoModificada: Se o servidor indicar que a página não mudou
+        Exception: Se nem httpx nem Playwright conseguirem obter o conteúdo
     """
-    tasks = [fazer_request(url, user_agent) for url in urls]
-    resultados = list(await asyncio.gather(*tasks, return_exceptions=True))
-    for i, resultado in enumerate(resultados):
-        if isinstance(resultado, Exception) or not resultado:
-            try:
-                await pagina_playwright.goto(
-                    urls[i], wait_until="domcontentloaded", timeout=15000
+    html, _, _ = await buscar_html(url, pool_playwright, cliente, metadados)
+    return html
+
+
+async def converter_pagina(
+    conteudo_html: str, url: str, executor: ProcessPoolExecutor | None
+) -> DadosPagina:
+    """
+    Converte o HTML de uma página em DadosPagina fora do event loop.
+
+    A conversão (readability + Markdown) é pesada em CPU, então roda no pool
+    de processos para não bloquear as requisições em andamento.
+
+    Args:
+        conteudo_html: HTML da página
+        url: URL da página
+        executor: Pool de processos da conversão (None converte no próprio loop)
+
+    Returns:
+        Dados da página convertida
+    """
+    if executor is None:
+        return converter_html_para_markdown(conteudo_html, url)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, converter_html_para_markdown, conteudo_html, url
+    )
+
+
+async def _aprender_renderizacao(
+    url: str,
+    dados: DadosPagina,
+    via_navegador: bool,
+    memoria_renderizacao: MemoriaRenderizacao,
+    semaforo: asyncio.Semaphore,
+    pool_playwright: PoolPaginasPlaywright,
+    cliente: httpx.AsyncClient,
+    executor: ProcessPoolExecutor | None,
+    polidez: PolidezHosts | None = None,
+) -> DadosPagina:
+    """
+    Registra na memória se a página precisou de JS e devolve a melhor versão.
+
+    Se o HTML estático rendeu conteúdo insuficiente, a página é renderizada
+    pelo navegador; ela só conta como "precisa de JS" se a versão renderizada
+    tiver conteúdo.
+
+    Args:
+        url: URL da página
+        dados: Página convertida a partir do HTML obtido
+        via_navegador: Se o HTML já veio do navegador (fallback do httpx)
+        memoria_renderizacao: Memória de quais seções precisam de JS
+        semaforo: Semáforo que limita as requisições simultâneas
+        pool_playwright: Pool de páginas Playwright
+        cliente: Cliente HTTP compartilhado do rastreamento
+        executor: Pool de processos usado na conversão para Markdown
+        polidez: Agendador por host do rastreamento (opcional)
+
+    Returns:
+        Dados da página, renderizada pelo navegador se isso trouxe conteúdo
+    """
+    if via_navegador:
+        if not memoria_renderizacao.conteudo_insuficiente(dados):
+            memoria_renderizacao.registrar(url, precisa_js=True)
+        return dados
+    if not memoria_renderizacao.conteudo_insuficiente(dados):
+        memoria_renderizacao.registrar(url, precisa_js=False)
+        return dados
+
+    try:
+        async with semaforo:
+            html_renderizado, _, url_final = await buscar_html(
+                url,
+                pool_playwright,
+                cliente,
+                renderizacao=MemoriaRenderizacao.JS,
+                polidez=polidez,
+            )
+        dados_renderizados = await converter_pagina(html_renderizado, url, executor)
+        dados_renderizados.url_final = url_final
+    except Exception as e:
+        logging.debug(f"Falha ao renderizar {url} para comparação: {e}")
+        return dados
+
+    precisa_js = not memoria_renderizacao.conteudo_insuficiente(dados_renderizados)
+    memoria_renderizacao.registrar(url, precisa_js)
+    return dados_renderizados if precisa_js else dados
+
+
+async def _worker_busca(
+    fila_urls: asyncio.Queue,
+    fila_resultados: asyncio.Queue,
+    semaforo: asyncio.Semaphore,
+    pool_playwright: PoolPaginasPlaywright,
+    cliente: httpx.AsyncClient,
+    executor: ProcessPoolExecutor | None = None,
+    estado: EstadoRastreamento | None = None,
+    memoria_renderizacao: MemoriaRenderizacao | None = None,
+    polidez: PolidezHosts | None = None,
+    tamanho_maximo: int | None = TAMANHO_MAXIMO_PAGINA,
+) -> None:
+    """
+    Worker que consome URLs da fronteira e publica as páginas convertidas.
+
+    Cada resultado é publicado assim que fica pronto, como uma tupla
+    (url, DadosPagina_ou_exceção), sem esperar pelas demais requisições. A
+    conversão acontece fora do semáforo, liberando a vaga para outra requisição.
+
+    No modo incremental (estado informado), páginas com resposta 304 ou
+    com hash de conteúdo igual ao salvo são publicadas como PaginaNaoModificada,
+    sem conversão. Os metadados da resposta (ETag, hash...) seguem no
+    resultado e só são salvos pelo laço principal, depois da gravação.
+
+    Com memoria_renderizacao, uma página estática com conteúdo insuficiente é
+    buscada de novo pelo navegador, e o resultado alimenta a memória da seção.
+
+    Args:
+        fila_urls: Fila de URLs a buscar
+        fila_resultados: Fila onde os resultados são publicados
+        semaforo: Semáforo que limita as requisições simultâneas
+        pool_playwright: Pool de páginas Playwright para fallback
+        cliente: Cliente HTTP compartilhado do rastreamento
+        executor: Pool de processos usado na conversão para Markdown
+        estado: Estado da coleção com os metadados do modo incremental
+        memoria_renderizacao: Memória de quais seções precisam de JS
+        polidez: Agendador por host do rastreamento (opcional)
+        tamanho_maximo: Bytes máximos do corpo de cada página via httpx
+    """
+    while True:
+        url = await fila_urls.get()
+        metadados = estado.obter_metadados(url) if estado else None
+        modo = memoria_renderizacao.modo(url) if memoria_renderizacao else None
+        try:
+            async with semaforo:
+                conteudo, via_navegador, url_final = await buscar_html(
+                    url,
+                    pool_playwright,
+                    cliente,
+                    metadados,
+                    modo,
+                    polidez,
+                    tamanho_maximo,
                 )
-                resultados[i] = await pagina_playwright.content()
-            except Exception:
-                resultados[i] = Exception(
-                    "Falha ao obter conteúdo com httpx e Playwright"
+            if metadados is not None:
+                hash_conteudo = hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+                hash_anterior = metadados.get("hash")
+                metadados["hash"] = hash_conteudo
+                if hash_anterior == hash_conteudo:
+                    raise PaginaNaoModificada(url, metadados)
+            resultado = await converter_pagina(conteudo, url, executor)
+            resultado.url_final = url_final
+            if memoria_renderizacao and modo is None:
+                resultado = await _aprender_renderizacao(
+                    url,
+                    resultado,
+                    via_navegador,
+                    memoria_renderizacao,
+                    semaforo,
+                    pool_playwright,
+                    cliente,
+                    executor,
+                    polidez,
                 )
-                logging.error(f"Erro Playwright: {urls[i]}")
-    return resultados
+            resultado.metadados = metadados
+        except Exception as e:
+            resultado = e
+        fila_resultados.put_nowait((url, resultado))
+        fila_urls.task_done()
 
 
 def converter_html_para_markdown(conteudo_html, url):
-    soup = BeautifulSoup(conteudo_html, "lxml")
-    documento = Document(conteudo_html)
-    html_limpo = documento.summary()
-    titulo_pagina = documento.title()
-    conteudo_markdown = md(str(html_limpo))
+    """
+    Converte o HTML de uma página em DadosPagina analisando o documento uma vez.
 
-    links = []
-    for elemento in soup.find_all("a", href=True):
-        if isinstance(elemento, Tag):
-            href = elemento.attrs.get("href")
-            if href:
-                links.append(href)
+    A mesma árvore lxml fornece os links (via XPath) e é entregue ao readability
+    para a limpeza, evitando um segundo parse do HTML completo. A árvore já
+    limpa pelo readability é convertida em Markdown direto (ConversorMarkdown),
+    sem reanalisar o resumo nem montar uma árvore BeautifulSoup.
+
+    Args:
+        conteudo_html: HTML da página
+        url: URL da página
+
+    Returns:
+        Dados da página com Markdown, links, título e <link rel=canonical>
+    """
+    arvore = lxml.html.document_fromstring(
+        conteudo_html.encode("utf-8", "replace"), parser=_PARSER_HTML
+    )
+    links = [str(href) for href in arvore.xpath("//a/@href") if href]
+    canonicas = arvore.xpath(
+        '//link[contains(concat(" ", normalize-space(translate(@rel, "CANOIL", '
+        '"canoil")), " "), " canonical ")]/@href'
+    )
+    etree.strip_elements(arvore, "script", "style", with_tail=False)
+
+    titulo_pagina = get_title(arvore)
+    documento = Document(arvore)
+    html_limpo = documento.summary()
+    # Depois do summary(), documento.html guarda a árvore já limpa que foi
+    # serializada; convertê-la direto evita reanalisar o resumo, o que o
+    # parser HTML do lxml faria reaninhando tags (ex: <p> dentro de <h1>)
+    # de forma diferente do markdownify.
+    conteudo_markdown = markdown_da_arvore(documento.html) if html_limpo.strip() else ""
 
     return DadosPagina(
         url_original=url,
         conteudo_markdown=conteudo_markdown,
         links=links,
         titulo_pagina=titulo_pagina,
+        url_canonica=str(canonicas[0]).strip() if canonicas else None,
     )
 
 
-def baixar_conteudo(nome_colecao, nome_arquivo, conteudo_markdown):
-    try:
-        caminho_colecao = f"data/collections/{nome_colecao}"
-        os.makedirs(caminho_colecao, exist_ok=True)
-        with open(
-            f"{caminho_colecao}/{nome_arquivo}.md", "w", encoding="utf-8"
-        ) as file:
-            file.write(conteudo_markdown)
-        logging.info(f"Página salva: {nome_arquivo}")
-    except (OSError, IOError, TypeError) as e:
-        logging.error(f"Erro ao salvar o arquivo {nome_arquivo}: {e}")
+def salvar_checkpoint(
+    estado: EstadoRastreamento,
+    fronteira: Fronteira,
+    urls_em_andamento: set,
+    paginas_salvas: int,
+    canonizador: Canonizador | None = None,
+) -> None:
+    """
+    Grava um checkpoint do rastreamento no estado da coleção.
+
+    Args:
+        estado: Estado persistente da coleção
+        fronteira: Fronteira atual do rastreamento
+        urls_em_andamento: URLs retiradas da fila que ainda não terminaram
+        paginas_salvas: Número de páginas salvas até agora
+        canonizador: Canonizador com as URLs equivalentes aprendidas (opcional)
+    """
+    estado.salvar_checkpoint(
+        {
+            "fronteira": fronteira.para_dict(urls_em_andamento),
+            "paginas_salvas": paginas_salvas,
+            "equivalencias": canonizador.equivalencias if canonizador else {},
+        }
+    )
+    estado.salvar()
+    logging.info(f"Checkpoint salvo: {len(fronteira)} URLs na fila")
+
+
+async def descobrir_por_sitemaps(
+    url: str,
+    fronteira: Fronteira,
+    validador: Validador,
+    estado: EstadoRastreamento,
+    cliente: httpx.AsyncClient,
+    polidez: PolidezHosts | None = None,
+    pular_inalteradas: bool = False,
+    canonizador: Canonizador | None = None,
+) -> tuple[dict, set]:
+    """
+    Alimenta a fronteira com as URLs dos sitemaps do site.
+
+    Cada entrada passa pelo Validador como um link encontrado na URL inicial.
+    Com pular_inalteradas, URLs já salvas cujo <lastmod> é igual ao do
+    rastreamento anterior são devolvidas à parte, para não serem baixadas.
+
+    Args:
+        url: URL inicial do rastreamento
+        fronteira: Fronteira do rastreamento
+        validador: Validador da documentação
+        estado: Estado da coleção, com o lastmod salvo de cada URL
+        cliente: Cliente HTTP compartilhado do rastreamento
+        polidez: Agendador por host do rastreamento (opcional)
+        pular_inalteradas: Se deve separar as URLs com lastmod inalterado
+        canonizador: Canonizador das URLs (padrão: o do validador)
+
+    Returns:
+        Tupla (lastmod de cada URL aceita, URLs inalteradas)
+    """
+    canonizador = canonizador or validador.canonizador
+    lastmods = {}
+    inalteradas = set()
+    urls_sitemap = await descobrir_sitemaps(url, cliente, polidez)
+    async for entrada in ler_sitemaps(urls_sitemap, cliente, polidez):
+        url_limpa = canonizador.canonizar(entrada.url, url)
+        if url_limpa in lastmods or fronteira.estado(url_limpa) == Fronteira.REJEITADA:
+            continue
+        if url_limpa not in fronteira and estado.contem(url_limpa, "urls_vistas"):
+            continue
+
+        link_valido, _ = await validador.validar_link_novo(
+            url_base=url, link_url=url_limpa
+        )
+        if not link_valido:
+            fronteira.rejeitar(url_limpa)
+            continue
+
+        lastmods[url_limpa] = entrada.lastmod
+        if (
+            pular_inalteradas
+            and entrada.lastmod
+            and estado.contem(url_limpa, "urls_vistas")
+            and estado.obter_metadados(url_limpa).get("lastmod") == entrada.lastmod
+        ):
+            inalteradas.add(url_limpa)
+        fronteira.adicionar(url_limpa, 1, prioridade_sitemap=entrada.prioridade)
+
+    logging.info(
+        f"Sitemaps: {len(lastmods)} URLs aceitas, {len(inalteradas)} inalteradas "
+        "desde o último rastreamento"
+    )
+    return lastmods, inalteradas
+
+
+def _registrar_lastmod(estado: EstadoRastreamento, url: str, lastmods: dict) -> None:
+    """
+    Função interna que salva o lastmod do sitemap de uma URL já processada
+    """
+    if lastmods.get(url):
+        metadados = estado.obter_metadados(url)
+        metadados["lastmod"] = lastmods[url]
+        estado.salvar_metadados(url, metadados)
+
+
+async def _enfileirar_links(
+    links: list,
+    url_base: str,
+    fronteira: Fronteira,
+    estado: EstadoRastreamento,
+    validador: Validador,
+    canonizador: Canonizador,
+    url_resolucao: str | None = None,
+) -> None:
+    """
+    Função interna que valida os links de uma página e põe os aprovados na
+    fronteira, uma profundidade abaixo da página. Os links relativos são
+    resolvidos contra url_resolucao (a URL final da página, após
+    redirecionamentos), ou contra url_base se ela não for informada
+    """
+    url_resolucao = url_resolucao or url_base
+    logging.info(f"Processando {len(links)} novos links")
+    profundidade_link = fronteira.profundidade(url_base) + 1
+    for link in links:
+        if not link:
+            logging.info(f"Link vazio ignorado na página {url_base}")
+            continue
+
+        url_limpa = canonizador.canonizar(link, url_resolucao)
+
+        if not urlparse(url_limpa).hostname:
+            logging.info(f"Link ignorado: {url_limpa} (apenas esquema)")
+            continue
+
+        if url_limpa in fronteira or estado.contem(url_limpa, "urls_vistas"):
+            fronteira.registrar_link(url_limpa, profundidade_link)
+            logging.info(f"Link já processado ou na fila: {url_limpa}")
+            continue
+
+        link_valido, link_motivo = await validador.validar_link_novo(
+            url_base=url_base,
+            link_url=url_limpa,
+        )
+
+        if link_valido:
+            if fronteira.adicionar(url_limpa, profundidade_link):
+                logging.info(f"Link APROVADO para a fila: {url_limpa}")
+            else:
+                logging.info(f"Link além da profundidade máxima: {url_limpa}")
+        else:
+            logging.error(f"Link REJEITADO: {url_limpa}, motivo: {link_motivo}")
+            fronteira.rejeitar(url_limpa)
 
 
 async def main(
@@ -536,8 +1810,37 @@ async def main(
     url,
     versao=None,
     acessar_links_internos=True,
-    batch_size=5,
+    concorrencia=5,
+    workers_busca=None,
     profundidade=1,
+    max_paginas=None,
+    profundidade_maxima=None,
+    pontuacao_urls=None,
+    workers=None,
+    incremental=False,
+    backend_estado="sqlite",
+    intervalo_salvamento=20,
+    resume=False,
+    intervalo_checkpoint=30.0,
+    tamanho_pool_playwright=4,
+    max_navegacoes_playwright=50,
+    aprender_renderizacao=True,
+    tipos_recursos_bloqueados=None,
+    dominios_bloqueados=None,
+    bloquear_terceiros=False,
+    respeitar_robots=True,
+    usar_sitemaps=False,
+    regras_canonizacao=None,
+    detectar_duplicatas=True,
+    distancia_duplicata=3,
+    tamanho_maximo_pagina=TAMANHO_MAXIMO_PAGINA,
+    formato_saida="arquivos",
+    taxa_inicial_host=2.0,
+    taxa_maxima_host=20.0,
+    concorrencia_inicial_host=2,
+    max_conexoes=100,
+    max_conexoes_keepalive=20,
+    http2=False,
 ):
     logging.info("Iniciando o processo...")
 
@@ -547,131 +1850,233 @@ async def main(
     url = verificar_protocolo_https(url)
     logging.info(url)
 
-    gerenciar_json = GerenciarJson(nome_colecao)
+    gerenciar_json = GerenciarJson()
     config_path = Path(__file__).parent / "config_urls.json"
     config = gerenciar_json.carregar_json(str(config_path))
+    canonizador = Canonizador.de_config(config, regras_canonizacao)
+    url = canonizador.canonizar(url)
     if versao:
-        validador = Validador(config, versao)
+        validador = Validador(config, versao, canonizador=canonizador)
+
+    async with criar_cliente_http(
+        user_agent,
+        max_conexoes=max_conexoes,
+        max_conexoes_keepalive=max_conexoes_keepalive,
+        http2=http2,
+    ) as cliente:
+        cliente.event_hooks["response"].append(canonizador.observar_resposta)
+        url_valida, msg_valida = await validador.validar_url_inicial(url, cliente)
+        if url_valida:
+            estado = abrir_estado(nome_colecao, backend_estado)
+            escritor = abrir_escritor(nome_colecao, formato_saida)
+            checkpoint = estado.carregar_checkpoint() if resume else None
+            pontuacao = pontuacao_urls or criar_pontuacao([url])
+            if checkpoint:
+                canonizador.carregar_equivalencias(checkpoint.get("equivalencias", {}))
+                fronteira = Fronteira.de_dict(
+                    checkpoint["fronteira"], pontuacao, profundidade_maxima, canonizador
+                )
+                paginas_salvas_contador = checkpoint["paginas_salvas"]
+                logging.info(
+                    f"Retomando o rastreamento: {len(fronteira)} URLs na fila, "
+                    f"{paginas_salvas_contador} páginas já salvas"
+                )
+            else:
+                if resume:
+                    logging.info("Nenhum checkpoint encontrado. Começando do início.")
+                fronteira = Fronteira(
+                    [url] + (estado.listar("urls_vistas") if incremental else []),
+                    pontuacao,
+                    profundidade_maxima,
+                    canonizador,
+                )
+                paginas_salvas_contador = 0
+            urls_em_andamento = set()
+            ultimo_checkpoint = time()
+            if max_paginas is not None:
+                limite_paginas = max_paginas
+            else:
+                limite_paginas = None if profundidade == 1 else profundidade
+
+            estado.adicionar(url, "urls_vistas")
+
+            caminho_duplicatas = f"data/collections/{nome_colecao}/duplicatas.json"
+            indice_duplicatas = (
+                IndiceDuplicatas.carregar(caminho_duplicatas, distancia_duplicata)
+                if detectar_duplicatas
+                else None
+            )
 
-    url_valida, msg_valida = await validador.validar_url_inicial(url, user_agent)
-    if url_valida:
-        json_urls_vistas = gerenciar_json.carregar_json(
-            f"data/collections/{nome_colecao}/urls.json"
-        )
-        json_urls_vistas_set = set(json_urls_vistas.get("urls_vistas", []))
-        urls_vistas = set()
-        urls_para_acessar = [url]
-        urls_rejeitadas = []
-        paginas_salvas_contador = 0
-
-        gerenciar_json.adicionar_no_json(url, "urls_vistas")
-
-        async with async_playwright() as pw:
-            navegador = await pw.chromium.launch(headless=True)
-            pagina_playwright = await navegador.new_page()
-            logging.info("Playwright inicializado com sucesso")
-
-            while paginas_salvas_contador < profundidade and urls_para_acessar:
-                batch = []
-                while urls_para_acessar and len(batch) < batch_size:
-                    url_atual = urls_para_acessar.pop(0)
-                    if url_atual in urls_vistas:
-                        continue
-                    batch.append(url_atual)
-                    urls_vistas.add(url_atual)
+            pool_playwright = PoolPaginasPlaywright(
+                tamanho=tamanho_pool_playwright,
+                max_navegacoes=max_navegacoes_playwright,
+                tipos_bloqueados=tipos_recursos_bloqueados,
+                dominios_bloqueados=dominios_bloqueados,
+                bloquear_terceiros=bloquear_terceiros,
+            )
+            memoria_renderizacao = (
+                MemoriaRenderizacao() if aprender_renderizacao else None
+            )
+            polidez = PolidezHosts(
+                cliente,
+                taxa_inicial=taxa_inicial_host,
+                taxa_maxima=taxa_maxima_host,
+                concorrencia_inicial=concorrencia_inicial_host,
+                concorrencia_maxima=concorrencia,
+                respeitar_robots=respeitar_robots,
+            )
 
-                if not batch:
-                    logging.info(
-                        "Nenhuma URL válida para processar no batch. Encerrando."
+            executor = None
+            tarefas_busca = []
+            try:
+                executor = (
+                    ProcessPoolExecutor(max_workers=workers) if workers != 0 else None
+                )
+                fila_urls = asyncio.Queue()
+                fila_resultados = asyncio.Queue()
+                semaforo = asyncio.Semaphore(concorrencia)
+                tarefas_busca = [
+                    asyncio.create_task(
+                        _worker_busca(
+                            fila_urls,
+                            fila_resultados,
+                            semaforo,
+                            pool_playwright,
+                            cliente,
+                            executor,
+                            estado if incremental else None,
+                            memoria_renderizacao,
+                            polidez,
+                            tamanho_maximo_pagina,
+                        )
+                    )
+                    for _ in range(workers_busca or concorrencia)
+                ]
+
+                lastmods_sitemap, urls_inalteradas = {}, set()
+                if usar_sitemaps and not checkpoint:
+                    lastmods_sitemap, urls_inalteradas = await descobrir_por_sitemaps(
+                        url,
+                        fronteira,
+                        validador,
+                        estado,
+                        cliente,
+                        polidez,
+                        pular_inalteradas=incremental,
+                        canonizador=canonizador,
                     )
-                    break
 
-                conteudos_html = await obter_varios_conteudos_html(
-                    batch, pagina_playwright=pagina_playwright, user_agent=user_agent
-                )
+                while True:
+                    if time() - ultimo_checkpoint >= intervalo_checkpoint:
+                        salvar_checkpoint(
+                            estado,
+                            fronteira,
+                            urls_em_andamento,
+                            paginas_salvas_contador,
+                            canonizador,
+                        )
+                        ultimo_checkpoint = time()
+
+                    while fronteira and len(urls_em_andamento) < concorrencia:
+                        url_proxima = fronteira.proxima()
+                        if url_proxima in urls_inalteradas:
+                            logging.info(
+                                f"Página inalterada segundo o sitemap: {url_proxima}"
+                            )
+                            continue
+                        url_canonica = canonizador.canonizar(url_proxima)
+                        if (
+                            url_canonica != url_proxima
+                            and fronteira.estado(url_canonica) == Fronteira.VISTA
+                        ):
+                            logging.info(
+                                f"{url_proxima} já foi obtida como {url_canonica}"
+                            )
+                            continue
+                        urls_em_andamento.add(url_proxima)
+                        fila_urls.put_nowait(url_proxima)
 
-                for url_atual, conteudo_html_atual in zip(batch, conteudos_html):
-                    if paginas_salvas_contador >= profundidade:
+                    if not urls_em_andamento:
+                        logging.info("Nenhuma URL restante na fronteira. Encerrando.")
                         break
-                    if (
-                        isinstance(conteudo_html_atual, Exception)
-                        or not conteudo_html_atual
-                    ):
+
+                    url_atual, dados_pagina_atual = await fila_resultados.get()
+                    urls_em_andamento.discard(url_atual)
+
+                    if isinstance(dados_pagina_atual, PaginaNaoModificada):
+                        logging.info(f"Página não modificada: {url_atual}")
+                        metadados = dados_pagina_atual.metadados
+                        if metadados is not None:
+                            estado.salvar_metadados(url_atual, metadados)
+                        else:
+                            metadados = estado.obter_metadados(url_atual)
+                        _registrar_lastmod(estado, url_atual, lastmods_sitemap)
+                        if acessar_links_internos:
+                            # Os links da página não mudaram, mas podem levar a
+                            # páginas novas: reenfileira os salvos
+                            await _enfileirar_links(
+                                metadados.get("links", []),
+                                url_atual,
+                                fronteira,
+                                estado,
+                                validador,
+                                canonizador,
+                            )
+                        continue
+
+                    if isinstance(dados_pagina_atual, BloqueadaPorRobots):
+                        logging.info(f"URL bloqueada pelo robots.txt: {url_atual}")
+                        continue
+
+                    if isinstance(dados_pagina_atual, Exception):
                         logging.error(
-                            f"Erro ao obter {url_atual}: {conteudo_html_atual}"
+                            f"Erro ao obter {url_atual}: {dados_pagina_atual}"
                         )
                         continue
 
-                    dados_pagina_atual = converter_html_para_markdown(
-                        conteudo_html_atual, url_atual
-                    )
-
                     if not dados_pagina_atual:
                         logging.error("A página não possui dados ou não foi carregada")
                         continue
 
+                    if dados_pagina_atual.url_canonica:
+                        canonica_declarada = canonizador.canonizar(
+                            dados_pagina_atual.url_canonica, url_atual
+                        )
+                        if (
+                            urlparse(canonica_declarada).hostname
+                            == urlparse(url_atual).hostname
+                        ):
+                            canonizador.aprender(url_atual, canonica_declarada)
+                    url_canonica = canonizador.canonizar(url_atual)
+                    if url_canonica != url_atual:
+                        # A URL canônica serve só para a deduplicação: a
+                        # página continua salva sob a URL que foi buscada
+                        if fronteira.marcar_vista(url_canonica) or (
+                            not incremental
+                            and estado.contem(url_canonica, "urls_vistas")
+                        ):
+                            logging.info(
+                                f"{url_atual} é a mesma página que {url_canonica}, "
+                                "já processada"
+                            )
+                            continue
+                        logging.info(f"{url_atual} tem a URL canônica {url_canonica}")
+
                     if acessar_links_internos:
                         (
                             pagina_valida,
                             pagina_motivo,
                         ) = await validador.validar_pagina_atual(dados_pagina_atual)
 
-                        logging.info(
-                            f"Processando {len(dados_pagina_atual.links)} novos links"
+                        await _enfileirar_links(
+                            dados_pagina_atual.links,
+                            url_atual,
+                            fronteira,
+                            estado,
+                            validador,
+                            canonizador,
+                            dados_pagina_atual.url_final,
                         )
-                        for link in dados_pagina_atual.links:
-                            if not link:
-                                logging.info(
-                                    f"Link vazio ignorado na página {url_atual}"
-                                )
-                                continue
-
-                            parsed_url = urlparse(
-                                verificar_url_completa(url_atual, link)
-                            )
-                            url_limpa = (
-                                parsed_url.scheme
-                                + "://"
-                                + parsed_url.netloc
-                                + parsed_url.path
-                            )
-
-                            if url_limpa.startswith("http://"):
-                                url_limpa = "https" + url_limpa[4:]
-
-                            if url_limpa == "https://":
-                                logging.info(
-                                    f"Link ignorado: {url_limpa} (apenas esquema)"
-                                )
-                                continue
-
-                            if (
-                                url_limpa in urls_vistas
-                                or url_limpa in urls_para_acessar
-                                or url_limpa in urls_rejeitadas
-                                or url_limpa in json_urls_vistas_set
-                            ):
-                                logging.info(
-                                    f"Link já processado ou na fila: {url_limpa}"
-                                )
-                                continue
-
-                            (
-                                link_valido,
-                                link_motivo,
-                            ) = await validador.validar_link_novo(
-                                url_base=url_atual,
-                                link_url=url_limpa,
-                            )
-
-                            if link_valido:
-                                logging.info(f"Link APROVADO para a fila: {url_limpa}")
-                                urls_para_acessar.append(url_limpa)
-                            else:
-                                logging.error(
-                                    f"Link REJEITADO: {url_limpa}, motivo: {link_motivo}"
-                                )
-                                urls_rejeitadas.append(url_limpa)
 
                         if not pagina_valida:
                             logging.info(
@@ -681,6 +2086,22 @@ async def main(
 
                         logging.info("Página aprovada!! Salvando conteúdo")
 
+                    if indice_duplicatas is not None:
+                        impressao = await asyncio.get_running_loop().run_in_executor(
+                            executor, simhash, dados_pagina_atual.conteudo_markdown
+                        )
+                        if impressao is not None:
+                            url_canonica = indice_duplicatas.buscar(
+                                impressao, ignorar=url_atual
+                            )
+                            if url_canonica:
+                                logging.info(
+                                    f"Página quase duplicada de {url_canonica}, "
+                                    f"não salva: {url_atual}"
+                                )
+                                continue
+                            indice_duplicatas.adicionar(url_atual, impressao)
+
                     parser = urlparse(url_atual)
                     dominio = parser.hostname
                     caminho = parser.path
@@ -695,24 +2116,57 @@ async def main(
                     )
                     conteudo_markdown = dados_pagina_atual.conteudo_markdown
 
-                    gerenciar_json.adicionar_no_json(url_atual, "urls_vistas")
-                    baixar_conteudo(
-                        nome_arquivo=nome_arquivo,
-                        nome_colecao=nome_colecao,
-                        conteudo_markdown=conteudo_markdown,
-                    )
-                    if not profundidade == 1:
-                        paginas_salvas_contador += 1
-                    logging.info(f"conteúdo salvo em {nome_arquivo}")
-
-            gerenciar_json.salvar_json()
-            await navegador.close()
+                    estado.adicionar(url_atual, "urls_vistas")
+                    escritor.escrever(nome_arquivo, conteudo_markdown, url_atual)
+                    if dados_pagina_atual.metadados is not None:
+                        metadados = dados_pagina_atual.metadados
+                        # Links absolutos: a base da página pode ter vindo de
+                        # um redirecionamento
+                        metadados["links"] = [
+                            urljoin(dados_pagina_atual.url_final or url_atual, link)
+                            for link in dados_pagina_atual.links
+                            if link
+                        ]
+                        estado.salvar_metadados(url_atual, metadados)
+                    _registrar_lastmod(estado, url_atual, lastmods_sitemap)
+                    paginas_salvas_contador += 1
+                    logging.info(f"conteúdo enviado para gravação em {nome_arquivo}")
+                    if paginas_salvas_contador % intervalo_salvamento == 0:
+                        estado.salvar()
+
+                    if limite_paginas and paginas_salvas_contador >= limite_paginas:
+                        break
 
-        return {
-            "urls_vistas": list(urls_vistas),
-            "urls_para_acessar": urls_para_acessar,
-            "urls_rejeitadas": urls_rejeitadas,
-        }
+                logging.info(
+                    f"Cache de validação de links: {validador.estatisticas_cache}"
+                )
+                logging.info(
+                    "Recursos bloqueados no Playwright: "
+                    f"{pool_playwright.estatisticas_bloqueio}"
+                )
+                logging.info(f"Ritmo final por host: {polidez.estatisticas}")
+
+                return fronteira.resultado()
+            finally:
+                for tarefa in tarefas_busca:
+                    tarefa.cancel()
+                await asyncio.gather(*tarefas_busca, return_exceptions=True)
+                if executor:
+                    executor.shutdown(cancel_futures=True)
+                await pool_playwright.fechar()
+                await asyncio.to_thread(escritor.fechar)
+                if escritor.erros:
+                    logging.error(f"{escritor.erros} páginas não foram gravadas")
+                if indice_duplicatas is not None and indice_duplicatas.alterado:
+                    indice_duplicatas.salvar(caminho_duplicatas)
+                salvar_checkpoint(
+                    estado,
+                    fronteira,
+                    urls_em_andamento,
+                    paginas_salvas_contador,
+                    canonizador,
+                )
+                estado.fechar()
 
     return f"URL não parece ser de uma documentação: {msg_valida}"
 
@@ -729,14 +2183,70 @@ def scraper_docs(**params) -> dict | str:
             - url: URL inicial a rastrear
             - versao: Versão da documentação
             - acessar_links_internos: Se deve seguir links internos
-            - batch_size: Tamanho do lote de URLs
-            - profundidade: Profundidade de rastreamento
+            - concorrencia: Número máximo de requisições simultâneas
+            - workers_busca: Número de workers de busca (padrão: concorrencia)
+            - profundidade: Limite de páginas salvas (1 = sem limite); mantido
+              por compatibilidade, prefira max_paginas
+            - max_paginas: Limite de páginas salvas (sobrepõe profundidade)
+            - profundidade_maxima: Profundidade de link máxima seguida a partir
+              da URL inicial (padrão: sem limite)
+            - pontuacao_urls: Função que recebe um InfoUrl e retorna a
+              pontuação da URL; as maiores são buscadas antes (padrão:
+              criar_pontuacao com a URL inicial como prefixo prioritário)
+            - workers: Processos da conversão para Markdown (padrão: núcleos
+              da CPU; 0 converte no próprio event loop)
+            - incremental: Se deve refazer só o que mudou desde o último
+              rastreamento (requisições condicionais e hash do conteúdo)
+            - backend_estado: Armazenamento do estado da coleção ('sqlite' ou
+              'jsonl'); um urls.json existente é importado na primeira execução
+            - intervalo_salvamento: Páginas salvas entre gravações do estado
+            - resume: Se deve continuar do último checkpoint da coleção
+            - intervalo_checkpoint: Segundos entre checkpoints da fronteira
+            - tamanho_pool_playwright: Páginas Playwright simultâneas no fallback
+            - max_navegacoes_playwright: Navegações por página antes de reciclá-la
+            - aprender_renderizacao: Se deve aprender por seção do site quando o
+              HTML estático basta e quando é preciso renderizar com JS
+            - tipos_recursos_bloqueados: Tipos de recurso abortados no Playwright
+              (padrão: imagens, mídia, fontes e CSS)
+            - dominios_bloqueados: Domínios abortados no Playwright (padrão:
+              serviços de analytics conhecidos)
+            - bloquear_terceiros: Se o Playwright deve abortar recursos de
+              outros domínios
+            - respeitar_robots: Se deve obedecer ao robots.txt de cada host
+              (Disallow, Crawl-delay e Request-rate)
+            - regras_canonizacao: Regras de canonização de URLs por host, que
+              sobrepõem as de 'regras_canonizacao' do config_urls.json (ex:
+              {"docs.site.com": {"parametros_permitidos": ["lang"],
+              "barra_final": "adicionar"}})
+            - detectar_duplicatas: Se deve deixar de salvar páginas quase
+              iguais a uma já salva (SimHash do Markdown); o índice fica em
+              duplicatas.json na coleção
+            - distancia_duplicata: Bits de diferença (de 64) até os quais duas
+              páginas são consideradas quase duplicadas
+            - tamanho_maximo_pagina: Bytes máximos do HTML de uma página
+              (padrão: 10 MB; None = sem limite); páginas maiores são
+              descartadas sem baixar o resto do corpo
+            - formato_saida: 'arquivos' (um .md por página), 'jsonl' ou 'tar'
+              (todas as páginas em paginas.<formato>, com um índice de offsets
+              em paginas.<formato>.indice.json); a gravação roda em uma thread
+              separada, em lotes e de forma atômica
+            - usar_sitemaps: Se deve preencher a fronteira com os sitemaps do
+              site (robots.txt ou /sitemap.xml, inclusive .gz); no modo
+              incremental, páginas com <lastmod> inalterado não são baixadas
+            - taxa_inicial_host: Requisições por segundo iniciais por host; o
+              ritmo sobe enquanto a latência está saudável e cai com 429/503
+            - taxa_maxima_host: Teto de requisições por segundo por host
+            - concorrencia_inicial_host: Requisições simultâneas iniciais por
+              host (o teto é 'concorrencia')
+            - max_conexoes: Limite de conexões do pool HTTP compartilhado
+            - max_conexoes_keepalive: Conexões ociosas mantidas abertas no pool
+            - http2: Se deve habilitar HTTP/2 no cliente compartilhado
 
     Returns:
         Mensagem de resultado do scraping
     """
     logging.info(
-        f"Iniciando o scraper com os seguintes parâmetros: {json.dumps(params, indent=4)}"
+        f"Iniciando o scraper com os seguintes parâmetros: {json.dumps(params, indent=4, default=str)}"
     )
 
     resultado = asyncio.run(main(**params))
@@ -758,7 +2268,7 @@ if __name__ == "__main__":
         "url": "https://docs.python.org/3/",
         "versao": 3.11,
         "acessar_links_internos": True,
-        "batch_size": 30,
+        "concorrencia": 30,
         "profundidade": 200,
     }
     logging.info("# Técnica de Gerenciamento de urls com json implementada")
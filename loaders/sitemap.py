@@ -0,0 +1,150 @@
+import logging
+import zlib
+from dataclasses import dataclass
+from urllib.parse import urljoin, urlparse
+from lxml import etree
+import httpx
+from loaders.polidez import PolidezHosts
+
+
+@dataclass
+class EntradaSitemap:
+    url: str
+    lastmod: str | None = None
+    prioridade: float | None = None
+
+
+async def descobrir_sitemaps(
+    url: str, cliente: httpx.AsyncClient, polidez: PolidezHosts | None = None
+) -> list:
+    """
+    Lista os sitemaps do host de uma URL.
+
+    Usa os sitemaps declarados no robots.txt e, se não houver nenhum, o
+    /sitemap.xml da raiz do host.
+
+    Args:
+        url: Qualquer URL do host
+        cliente: Cliente HTTP compartilhado do rastreamento
+        polidez: Agendador por host, que já guarda o robots.txt (opcional)
+
+    Returns:
+        Lista de URLs de sitemap
+    """
+    sitemaps = []
+    if polidez is not None:
+        sitemaps = await polidez.urls_sitemap(url)
+    if not sitemaps:
+        partes = urlparse(url)
+        sitemaps = [f"{partes.scheme}://{partes.netloc}/sitemap.xml"]
+    return sitemaps
+
+
+async def _baixar_e_analisar(
+    url_sitemap: str, cliente: httpx.AsyncClient, polidez: PolidezHosts | None
+):
+    """
+    Função interna que baixa um sitemap em blocos, descompacta o gzip se
+    preciso e produz cada elemento <url>/<sitemap> assim que é fechado
+    """
+    parser = etree.XMLPullParser(events=("end",), resolve_entities=False)
+    descompressor = None
+
+    async def baixar():
+        nonlocal descompressor
+        async with cliente.stream("GET", url_sitemap) as response:
+            if response.status_code != 200:
+                logging.warning(
+                    f"Sitemap {url_sitemap} respondeu {response.status_code}"
+                )
+                return
+            async for bloco in response.aiter_bytes():
+                if descompressor is None:
+                    descompressor = (
+                        zlib.decompressobj(16 + zlib.MAX_WBITS)
+                        if bloco[:2] == b"\x1f\x8b"
+                        else False
+                    )
+                parser.feed(descompressor.decompress(bloco) if descompressor else bloco)
+                for _, elemento in parser.read_events():
+                    yield elemento
+            if descompressor:
+                parser.feed(descompressor.flush())
+            parser.close()
+            for _, elemento in parser.read_events():
+                yield elemento
+
+    if polidez is None:
+        async for elemento in baixar():
+            yield elemento
+    else:
+        async with polidez.vez(url_sitemap):
+            async for elemento in baixar():
+                yield elemento
+
+
+def _texto_filho(elemento, nome: str) -> str | None:
+    """
+    Função interna que retorna o texto de um filho pelo nome local da tag
+    """
+    for filho in elemento:
+        if isinstance(filho.tag, str) and etree.QName(filho).localname == nome:
+            return (filho.text or "").strip() or None
+    return None
+
+
+async def ler_sitemaps(
+    urls_sitemap: list,
+    cliente: httpx.AsyncClient,
+    polidez: PolidezHosts | None = None,
+    max_niveis: int = 3,
+):
+    """
+    Lê sitemaps e índices de sitemap (inclusive .xml.gz) produzindo as entradas
+    à medida que são analisadas, sem carregar o arquivo inteiro na memória.
+
+    Args:
+        urls_sitemap: URLs dos sitemaps (ou índices de sitemap) iniciais
+        cliente: Cliente HTTP compartilhado do rastreamento
+        polidez: Agendador por host do rastreamento (opcional)
+        max_niveis: Quantos níveis de índices aninhados seguir
+
+    Yields:
+        EntradaSitemap de cada <url> encontrada
+    """
+    pendentes = [(url_sitemap, 0) for url_sitemap in urls_sitemap]
+    visitados = set()
+    while pendentes:
+        url_sitemap, nivel = pendentes.pop(0)
+        if url_sitemap in visitados:
+            continue
+        visitados.add(url_sitemap)
+        logging.info(f"Lendo sitemap {url_sitemap}")
+
+        try:
+            async for elemento in _baixar_e_analisar(url_sitemap, cliente, polidez):
+                nome = etree.QName(elemento).localname
+                if nome not in ("url", "sitemap"):
+                    continue
+                loc = _texto_filho(elemento, "loc")
+                if loc:
+                    loc = urljoin(url_sitemap, loc)
+                    if nome == "sitemap":
+                        if nivel < max_niveis:
+                            pendentes.append((loc, nivel + 1))
+                    else:
+                        prioridade = _texto_filho(elemento, "priority")
+                        try:
+                            prioridade = float(prioridade) if prioridade else None
+                        except ValueError:
+                            prioridade = None
+                        yield EntradaSitemap(
+                            url=loc,
+                            lastmod=_texto_filho(elemento, "lastmod"),
+                            prioridade=prioridade,
+                        )
+                elemento.clear()
+                while elemento.getprevious() is not None:
+                    del elemento.getparent()[0]
+        except (httpx.HTTPError, etree.XMLSyntaxError, zlib.error, ValueError) as e:
+            logging.warning(f"Erro ao ler o sitemap {url_sitemap}: {e}")
@@ -0,0 +1,319 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from loaders.persistencia import carregar_json, salvar_json
+
+_TITULO_ATX = re.compile(r"^ {0,3}(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$")
+_SUBLINHADO_SETEXT = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+_CERCA_CODIGO = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+
+
+@dataclass
+class Trecho:
+    """
+    Pedaço de uma página pronto para o embedding.
+
+    inicio e fim são posições (em caracteres) do texto no Markdown da página;
+    secoes é o caminho de títulos até o trecho, do mais geral ao mais
+    específico.
+    """
+
+    id: str
+    pagina: str
+    url: str | None
+    titulo: str | None
+    secoes: list = field(default_factory=list)
+    texto: str = ""
+    inicio: int = 0
+    fim: int = 0
+
+
+def _linhas_com_posicao(markdown: str, inicio: int = 0, fim: int | None = None):
+    """
+    Função interna que produz (posição, linha) das linhas de um intervalo
+    """
+    fim = len(markdown) if fim is None else fim
+    posicao = inicio
+    while posicao < fim:
+        quebra = markdown.find("\n", posicao, fim)
+        proxima = fim if quebra == -1 else quebra + 1
+        yield posicao, markdown[posicao:proxima]
+        posicao = proxima
+
+
+def _secoes(markdown: str):
+    """
+    Função interna que divide o Markdown nas seções delimitadas por títulos
+    (ATX '#' ou sublinhados '='/'-'), ignorando o que está em blocos de
+    código, e produz (caminho_de_titulos, inicio, fim_do_titulo, fim)
+    """
+    caminho = []
+    inicio_secao = fim_titulo = 0
+    cerca = None
+    anterior = None  # (posição, linha) da linha anterior fora de código
+
+    for posicao, linha in _linhas_com_posicao(markdown):
+        texto = linha.rstrip("\n")
+        abertura = _CERCA_CODIGO.match(texto)
+        if cerca:
+            if abertura and abertura.group(1)[0] == cerca[0]:
+                cerca = None
+            anterior = None
+            continue
+        if abertura:
+            cerca = abertura.group(1)
+            anterior = None
+            continue
+
+        titulo = None
+        inicio_titulo = posicao
+        atx = _TITULO_ATX.match(texto)
+        if atx:
+            titulo = (len(atx.group(1)), atx.group(2).strip())
+        elif (
+            _SUBLINHADO_SETEXT.match(texto)
+            and anterior is not None
+            and anterior[1].strip()
+            and not _TITULO_ATX.match(anterior[1])
+        ):
+            nivel = 1 if texto.strip()[0] == "=" else 2
+            titulo = (nivel, anterior[1].strip())
+            inicio_titulo = anterior[0]
+
+        if titulo:
+            if inicio_titulo > inicio_secao:
+                yield (
+                    [nome for _, nome in caminho],
+                    inicio_secao,
+                    fim_titulo,
+                    inicio_titulo,
+                )
+            while caminho and caminho[-1][0] >= titulo[0]:
+                caminho.pop()
+            caminho.append(titulo)
+            inicio_secao = inicio_titulo
+            fim_titulo = posicao + len(linha)
+            anterior = None
+            continue
+        anterior = (posicao, linha)
+
+    if len(markdown) > inicio_secao:
+        yield ([nome for _, nome in caminho], inicio_secao, fim_titulo, len(markdown))
+
+
+def _cortes(markdown: str, inicio: int, fim: int, tamanho_maximo: int):
+    """
+    Função interna que divide uma seção longa em intervalos de até
+    tamanho_maximo caracteres, cortando de preferência entre parágrafos e
+    nunca dentro de um bloco de código (a não ser que ele sozinho passe do
+    limite)
+    """
+    inicio_trecho = ultimo_corte = inicio
+    cerca = None
+    linha_em_branco = False
+    for posicao, linha in _linhas_com_posicao(markdown, inicio, fim):
+        if cerca is None and linha_em_branco and posicao > inicio_trecho:
+            ultimo_corte = posicao
+        texto = linha.rstrip("\n")
+        abertura = _CERCA_CODIGO.match(texto)
+        if cerca:
+            if abertura and abertura.group(1)[0] == cerca[0]:
+                cerca = None
+        elif abertura:
+            cerca = abertura.group(1)
+        linha_em_branco = not texto.strip()
+
+        while posicao + len(linha) - inicio_trecho > tamanho_maximo:
+            if ultimo_corte > inicio_trecho:
+                corte = ultimo_corte
+            elif posicao > inicio_trecho:
+                corte = posicao
+            else:
+                corte = inicio_trecho + tamanho_maximo
+            yield (inicio_trecho, corte)
+            inicio_trecho = ultimo_corte = corte
+    if fim > inicio_trecho:
+        yield (inicio_trecho, fim)
+
+
+def dividir_markdown(markdown: str, tamanho_maximo: int = 1500):
+    """
+    Divide o Markdown de uma página em trechos que respeitam os títulos.
+
+    Cada seção vira um trecho; seções maiores que tamanho_maximo são
+    cortadas entre parágrafos. Seções só com o título são descartadas.
+
+    Args:
+        markdown: Markdown da página
+        tamanho_maximo: Caracteres máximos de um trecho
+
+    Yields:
+        Tuplas (caminho_de_titulos, texto, inicio, fim)
+    """
+    for caminho, inicio, fim_titulo, fim in _secoes(markdown):
+        if not markdown[fim_titulo:fim].strip():
+            continue
+        for inicio_trecho, fim_trecho in _cortes(markdown, inicio, fim, tamanho_maximo):
+            if not markdown[max(inicio_trecho, fim_titulo) : fim_trecho].strip():
+                continue
+            texto = markdown[inicio_trecho:fim_trecho]
+            conteudo = texto.strip()
+            inicio_trecho += len(texto) - len(texto.lstrip())
+            yield (caminho, conteudo, inicio_trecho, inicio_trecho + len(conteudo))
+
+
+def _primeiro_titulo(markdown: str) -> str | None:
+    """
+    Função interna que retorna o primeiro título do Markdown
+    """
+    for caminho, _, _, _ in _secoes(markdown):
+        if caminho:
+            return caminho[0]
+    return None
+
+
+def gerar_trechos(paginas, tamanho_maximo: int = 1500):
+    """
+    Gera os trechos de uma sequência de páginas, uma página por vez.
+
+    Args:
+        paginas: Iterável de tuplas (nome, url, titulo, markdown) ou de
+            DadosPagina (o nome vem da URL)
+        tamanho_maximo: Caracteres máximos de um trecho
+
+    Yields:
+        Trecho de cada pedaço das páginas
+    """
+    for pagina in paginas:
+        if hasattr(pagina, "conteudo_markdown"):
+            url = pagina.url_original
+            nome, titulo = url, pagina.titulo_pagina
+            markdown = pagina.conteudo_markdown
+        else:
+            nome, url, titulo, markdown = pagina
+        titulo = titulo or _primeiro_titulo(markdown)
+        for indice, (secoes, texto, inicio, fim) in enumerate(
+            dividir_markdown(markdown, tamanho_maximo)
+        ):
+            yield Trecho(
+                id=f"{nome}#{indice}",
+                pagina=nome,
+                url=url,
+                titulo=titulo,
+                secoes=secoes,
+                texto=texto,
+                inicio=inicio,
+                fim=fim,
+            )
+
+
+def ler_paginas_colecao(nome_colecao: str):
+    """
+    Lê as páginas salvas de uma coleção, em qualquer formato de saída do
+    scraper: arquivos .md soltos (com as URLs em paginas.indice.json) ou o
+    pacote paginas.jsonl/paginas.tar com o índice de posições.
+
+    Args:
+        nome_colecao: Nome da coleção
+
+    Yields:
+        Tuplas (nome, url, titulo, markdown), uma página por vez
+    """
+    caminho_colecao = f"data/collections/{nome_colecao}"
+    urls = carregar_json(f"{caminho_colecao}/paginas.indice.json", {})
+    for nome_arquivo in sorted(os.listdir(caminho_colecao)):
+        if nome_arquivo.endswith(".md"):
+            nome = nome_arquivo[:-3]
+            with open(f"{caminho_colecao}/{nome_arquivo}", "r", encoding="utf-8") as f:
+                yield (nome, urls.get(nome), None, f.read())
+
+    for formato in ("jsonl", "tar"):
+        caminho_pacote = f"{caminho_colecao}/paginas.{formato}"
+        caminho_indice = f"{caminho_pacote}.indice.json"
+        if not os.path.exists(caminho_indice):
+            continue
+        with open(caminho_indice, "r", encoding="utf-8") as f:
+            indice = json.load(f)
+        with open(caminho_pacote, "rb") as pacote:
+            for nome, entrada in sorted(indice.items()):
+                pacote.seek(entrada["offset"])
+                dados = pacote.read(entrada["tamanho"])
+                if formato == "jsonl":
+                    markdown = json.loads(dados)["conteudo"]
+                else:
+                    markdown = dados.decode("utf-8")
+                yield (nome, entrada.get("url"), None, markdown)
+
+
+def dividir_colecao(
+    nome_colecao: str, tamanho_maximo: int = 1500, incremental: bool = True
+) -> dict:
+    """
+    Divide as páginas de uma coleção em trechos, gravados em trechos.jsonl.
+
+    O arquivo é reescrito em streaming: no modo incremental, os trechos das
+    páginas com o mesmo hash (URL e conteúdo) da última execução são
+    copiados do arquivo anterior, e só as páginas novas ou alteradas são
+    divididas de novo. Os hashes ficam em trechos.hashes.json.
+
+    Args:
+        nome_colecao: Nome da coleção
+        tamanho_maximo: Caracteres máximos de um trecho
+        incremental: Se deve reaproveitar os trechos das páginas inalteradas
+
+    Returns:
+        Dicionário com o número de páginas, páginas divididas, trechos
+        gravados e páginas removidas
+    """
+    caminho_colecao = f"data/collections/{nome_colecao}"
+    caminho_trechos = f"{caminho_colecao}/trechos.jsonl"
+    caminho_hashes = f"{caminho_colecao}/trechos.hashes.json"
+
+    hashes_anteriores = carregar_json(caminho_hashes, {}) if incremental else {}
+    if hashes_anteriores.get("tamanho_maximo") != tamanho_maximo:
+        hashes_anteriores = {}
+    paginas_anteriores = hashes_anteriores.get("paginas", {})
+
+    hashes = {}
+    alteradas = set()
+    estatisticas = {"paginas": 0, "divididas": 0, "trechos": 0, "removidas": 0}
+    caminho_temp = f"{caminho_trechos}.tmp"
+    with open(caminho_temp, "w", encoding="utf-8") as saida:
+
+        def gravar(registro: str) -> None:
+            saida.write(registro)
+            estatisticas["trechos"] += 1
+
+        def paginas_alteradas():
+            for nome, url, titulo, markdown in ler_paginas_colecao(nome_colecao):
+                if nome in hashes:
+                    continue
+                # A URL entra no hash porque vai em cada trecho da página
+                hash_pagina = hashlib.sha256(
+                    f"{url}\n{markdown}".encode("utf-8")
+                ).hexdigest()
+                hashes[nome] = hash_pagina
+                estatisticas["paginas"] += 1
+                if paginas_anteriores.get(nome) != hash_pagina:
+                    alteradas.add(nome)
+                    yield (nome, url, titulo, markdown)
+
+        for trecho in gerar_trechos(paginas_alteradas(), tamanho_maximo):
+            gravar(json.dumps(asdict(trecho), ensure_ascii=False) + "\n")
+
+        if paginas_anteriores and os.path.exists(caminho_trechos):
+            with open(caminho_trechos, "r", encoding="utf-8") as anterior:
+                for linha in anterior:
+                    pagina = json.loads(linha)["pagina"]
+                    if pagina in hashes and pagina not in alteradas:
+                        gravar(linha)
+    os.replace(caminho_temp, caminho_trechos)
+
+    estatisticas["divididas"] = len(alteradas)
+    estatisticas["removidas"] = len(paginas_anteriores.keys() - hashes.keys())
+    salvar_json({"tamanho_maximo": tamanho_maximo, "paginas": hashes}, caminho_hashes)
+    logging.info(f"Trechos da coleção {nome_colecao}: {estatisticas}")
+    return estatisticas
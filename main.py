@@ -21,7 +21,7 @@ def main():
         "url": "https://example.com/docs",
         "versao": "",
         "acessar_links_internos": True,
-        "batch_size": 50,
+        "concorrencia": 50,
         "profundidade": 10
     }
     
@@ -0,0 +1,79 @@
+import sys
+import logging
+from pathlib import Path
+from time import process_time
+from bs4 import BeautifulSoup, Tag
+from markdownify import markdownify as md
+from readability import Document
+from loaders.scraper import DadosPagina, converter_html_para_markdown
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+REPETICOES = 5
+
+
+def converter_html_para_markdown_dois_parses(conteudo_html, url):
+    """
+    Versão anterior da conversão, que analisa o HTML duas vezes
+    (BeautifulSoup para os links e readability para o conteúdo).
+    """
+    soup = BeautifulSoup(conteudo_html, "lxml")
+    documento = Document(conteudo_html)
+    html_limpo = documento.summary()
+    titulo_pagina = documento.title()
+    conteudo_markdown = md(str(html_limpo))
+
+    links = []
+    for elemento in soup.find_all("a", href=True):
+        if isinstance(elemento, Tag):
+            href = elemento.attrs.get("href")
+            if href:
+                links.append(href)
+
+    return DadosPagina(
+        url_original=url,
+        conteudo_markdown=conteudo_markdown,
+        links=links,
+        titulo_pagina=titulo_pagina,
+    )
+
+
+def medir(funcao, paginas):
+    inicio = process_time()
+    for _ in range(REPETICOES):
+        for caminho, html in paginas:
+            funcao(html, caminho)
+    return (process_time() - inicio) / (REPETICOES * len(paginas))
+
+
+def carregar_paginas(caminhos):
+    arquivos = []
+    for caminho in map(Path, caminhos):
+        arquivos.extend(
+            sorted(caminho.rglob("*.html")) if caminho.is_dir() else [caminho]
+        )
+    return [(str(arquivo), arquivo.read_text(encoding="utf-8")) for arquivo in arquivos]
+
+
+# Uso: python -m testes.benchmark_conversao <pasta_ou_arquivos_html...>
+paginas = carregar_paginas(sys.argv[1:] or ["data/paginas_html"])
+if not paginas:
+    print("Nenhuma página HTML salva encontrada para o benchmark")
+    sys.exit(1)
+
+for caminho, html in paginas:
+    antigo = converter_html_para_markdown_dois_parses(html, caminho)
+    novo = converter_html_para_markdown(html, caminho)
+    if antigo.links != novo.links or antigo.titulo_pagina != novo.titulo_pagina:
+        logging.warning(f"Resultado divergente em {caminho}")
+
+tempo_antigo = medir(converter_html_para_markdown_dois_parses, paginas)
+tempo_novo = medir(converter_html_para_markdown, paginas)
+
+logging.info(f"Páginas: {len(paginas)}, repetições: {REPETICOES}")
+logging.info(f"Dois parses: {tempo_antigo * 1000:.2f} ms de CPU por página")
+logging.info(f"Parse único: {tempo_novo * 1000:.2f} ms de CPU por página")
+print(f"Ganho: {tempo_antigo / tempo_novo:.2f}x")
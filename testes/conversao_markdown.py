@@ -0,0 +1,98 @@
+import sys
+import difflib
+import logging
+from pathlib import Path
+import lxml.html
+from lxml import etree
+from markdownify import markdownify as md
+from readability import Document
+from loaders.scraper import converter_html_para_markdown
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+TEXTO = (
+    "Este parágrafo existe para o readability reconhecer o bloco como o "
+    "conteúdo principal da página, com frases longas, vírgulas e pontos. "
+)
+
+# Trechos que exercitam cada conversão do markdownify e os casos em que o
+# parser do lxml e o html.parser divergem ao reanalisar o resumo.
+TRECHOS = [
+    "<h1><div>pasta/do/arquivo/</div>arquivo.rs</h1><pre><code>fn main() {}</code></pre>",
+    "<h2>Título <em>com</em> <code>código</code></h2><p>a_b *c* `d` #e 1. f</p>",
+    '<p>Link <a href="https://x.y/a" title="t">com título</a> e '
+    '<a href="https://x.y/b">https://x.y/b</a> e <a href="#ancora">âncora</a>.</p>',
+    '<p><img src="i.png" alt="alt" title="tit"> e <a href="/x"><img src="j.png"></a></p>',
+    "<ul><li>um<ul><li>dois<ol start='3'><li>três</li><li>quatro</li></ol></li>"
+    "</ul></li><li><p>parágrafo</p><pre>bloco\n  indentado</pre></li></ul>",
+    "<table><caption>Tabela</caption><thead><tr><th>a</th><th colspan='2'>b</th>"
+    "</tr></thead><tbody><tr><td>1<br>2</td><td>| 3</td><td></td></tr></tbody></table>",
+    "<blockquote><p>citação</p><blockquote>aninhada<br>linha</blockquote></blockquote>",
+    "<dl><dt>termo</dt><dd>definição</dd><dd>outra</dd></dl><hr>"
+    "<p>x<sub>2</sub> y<sup>3</sup> <del>a</del> <s>b</s> <kbd>Ctrl</kbd> "
+    "<samp>saída</samp> <b>negrito</b> <i>itálico</i> &nbsp;&lt;tag&gt;</p>",
+    "<figure><img src='f.png' alt='figura'><figcaption>legenda</figcaption></figure>"
+    "<video src='v.mp4' poster='p.png'>vídeo</video>",
+    "<noscript><p>Ative o JavaScript.</p></noscript><section><article>"
+    "<p>texto   com\n\tespaços</p></article></section>",
+]
+
+
+def converter_com_markdownify(conteudo_html):
+    """
+    Referência: a mesma árvore limpa pelo readability convertida pelo
+    markdownify. A serialização em XHTML mantém todas as tags de fechamento
+    (o serializador HTML do lxml omite o </li> de itens vazios), então o
+    html.parser reconstrói exatamente a árvore que o ConversorMarkdown recebe.
+    """
+    arvore = lxml.html.document_fromstring(
+        conteudo_html.encode("utf-8", "replace"),
+        parser=lxml.html.HTMLParser(encoding="utf-8"),
+    )
+    etree.strip_elements(arvore, "script", "style", with_tail=False)
+    documento = Document(arvore)
+    if not documento.summary().strip():
+        return ""
+    return md(etree.tostring(documento.html, method="xml", encoding="unicode"))
+
+
+def montar_pagina(trecho):
+    return (
+        "<html><head><title>Teste</title></head><body><nav><a href='/'>Início</a>"
+        f"</nav><div id='conteudo'><p>{TEXTO * 3}</p>{trecho}<p>{TEXTO * 2}</p>"
+        "</div></body></html>"
+    )
+
+
+def carregar_paginas(caminhos):
+    arquivos = []
+    for caminho in map(Path, caminhos):
+        arquivos.extend(
+            sorted(caminho.rglob("*.html")) if caminho.is_dir() else [caminho]
+        )
+    return [(str(arquivo), arquivo.read_text(encoding="utf-8")) for arquivo in arquivos]
+
+
+# Uso: python -m testes.conversao_markdown [pasta_ou_arquivos_html...]
+paginas = [(f"trecho {i}", montar_pagina(trecho)) for i, trecho in enumerate(TRECHOS)]
+paginas += carregar_paginas(sys.argv[1:])
+
+divergentes = 0
+for caminho, html in paginas:
+    esperado = converter_com_markdownify(html)
+    obtido = converter_html_para_markdown(html, caminho).conteudo_markdown
+    if esperado != obtido:
+        divergentes += 1
+        diferenca = difflib.unified_diff(
+            esperado.splitlines(), obtido.splitlines(), lineterm=""
+        )
+        logging.warning(
+            f"Markdown divergente em {caminho}:\n" + "\n".join(list(diferenca)[:20])
+        )
+
+logging.info(f"Páginas: {len(paginas)}, divergentes: {divergentes}")
+assert divergentes == 0
+print("conversão markdown ok")
@@ -0,0 +1,177 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from loaders.gitloader import diff_ultima_sincronizacao, download_repos
+
+# Repositórios falsos: (branch padrão, sha, arquivos)
+REPOS = {
+    "usuario/com-main": ("main", "a" * 40, {"README.md": "# main", "logo.png": "x"}),
+    "outro/com-main": ("main", "d" * 40, {"README.md": "# outro"}),
+    "usuario/com-master": (
+        "master",
+        "b" * 40,
+        {"docs/guia.md": "# guia", "src/app.py": "print()"},
+    ),
+}
+PEDIDOS = []
+
+
+def criar_zip(repositorio: str, sha: str, arquivos: dict) -> bytes:
+    """
+    Monta o zip no formato do GitHub, com a pasta raiz '<repo>-<sha>/'.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zfile:
+        for caminho, conteudo in arquivos.items():
+            zfile.writestr(f"{repositorio}-{sha}/{caminho}", conteudo)
+    return buffer.getvalue()
+
+
+class StandInGitHub(BaseHTTPRequestHandler):
+    """
+    Responde como a API e o download de zips do GitHub para os REPOS.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def responder(self, status: int, corpo: bytes = b"", tipo: str = "text/plain"):
+        self.send_response(status)
+        self.send_header("content-type", tipo)
+        self.send_header("content-length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        PEDIDOS.append(self.path)
+        partes = self.path.strip("/").split("/")
+        if partes[0] == "api" and len(partes) >= 4:
+            nome = f"{partes[2]}/{partes[3]}"
+            if nome not in REPOS:
+                return self.responder(404)
+            branch, sha, _ = REPOS[nome]
+            if len(partes) == 4:
+                corpo = json.dumps({"default_branch": branch}).encode()
+                return self.responder(200, corpo, "application/json")
+            if partes[4] == "commits" and partes[5] in (branch, sha):
+                return self.responder(200, sha.encode())
+            return self.responder(404)
+        if len(partes) == 4 and partes[2] == "archive":
+            nome = f"{partes[0]}/{partes[1]}"
+            if nome in REPOS and partes[3] == f"{REPOS[nome][1]}.zip":
+                _, sha, arquivos = REPOS[nome]
+                corpo = criar_zip(partes[1], sha, arquivos)
+                return self.responder(200, corpo, "application/zip")
+        return self.responder(404)
+
+
+servidor = ThreadingHTTPServer(("127.0.0.1", 0), StandInGitHub)
+threading.Thread(target=servidor.serve_forever, daemon=True).start()
+base = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+pasta_original = os.getcwd()
+pasta_teste = tempfile.mkdtemp()
+os.chdir(pasta_teste)
+try:
+    urls = [
+        "https://github.com/usuario/com-main",
+        "https://github.com/usuario/com-master",
+        "https://github.com/usuario/nao-existe",
+        "https://github.com/outro/com-main",
+    ]
+    params = {"url_api": f"{base}/api", "url_github": base, "max_workers": 3}
+
+    resultado = download_repos(urls, **params)
+    assert resultado[urls[0]] == "data/repos/usuario/com-main"
+    assert resultado[urls[1]] == "data/repos/usuario/com-master"
+    assert resultado[urls[2]] is None
+    # Repositórios com o mesmo nome de usuários diferentes não se misturam
+    assert resultado[urls[3]] == "data/repos/outro/com-main"
+    with open("data/repos/outro/com-main/README.md", encoding="utf-8") as f:
+        assert f.read() == "# outro"
+    assert os.path.exists("data/repos/usuario/com-main/README.md")
+    assert not os.path.exists("data/repos/usuario/com-main/logo.png")
+    assert os.path.exists("data/repos/usuario/com-master/src/app.py")
+    assert sum("/archive/" in pedido for pedido in PEDIDOS) == 3
+    diff = diff_ultima_sincronizacao("data/repos/usuario/com-master")
+    assert diff.adicionados == ["docs/guia.md", "src/app.py"]
+
+    # Sem commits novos: nenhum zip é baixado e as árvores são reaproveitadas
+    PEDIDOS.clear()
+    resultado = download_repos(urls[:2], **params)
+    assert all(resultado.values())
+    assert not any("/archive/" in pedido for pedido in PEDIDOS)
+    assert not diff_ultima_sincronizacao("data/repos/usuario/com-main")
+
+    # Edições locais: os arquivos alterados ou apagados voltam do zip em cache
+    with open("data/repos/usuario/com-master/src/app.py", "w") as f:
+        f.write("editado")
+    os.remove("data/repos/usuario/com-master/docs/guia.md")
+    PEDIDOS.clear()
+    resultado = download_repos(urls[1:2], **params)
+    assert not any("/archive/" in pedido for pedido in PEDIDOS)
+    with open("data/repos/usuario/com-master/src/app.py", encoding="utf-8") as f:
+        assert f.read() == "print()"
+    assert os.path.exists("data/repos/usuario/com-master/docs/guia.md")
+    assert not diff_ultima_sincronizacao("data/repos/usuario/com-master")
+
+    # Filtros diferentes: extrai de novo a partir do zip em cache
+    PEDIDOS.clear()
+    resultado = download_repos(urls[1:2], padroes_incluidos=["*.md"], **params)
+    assert not any("/archive/" in pedido for pedido in PEDIDOS)
+    assert not os.path.exists("data/repos/usuario/com-master/src")
+    assert diff_ultima_sincronizacao("data/repos/usuario/com-master").removidos == [
+        "src/app.py"
+    ]
+
+    # Commit novo: o zip do novo SHA é baixado e só o que mudou é reescrito
+    REPOS["usuario/com-main"] = (
+        "main",
+        "c" * 40,
+        {"README.md": "# novo", "docs/extra.md": "extra"},
+    )
+    PEDIDOS.clear()
+    resultado = download_repos(urls[:1], **params)
+    assert sum("/archive/" in pedido for pedido in PEDIDOS) == 1
+    diff = diff_ultima_sincronizacao("data/repos/usuario/com-main")
+    assert (diff.adicionados, diff.modificados, diff.removidos) == (
+        ["docs/extra.md"],
+        ["README.md"],
+        [],
+    )
+    with open("data/repos/usuario/com-main/README.md", encoding="utf-8") as f:
+        assert f.read() == "# novo"
+
+    # Marcador corrompido: a árvore é conferida de novo em vez de falhar
+    with open("data/repos/usuario/com-main/.commit.json", "w") as f:
+        f.write('{"sha": "cc')
+    PEDIDOS.clear()
+    resultado = download_repos(urls[:1], **params)
+    assert resultado[urls[0]] == "data/repos/usuario/com-main"
+    assert not any("/archive/" in pedido for pedido in PEDIDOS)
+    with open("data/repos/usuario/com-main/.commit.json", encoding="utf-8") as f:
+        assert json.load(f)["sha"] == "c" * 40
+
+    # URL repetida é baixada uma vez; refs diferentes na mesma pasta, nenhuma
+    PEDIDOS.clear()
+    resultado = download_repos([urls[1], urls[1]], **params)
+    assert list(resultado) == [urls[1]]
+    assert sum(pedido.endswith("/usuario/com-master") for pedido in PEDIDOS) == 1
+    PEDIDOS.clear()
+    try:
+        download_repos([urls[0], f"{urls[0]}@{'c' * 40}"], **params)
+        assert False, "refs diferentes do mesmo repositório deveriam falhar"
+    except ValueError:
+        pass
+    assert not PEDIDOS
+finally:
+    os.chdir(pasta_original)
+    shutil.rmtree(pasta_teste)
+    servidor.shutdown()
+
+print("ingestão de repositórios ok")
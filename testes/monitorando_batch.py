@@ -34,7 +34,7 @@ params = {
     "url": "https://docs.streamlit.io/",
     "versao": "",
     "acessar_links_internos": True,
-    "batch_size": 30,
+    "concorrencia": 30,
     "profundidade": 24,
 }
 
@@ -44,7 +44,7 @@ thread_cpu = threading.Thread(target=monitor_cpu)
 thread_cpu.start()
 
 logging.info(
-    f"Testando o uso de batchs e monitorando a CPU. Batch={params.get('batch_size')}"
+    f"Testando a concorrência e monitorando a CPU. Concorrência={params.get('concorrencia')}"
 )
 resultado = scraper_docs(**params)
 